@@ -2,13 +2,32 @@
 """Add a link to trove-log.jsonl from the command line."""
 
 import argparse
+import codecs
 import json
 import re
 import subprocess
-import urllib.request
-import urllib.error
+from html.parser import HTMLParser
 
-from trove_utils import TROVE_FILE, load_trove, save_trove, create_link_entry
+import http_client
+from archive_outbox import outbox_path, queue_snapshots
+from commit_coalescer import Coalescer
+from trove_utils import (PROFILE, TROVE_FILE, add_profile_args, append_entries,
+                         create_link_entry, start_profiling)
+from url_meta import URL_META, cached, record_head
+
+try:
+    import yt_dlp
+except ImportError:
+    yt_dlp = None
+
+TITLE_CHUNK = 4096
+TITLE_READ_LIMIT = 256 * 1024  # give up on pages whose <head> is bigger than this
+CHARSET_SNIFF_BYTES = 1024
+HEADER_CHARSET_RE = re.compile(r"charset\s*=\s*[\"']?([\w.:-]+)", re.IGNORECASE)
+META_CHARSET_RE = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?\s*([\w.:-]+)", re.IGNORECASE)
+YTDLP_TIMEOUT = 30  # seconds per video
+
+_ydl = None
 
 
 def is_youtube_url(url):
@@ -27,77 +46,212 @@ def format_duration(seconds):
 
 
 def fetch_youtube_metadata(url):
-    """Fetch YouTube video metadata using yt-dlp. Returns dict with title, duration, channel, thumbnail."""
+    """Fetch YouTube video metadata using yt-dlp. Returns dict with title, duration, channel, thumbnail.
+
+    Results are kept in the URL metadata cache.
+    """
+    return fetch_youtube_metadata_batch([url]).get(url, {})
+
+
+def fetch_youtube_metadata_batch(urls):
+    """Fetch metadata for many YouTube URLs at once. Returns {url: metadata dict}.
+
+    Cached URLs are answered from the URL metadata cache; the rest are
+    resolved together, in-process with the yt_dlp module when it is
+    installed, else by a single yt-dlp run over all of them. URLs that
+    fail map to {}.
+    """
+    results = {}
+    misses = []
+    for url in dict.fromkeys(urls):
+        entry = URL_META.get(url, "youtube")
+        if entry is None:
+            misses.append(url)
+        else:
+            results[url] = entry["value"] or {}
+    if misses:
+        PROFILE.count("ytdlp_calls")
+        with PROFILE.span("network"):
+            found = _resolve_in_process(misses) if yt_dlp else _resolve_subprocess(misses)
+        for url in misses:
+            meta = found.get(url) or {}
+            URL_META.put(url, "youtube", meta or None)
+            results[url] = meta
+    return results
+
+
+def _youtube_meta(data):
+    """Pick the fields we store from a yt-dlp info dict."""
+    meta = {}
+    if data.get("title"):
+        meta["title"] = data["title"]
+    if data.get("duration"):
+        meta["duration"] = format_duration(data["duration"])
+    if data.get("uploader"):
+        meta["channel"] = data["uploader"]
+    if data.get("thumbnail"):
+        meta["thumbnail"] = data["thumbnail"]
+    return meta
+
+
+def _youtube_dl():
+    """The process-wide YoutubeDL instance, created on first use."""
+    global _ydl
+    if _ydl is None:
+        _ydl = yt_dlp.YoutubeDL({"quiet": True, "no_warnings": True, "skip_download": True,
+                                 "socket_timeout": YTDLP_TIMEOUT})
+    return _ydl
+
+
+def _resolve_in_process(urls):
+    found = {}
+    ydl = _youtube_dl()
+    for url in urls:
+        try:
+            found[url] = _youtube_meta(ydl.extract_info(url, download=False) or {})
+        except Exception as e:  # yt_dlp raises DownloadError and assorted extractor errors
+            print(f"Warning: Could not fetch YouTube metadata for {url}: {e}")
+    return found
+
+
+def _resolve_subprocess(urls):
+    """One yt-dlp run for all URLs; each video's JSON line carries its original_url."""
     try:
         result = subprocess.run(
-            ["yt-dlp", "--dump-json", "--no-download", url],
-            capture_output=True, text=True, timeout=30
+            ["yt-dlp", "--dump-json", "--no-download", "--ignore-errors", *urls],
+            capture_output=True, text=True, timeout=YTDLP_TIMEOUT * len(urls)
         )
-        if result.returncode != 0:
-            print(f"Warning: yt-dlp failed: {result.stderr.strip()}")
-            return {}
-        data = json.loads(result.stdout)
-        meta = {}
-        if data.get("title"):
-            meta["title"] = data["title"]
-        if data.get("duration"):
-            meta["duration"] = format_duration(data["duration"])
-        if data.get("uploader"):
-            meta["channel"] = data["uploader"]
-        if data.get("thumbnail"):
-            meta["thumbnail"] = data["thumbnail"]
-        return meta
-    except (subprocess.TimeoutExpired, FileNotFoundError, json.JSONDecodeError) as e:
+    except (subprocess.TimeoutExpired, FileNotFoundError) as e:
         print(f"Warning: Could not fetch YouTube metadata: {e}")
         return {}
+    if result.returncode != 0:
+        print(f"Warning: yt-dlp failed: {result.stderr.strip()}")
+    found = {}
+    for line in result.stdout.splitlines():
+        try:
+            data = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        url = data.get("original_url") or data.get("webpage_url")
+        if url:
+            found[url] = _youtube_meta(data)
+    return found
+
+
+class TitleParser(HTMLParser):
+    """Collects <title>, og:title and meta charset from a page's head.
+
+    `done` is set once both titles are known or the head has ended, so the
+    caller can stop reading. Entities are decoded by HTMLParser.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title = None
+        self.og_title = None
+        self.done = False
+        self._title_parts = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "title" and self.title is None:
+            self._title_parts = []
+        elif tag == "meta":
+            attrs = dict(attrs)
+            if (attrs.get("property") or attrs.get("name")) == "og:title" and attrs.get("content"):
+                self.og_title = " ".join(attrs["content"].split())
+                self.done = self.title is not None
+        elif tag == "body":
+            self.done = True
+
+    def handle_endtag(self, tag):
+        if tag == "title" and self._title_parts is not None:
+            self.title = " ".join("".join(self._title_parts).split())
+            self._title_parts = None
+            self.done = self.og_title is not None
+        elif tag == "head":
+            self.done = True
+
+    def handle_data(self, data):
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+
+
+def sniff_charset(content_type, head):
+    """Page encoding: BOM, then Content-Type charset, then a meta tag in the first bytes."""
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if head.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    for match in (HEADER_CHARSET_RE.search(content_type or ""),
+                  META_CHARSET_RE.search(head[:CHARSET_SNIFF_BYTES])):
+        if match:
+            charset = match.group(1)
+            charset = charset.decode("ascii", "ignore") if isinstance(charset, bytes) else charset
+            try:
+                name = codecs.lookup(charset).name
+            except LookupError:
+                continue
+            # Browsers decode pages labelled latin-1 or ascii as windows-1252
+            return "cp1252" if name in ("iso8859-1", "ascii") else name
+    return "utf-8"
+
+
+def extract_title(chunks, content_type=""):
+    """Title from an iterable of raw HTML byte chunks, or None.
+
+    Decodes incrementally with the sniffed charset and stops consuming chunks
+    as soon as the title is settled. Falls back to og:title.
+    """
+    parser = TitleParser()
+    decoder = None
+    head = b""  # bytes held back until there are enough to sniff the charset
+    read = 0
+    for chunk in chunks:
+        read += len(chunk)
+        if decoder is None:
+            head += chunk
+            if len(head) < CHARSET_SNIFF_BYTES:
+                continue
+            chunk, head = head, b""
+            decoder = codecs.getincrementaldecoder(sniff_charset(content_type, chunk))(errors="replace")
+        parser.feed(decoder.decode(chunk))
+        if parser.done or read >= TITLE_READ_LIMIT:
+            break
+    if head:  # short page
+        parser.feed(head.decode(sniff_charset(content_type, head), errors="replace"))
+    return parser.title or parser.og_title or None
 
 
 def fetch_title(url):
-    """Fetch page title from URL. Returns None on failure."""
+    """Fetch page title from URL (via the URL metadata cache). Returns None on failure."""
+    return cached(url, "title", lambda: _fetch_title(url))
+
+
+def _fetch_title(url):
     try:
-        req = urllib.request.Request(url, headers={"User-Agent": "trove-link-saver/1.0"})
-        with urllib.request.urlopen(req, timeout=10) as response:
-            # Read first 64KB - title should be near the top
-            html = response.read(1024*1024).decode("utf-8", errors="ignore")
-            match = re.search(r"<title[^>]*>([^<]+)</title>", html, re.IGNORECASE)
-            if match:
-                return match.group(1).strip()
-    except (urllib.error.URLError, TimeoutError, OSError) as e:
+        with PROFILE.span("network"), http_client.get(url, stream=True) as response:
+            record_head(url, response)
+            if response.status >= 400:
+                print(f"Warning: Could not fetch title: HTTP {response.status}")
+                return None
+            content_type = response.headers.get("Content-Type", "")
+            if content_type and "html" not in content_type.lower():
+                return None
+            return extract_title(response.iter_chunks(TITLE_CHUNK), content_type)
+    except OSError as e:
         print(f"Warning: Could not fetch title: {e}")
     return None
 
 
-def trigger_archive(url):
-    """Request archive.org to snapshot the URL."""
-    save_url = f"https://web.archive.org/save/{url}"
-    try:
-        req = urllib.request.Request(
-            save_url,
-            data=b"",  # POST request
-            headers={
-                "User-Agent": "Mozilla/5.0 (compatible; trove-link-saver/1.0)",
-                "Accept": "text/html,application/xhtml+xml",
-            },
-        )
-        with urllib.request.urlopen(req, timeout=30) as response:
-            print(f"Archive.org snapshot requested (status {response.status})")
-    except urllib.error.HTTPError as e:
-        print(f"Warning: Archive.org returned {e.code} (snapshot may still be queued)")
-    except (urllib.error.URLError, TimeoutError, OSError) as e:
-        print(f"Warning: Archive.org request failed: {e}")
+def link_files():
+    """Files in the .links worktree that link writes touch."""
+    return [TROVE_FILE, outbox_path()]
 
 
 def git_commit(url, title):
-    """Commit trove-log.jsonl to the links branch (without checkout)."""
-    msg = f"Add link: {title or url}"
-    try:
-        subprocess.run(
-            ["make", "push-links", f"MSG={msg}"],
-            check=True, cwd=TROVE_FILE.parent,
-        )
-        print(f"Committed to links branch: {msg}")
-    except subprocess.CalledProcessError as e:
-        print(f"Warning: Git commit failed: {e}")
+    """Commit trove-log.jsonl (and the snapshot outbox) to the links branch (without checkout)."""
+    with Coalescer(TROVE_FILE.parent) as commits:
+        commits.add(link_files(), f"Add link: {title or url}")
 
 
 def add_link(url, title=None, tags=None, notes=None, no_archive=False, no_commit=False):
@@ -114,18 +268,18 @@ def add_link(url, title=None, tags=None, notes=None, no_archive=False, no_commit
         if title:
             print(f"Found title: {title}")
 
-    links = load_trove()
     link = create_link_entry(url, title, tags, notes,
                              duration=yt_meta.get("duration"),
                              channel=yt_meta.get("channel"),
                              thumbnail=yt_meta.get("thumbnail"))
-    links.append(link)
-    save_trove(links)
+    with PROFILE.span("save"):
+        append_entries([link])
     print(f"Added: {url}")
 
-    # Trigger archive.org snapshot
+    # Queue an archive.org snapshot (sent by `make drain-archive`)
     if not no_archive:
-        trigger_archive(url)
+        queue_snapshots([url])
+        print("Queued archive.org snapshot")
 
     # Commit the change
     if not no_commit:
@@ -138,10 +292,12 @@ def main():
     parser.add_argument("tags", nargs="*", help="Tags for the link")
     parser.add_argument("-t", "--title", help="Title for the link (auto-fetched if omitted)")
     parser.add_argument("-n", "--notes", help="Notes for the link")
-    parser.add_argument("--no-archive", action="store_true", help="Skip archive.org snapshot")
+    parser.add_argument("--no-archive", action="store_true", help="Don't queue an archive.org snapshot")
     parser.add_argument("--no-commit", action="store_true", help="Skip git commit")
+    add_profile_args(parser)
 
     args = parser.parse_args()
+    start_profiling("add_link", args.profile)
     add_link(args.url, args.title, args.tags or None, args.notes, args.no_archive, args.no_commit)
 
 
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""Durable outbox of archive.org snapshot requests.
+
+Adding links only queues snapshot requests (queue_snapshots), so a slow or
+rate-limited archive.org never stalls submissions or imports. The outbox is
+.links/archive-outbox.jsonl, next to the log, so it is committed with it and
+survives CI runs. Each line is a record for one URL; the latest record per
+URL wins:
+
+    {"url", "queued", "attempts", "next_try",
+     "state": "pending"|"done"|"skipped"|"failed", "status"}
+
+`drain` first looks for a recent capture (the .meta/archive-cache.json
+snapshot cache, then a CDX lookup) and skips the save when one is newer than
+--max-age days. Remaining requests are sent concurrently over rate-limited
+lanes (all saves go to one host); each outcome is appended as it completes,
+failures are retried with exponential backoff up to MAX_ATTEMPTS, and the
+outbox is then rewritten keeping only pending records. The rewrite re-reads
+the outbox under its lock (archive-outbox.jsonl.lock, also held by
+queue_snapshots), so requests queued during a drain are kept. A fresh or newly
+saved snapshot is recorded on the link with a set_archive op
+({"archive_url", "archived"}).
+
+CLI: python3 archive_outbox.py drain [--budget SECS] [--lanes N] [--interval SECS] [--max-age DAYS]
+     python3 archive_outbox.py status
+"""
+
+import argparse
+import json
+from datetime import datetime, timedelta, timezone
+
+from hostpool import run_pool
+from trove_utils import TROVE_FILE, append_entries, file_lock, save_trove
+from wayback import (SNAPSHOT_CACHE, SnapshotCache, is_fresh, latest_snapshot, save_snapshot,
+                     snapshot_time)
+
+SAVE_LANES = 2
+SAVE_INTERVAL = 8.0  # per lane: ~15 saves/min overall, archive.org's anonymous limit
+RETRY_BASE = timedelta(minutes=10)
+MAX_ATTEMPTS = 6
+MAX_SNAPSHOT_AGE = timedelta(days=30)  # don't re-save pages captured more recently
+LOOKUP_FAILED = object()
+
+
+def outbox_path(trove_path=None):
+    """Outbox file next to the given log."""
+    return (trove_path or TROVE_FILE).with_name("archive-outbox.jsonl")
+
+
+def load_outbox(path=None):
+    """Fold the outbox to {url: latest record}, skipping torn lines."""
+    path = path or outbox_path()
+    records = {}
+    if path.exists():
+        with open(path) as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[rec["url"]] = rec
+    return records
+
+
+def queue_snapshots(urls, path=None, now=None):
+    """Queue snapshot requests for URLs not already pending. Returns the count queued."""
+    path = path or outbox_path()
+    now = (now or datetime.now(timezone.utc)).isoformat()
+    with file_lock(path):
+        pending = {url for url, rec in load_outbox(path).items() if rec["state"] == "pending"}
+        new = []
+        for url in dict.fromkeys(urls):
+            if url not in pending:
+                new.append({"url": url, "queued": now, "attempts": 0, "next_try": now,
+                            "state": "pending"})
+        if new:
+            append_entries(new, path)
+    return len(new)
+
+
+def _outcome(rec, status, now):
+    """Next record for `rec` after an attempt that returned `status` (0 = network error)."""
+    attempts = rec["attempts"] + 1
+    if 0 < status < 400:
+        return {**rec, "attempts": attempts, "state": "done", "status": status}
+    if attempts >= MAX_ATTEMPTS or (400 <= status < 500 and status != 429):
+        return {**rec, "attempts": attempts, "state": "failed", "status": status}
+    next_try = now + RETRY_BASE * 2 ** (attempts - 1)
+    return {**rec, "attempts": attempts, "next_try": next_try.isoformat(), "status": status}
+
+
+def set_archive_op(url, snapshot):
+    """Log op recording a snapshot on the link."""
+    return {"op": "set_archive", "url": url, "archive_url": snapshot["archive_url"],
+            "archived": snapshot_time(snapshot["timestamp"]).isoformat(),
+            "added": datetime.now(timezone.utc).isoformat()}
+
+
+def drain(trove_path=None, budget=None, lanes=SAVE_LANES, interval=SAVE_INTERVAL,
+          max_age=MAX_SNAPSHOT_AGE, cache=None, save=save_snapshot, lookup=latest_snapshot):
+    """Send due snapshot requests. Returns (done, skipped, failed, still pending).
+
+    A URL whose newest capture (from `cache`, else a CDX lookup) is within
+    `max_age` is not saved again. Known snapshots are recorded on the link
+    with a set_archive op.
+    """
+    path = outbox_path(trove_path)
+    cache = cache if cache is not None else SnapshotCache()
+    records = load_outbox(path)
+    now = datetime.now(timezone.utc)
+    due = [url for url, rec in records.items()
+           if rec["state"] == "pending" and datetime.fromisoformat(rec["next_try"]) <= now]
+    print(f"{len(due)} snapshot request(s) due, {len(records)} in outbox")
+
+    def finish(url, rec, snapshot):
+        if snapshot:
+            append_entries([set_archive_op(url, snapshot)], trove_path)
+        records[url] = rec
+        append_entries([rec], path)
+
+    skipped = 0
+    to_send = []
+    for url in due:
+        entry = cache.get(url)
+        if is_fresh(entry, max_age, now):
+            finish(url, {**records[url], "state": "skipped"}, entry)
+            skipped += 1
+            print(f"  FRESH {entry['archive_url']}")
+        else:
+            to_send.append(url)
+
+    def attempt(url):
+        """Look up the newest capture, then save only if it is stale."""
+        found = LOOKUP_FAILED
+        try:
+            found = lookup(url)
+        except (OSError, ValueError):
+            pass
+        if found is not LOOKUP_FAILED and is_fresh(found, max_age):
+            return found, None, None
+        try:
+            status, saved = save(url)
+        except OSError as e:
+            print(f"  ERROR {url}: {e}")
+            status, saved = 0, None
+        return found, status, saved
+
+    lane = {url: i % lanes for i, url in enumerate(to_send)}
+    for url, (found, status, saved) in run_pool(to_send, attempt, workers=lanes,
+                                                host_interval=interval, budget=budget,
+                                                host=lane.get):
+        if found is not LOOKUP_FAILED:
+            cache.put(url, found)
+        if status is None:
+            finish(url, {**records[url], "state": "skipped"}, found)
+            skipped += 1
+            print(f"  FRESH {found['archive_url']}")
+            continue
+        if saved:
+            cache.put(url, saved)
+        finish(url, _outcome(records[url], status, datetime.now(timezone.utc)), saved)
+        print(f"  {records[url]['state'].upper()} ({status}) {url}")
+
+    done = sum(1 for rec in records.values() if rec["state"] == "done")
+    failed = sum(1 for rec in records.values() if rec["state"] == "failed")
+    # Re-read so records queued since the start of the drain survive the rewrite
+    with file_lock(path):
+        pending = [rec for rec in load_outbox(path).values() if rec["state"] == "pending"]
+        save_trove(pending, path)
+    return done, skipped, failed, len(pending)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send queued archive.org snapshot requests")
+    sub = parser.add_subparsers(dest="command", required=True)
+    drain_p = sub.add_parser("drain", help="Send due snapshot requests")
+    drain_p.add_argument("--budget", type=float, help="Stop starting requests after this many seconds")
+    drain_p.add_argument("--lanes", type=int, default=SAVE_LANES, help="Concurrent requests")
+    drain_p.add_argument("--interval", type=float, default=SAVE_INTERVAL,
+                         help="Seconds between requests per lane")
+    drain_p.add_argument("--max-age", type=float, default=MAX_SNAPSHOT_AGE.days,
+                         help=f"Skip saving if a capture newer than this many days exists "
+                              f"(default {MAX_SNAPSHOT_AGE.days})")
+    sub.add_parser("status", help="Show queued requests")
+    args = parser.parse_args()
+
+    if args.command == "drain":
+        # The cache is only persisted where the .meta worktree exists (not in CI)
+        cache = SnapshotCache(SNAPSHOT_CACHE if SNAPSHOT_CACHE.parent.is_dir() else None)
+        done, skipped, failed, pending = drain(
+            budget=args.budget, lanes=args.lanes, interval=args.interval,
+            max_age=timedelta(days=args.max_age), cache=cache)
+        cache.save()
+        print(f"Snapshots: {done} requested, {skipped} already fresh, {failed} gave up, "
+              f"{pending} still pending")
+    else:
+        for rec in load_outbox().values():
+            print(f"{rec['state']:8} attempts={rec['attempts']} next={rec['next_try']} {rec['url']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ and asks claude to suggest tags, clean title, and notes.
 Usage:
     python3 autotag.py           # tag one link
     python3 autotag.py --count 5 # tag up to 5 links
+    python3 autotag.py --profile # write a timing summary (or TROVE_PROFILE=1)
 """
 
 import hashlib
@@ -16,13 +17,17 @@ import subprocess
 import sys
 from html.parser import HTMLParser
 from pathlib import Path
-from trove_utils import TROVE_FILE, create_link_entry
+
+import http_client
+from trove_utils import PROFILE, append_entries, create_link_entry, start_profiling
+from url_meta import URL_META, record_head
 
 BUILDDIR = Path("_build")
 TAGS_FILE = BUILDDIR / "tags.jsonl"
 TROVE_BUILT = BUILDDIR / "trove.jsonl"
-PAGE_CACHE = Path(".meta/page-cache")
+PAGE_CACHE = Path(".meta/page-cache")  # superseded by url_meta; read-only fallback
 SKIP_LOG = Path(".meta/autotag-skips.jsonl")
+MAX_PAGE_BYTES = 2 * 1024 * 1024
 
 TAG_RULES = """Tags are short, atomic, lowercase words. Each tag is a URL path segment, so brevity matters.
 
@@ -88,48 +93,37 @@ def cache_key(url):
 
 
 def get_page_text(url):
-    """Get page text from cache, or fetch and cache it."""
-    if PAGE_CACHE.is_dir():
-        cached = PAGE_CACHE / cache_key(url)
-        if cached.exists():
-            return cached.read_text() or None
-
-    text = fetch_page_text(url)
-
-    if PAGE_CACHE.is_dir() and text and text != "not_html":
-        (PAGE_CACHE / cache_key(url)).write_text(text)
-
+    """Get page text from the URL metadata cache, or fetch and cache it.
+
+    Pages saved by older runs in PAGE_CACHE are still read as a fallback.
+    """
+    entry = URL_META.get(url, "text")
+    if entry is not None:
+        return entry["value"]
+    legacy = PAGE_CACHE / cache_key(url)
+    if legacy.exists():
+        return legacy.read_text() or None
+
+    with PROFILE.span("network"):
+        text = fetch_page_text(url)
+    URL_META.put(url, "text", text)
     return text
 
 
 def fetch_page_text(url):
     """Fetch URL and extract plain text from HTML."""
-    # Skip non-HTML content (PDFs, images, etc.)
-    try:
-        head = subprocess.run(
-            ["curl", "-sI", "--max-time", "5", "-A",
-             "Mozilla/5.0 (compatible; trove-autotag/1.0)", url],
-            capture_output=True, text=True, timeout=10
-        )
-        content_type = ""
-        for line in head.stdout.split("\n"):
-            if line.lower().startswith("content-type:"):
-                content_type = line.split(":", 1)[1].strip().lower()
-        if content_type and "html" not in content_type and "text" not in content_type:
-            return "not_html"
-    except (subprocess.TimeoutExpired, Exception):
-        pass
-
+    # One streamed GET: skip non-HTML content (PDFs, images, etc.) from the
+    # headers, before downloading the body
     try:
-        result = subprocess.run(
-            ["curl", "-sL", "--max-time", "15", "-A",
-             "Mozilla/5.0 (compatible; trove-autotag/1.0)", url],
-            capture_output=True, timeout=20
-        )
-        if result.returncode != 0:
-            return None
-        html = result.stdout.decode("utf-8", errors="replace")
-    except (subprocess.TimeoutExpired, Exception):
+        with http_client.get(url, timeout=15, stream=True) as resp:
+            record_head(url, resp)
+            content_type = resp.headers.get("Content-Type", "").lower()
+            if content_type and "html" not in content_type and "text" not in content_type:
+                return "not_html"
+            if resp.status >= 400:
+                return None
+            html = resp.read(MAX_PAGE_BYTES).decode("utf-8", errors="replace")
+    except OSError:
         return None
 
     extractor = TextExtractor()
@@ -244,18 +238,21 @@ def main():
     if "--count" in sys.argv:
         idx = sys.argv.index("--count")
         count = int(sys.argv[idx + 1])
+    start_profiling("autotag", "summary" if "--profile" in sys.argv else None)
 
     if not TROVE_BUILT.exists() or not TAGS_FILE.exists():
         print(f"Error: {BUILDDIR}/ not found. Run 'make build' first.")
         raise SystemExit(1)
 
-    candidates = find_least_tagged()
+    with PROFILE.span("load"):
+        candidates = find_least_tagged()
 
     if not candidates:
         print("No links found.")
         return
 
-    tag_vocab = load_tag_vocab()
+    with PROFILE.span("load"):
+        tag_vocab = load_tag_vocab()
     print(f"Processing up to {count} of {len(candidates)} links (fewest tags first).\n")
 
     tagged_count = 0
@@ -279,7 +276,8 @@ def main():
             log_skip(url, title, "fetch_failed")
             continue
 
-        tags, new_title, suggested_notes = ask_claude(url, title, notes, page_text, tag_vocab)
+        with PROFILE.span("claude"):
+            tags, new_title, suggested_notes = ask_claude(url, title, notes, page_text, tag_vocab)
         if not tags:
             print("  no tags returned, skipping")
             log_skip(url, title, "bad_claude_response")
@@ -295,8 +293,8 @@ def main():
 
         entry = create_link_entry(url, tags=tags, title=add_title,
                                   notes=add_notes, submitted_by="haiku")
-        with open(TROVE_FILE, "a") as f:
-            f.write(json.dumps(entry) + "\n")
+        with PROFILE.span("save"):
+            append_entries([entry])
 
         tagged_count += 1
         print()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Benchmark the Python pipeline on synthetic logs.
+
+Generates (and caches) synth_trove.py logs at each size, then times each stage
+and measures its peak traced memory in a separate run (tracemalloc slows
+execution, so it is kept out of the timing). Prints a JSON report.
+
+With --baseline, compares against a stored report and exits 1 if any stage's
+throughput dropped or peak memory grew by more than --tolerance. Baselines
+are machine-specific; regenerate with --write-baseline after hardware changes
+or intentional tradeoffs.
+
+CLI: python3 bench_trove.py [--sizes 10000 100000] [--baseline FILE | --write-baseline FILE]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from compact_trove import compact, strip_tracking_params
+from dedup_trove import dedup
+from generate_tags import generate_tags
+from normalize_tags import normalize_entry
+from synth_trove import generate
+from trove_utils import iter_trove, load_trove, save_trove
+
+CACHE_DIR = Path("_build/bench")
+DEFAULT_SIZES = (10_000, 100_000)
+
+
+def synth_log(size, seed=0):
+    """Path to a cached synthetic log with `size` ops."""
+    path = CACHE_DIR / f"synth-{size}-{seed}.jsonl"
+    if not path.exists():
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        save_trove(generate(size, seed), path)
+    return path
+
+
+def stage_parse(path, entries):
+    for _ in iter_trove(path):
+        pass
+
+
+def stage_dedup(path, entries):
+    dedup(entries)
+
+
+def stage_compact(path, entries):
+    compact(dict(e) for e in entries)
+
+
+def stage_strip_tracking_params(path, entries):
+    for entry in entries:
+        if "url" in entry:
+            strip_tracking_params(entry["url"])
+
+
+def stage_generate_tags(path, entries):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        generate_tags(path)
+
+
+def stage_normalize_entry(path, entries):
+    for entry in entries:
+        normalize_entry(entry)
+
+
+STAGES = {
+    "parse": stage_parse,
+    "dedup": stage_dedup,
+    "compact": stage_compact,
+    "strip_tracking_params": stage_strip_tracking_params,
+    "generate_tags": stage_generate_tags,
+    "normalize_entry": stage_normalize_entry,
+}
+
+
+def measure(stage, path, entries, repeat):
+    """Return (best seconds, peak traced MB) for one stage."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        stage(path, entries)
+        best = min(best, time.perf_counter() - t0)
+
+    tracemalloc.start()
+    stage(path, entries)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 1e6
+
+
+def run(sizes, stages, repeat):
+    results = {}
+    for size in sizes:
+        path = synth_log(size)
+        entries = load_trove(path)
+        for name in stages:
+            seconds, peak_mb = measure(STAGES[name], path, entries, repeat)
+            results[f"{name}@{size}"] = {
+                "ops": size,
+                "seconds": round(seconds, 4),
+                "ops_per_sec": round(size / seconds),
+                "peak_mb": round(peak_mb, 2),
+            }
+            print(f"  {name}@{size}: {size / seconds:,.0f} ops/s, {peak_mb:.1f} MB peak",
+                  file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression descriptions."""
+    regressions = []
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        if cur["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {cur['ops_per_sec']:,} ops/s "
+                               f"< baseline {base['ops_per_sec']:,}")
+        if cur["peak_mb"] > base["peak_mb"] * (1 + tolerance) + 0.5:
+            regressions.append(f"{key}: peak memory {cur['peak_mb']} MB "
+                               f"> baseline {base['peak_mb']} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the trove Python pipeline")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Synthetic log sizes in ops (e.g. 10000 100000 1000000)")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES),
+                        help="Stages to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing runs per stage (best kept)")
+    parser.add_argument("--baseline", help="Compare against this stored report")
+    parser.add_argument("--write-baseline", help="Save this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed fractional slowdown / memory growth (default 0.25)")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.stages, args.repeat)
+    print(json.dumps(results, indent=2))
+
+    if args.write_baseline:
+        Path(args.write_baseline).write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Wrote baseline {args.write_baseline}", file=sys.stderr)
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline, args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r}", file=sys.stderr)
+        if regressions:
+            raise SystemExit(1)
+        print("No regressions against baseline.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Batch writes to the .links / .meta worktrees into few commits.
+
+`make push-links` runs make, a shell, and `git add -A` (which stats the
+whole worktree) for every write. A Coalescer instead collects the paths
+written and their messages, and commits them together once max_ops ops or
+`interval` seconds have accumulated (or on flush/exit). Each commit stages
+exactly the named files with git plumbing, about five git processes per
+commit however many files or ops it covers:
+
+    hash-object -w --stdin-paths    store the file contents
+    update-index --index-info       stage them (or remove deleted files)
+    write-tree / commit-tree        build the commit on top of HEAD
+    update-ref HEAD                 advance the branch, checking the old tip
+"""
+
+import subprocess
+import time
+from pathlib import Path
+
+from trove_utils import PROFILE
+
+COMMIT_OPS = 100  # commit once this many ops are pending
+COMMIT_INTERVAL = 30.0  # ... or once the oldest pending op is this old (seconds)
+FILE_MODE = "100644"
+
+
+def _git(worktree, *args, stdin=None, check=True):
+    result = subprocess.run(["git", "-C", str(worktree), *args], input=stdin,
+                            capture_output=True, text=True, check=check)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def commit_paths(worktree, paths, msg):
+    """Commit the current contents of `paths` (deleted files are removed) on the worktree's HEAD.
+
+    Paths may be absolute or relative to the current directory, but must be
+    inside `worktree`. Returns the new commit id, or None if nothing changed.
+    Raises subprocess.CalledProcessError if a git command fails.
+    """
+    worktree = Path(worktree)
+    root = worktree.resolve()
+    rel = [Path(p).resolve().relative_to(root).as_posix() for p in paths]
+    present = [p for p in rel if (root / p).exists()]
+    with PROFILE.span("git"):
+        shas = _git(worktree, "hash-object", "-w", "--stdin-paths",
+                    stdin="".join(p + "\n" for p in present)).split() if present else []
+        info = [f"{FILE_MODE} {sha}\t{p}" for sha, p in zip(shas, present)]
+        info += [f"0 {'0' * 40}\t{p}" for p in rel if p not in present]
+        _git(worktree, "update-index", "--add", "--remove", "--index-info",
+             stdin="".join(line + "\n" for line in info))
+        tree = _git(worktree, "write-tree")
+        parent = _git(worktree, "rev-parse", "-q", "--verify", "HEAD", check=False)
+        if parent and _git(worktree, "rev-parse", f"{parent}^{{tree}}") == tree:
+            return None
+        commit = _git(worktree, "commit-tree", tree, *(["-p", parent] if parent else []), "-m", msg)
+        _git(worktree, "update-ref", "-m", f"commit: {msg.splitlines()[0]}", "HEAD", commit,
+             parent or "")
+    return commit
+
+
+class Coalescer:
+    """Collects written paths per worktree and commits them in batches.
+
+    Use as a context manager (or call flush()) so pending writes are
+    committed before exit.
+    """
+
+    def __init__(self, worktree, max_ops=COMMIT_OPS, interval=COMMIT_INTERVAL):
+        self.worktree = Path(worktree)
+        self.max_ops = max_ops
+        self.interval = interval
+        self.paths = {}  # insertion-ordered set
+        self.messages = []
+        self.ops = 0
+        self.since = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    def add(self, paths, msg, ops=1):
+        """Record a write of `paths` covering `ops` ops; commits if a batch is due."""
+        self.paths.update(dict.fromkeys(paths))
+        self.messages.append(msg)
+        self.ops += ops
+        if self.since is None:
+            self.since = time.monotonic()
+        if self.due():
+            self.flush()
+
+    def due(self):
+        return bool(self.messages) and (self.ops >= self.max_ops
+                                        or time.monotonic() - self.since >= self.interval)
+
+    def message(self):
+        if len(self.messages) == 1:
+            return self.messages[0]
+        return f"{len(self.messages)} updates ({self.ops} ops)\n\n" + "\n".join(
+            f"- {msg}" for msg in self.messages)
+
+    def flush(self):
+        """Commit everything pending. Returns the commit id, or None.
+
+        Failures (e.g. no such worktree) are reported, not raised; the
+        pending writes are dropped either way, as the files stay on disk
+        for the next commit.
+        """
+        if not self.messages:
+            return None
+        msg = self.message()
+        paths = list(self.paths)
+        self.paths, self.messages, self.ops, self.since = {}, [], 0, None
+        if not self.worktree.is_dir():
+            print(f"Warning: {self.worktree} is not checked out; not committing")
+            return None
+        try:
+            commit = commit_paths(self.worktree, paths, msg)
+        except subprocess.CalledProcessError as e:
+            print(f"Warning: Git commit in {self.worktree} failed: {e.stderr or e}")
+            return None
+        if commit:
+            print(f"Committed to {self.worktree}: {msg.splitlines()[0]}")
+        else:
+            print(f"No changes to commit in {self.worktree}")
+        return commit
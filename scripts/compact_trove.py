@@ -1,152 +1,367 @@
 #!/usr/bin/env python3
 """Compact trove-log.jsonl: strip tracking params, dedup, health-check, archive fallback.
 
-CLI: python3 compact_trove.py [--no-health-check] [--no-commit]
+Links are rechecked on an adaptive schedule: the longer a link's state has
+been stable, the longer it waits, while recently added or recently flipped
+links are rechecked sooner. Each run spends at most --max-checks requests on
+the most overdue links. Checks run concurrently (--workers) with a per-host
+rate limit (--host-interval); --budget stops starting new checks after N
+seconds, and unchecked links are picked up by the next run.
+
+Per-host latency and failure stats in .meta/host-stats.json set each host's
+timeout; a host with repeated network failures has its circuit breaker
+opened, deferring its remaining links to a later run.
+
+Dead links get an archive_url from archive.org; snapshot lookups are cached
+in .meta/archive-cache.json (see wayback.py), so only newly dead links cost
+a request.
+
+Check results are appended to .meta/link-check-log.jsonl as they complete,
+so an interrupted run keeps its progress; the log is folded to one record
+per URL once superseded records take up more than half of it.
+
+CLI: python3 compact_trove.py [--no-health-check] [--no-commit] [--workers N]
+                              [--host-interval SECS] [--budget SECS] [--max-checks N]
 """
 
 import argparse
 import json
-import subprocess
+import os
 import time
-import urllib.parse
-import urllib.request
-import urllib.error
-from datetime import datetime, timezone, timedelta
+from datetime import datetime, timezone
 from pathlib import Path
 
+import http_client
+from commit_coalescer import Coalescer
 from dedup_trove import dedup
-from trove_utils import load_trove, save_trove
+from hostpool import HostStats, host_of, run_pool
+from trove_utils import (PROFILE, TROVE_FILE, add_profile_args, iter_trove, save_trove,
+                         start_profiling, strip_tracking_params)
+from url_meta import URL_META, record_head
+from wayback import SNAPSHOT_CACHE, SnapshotCache, find_snapshots
 
 LINK_CHECK_LOG = Path(".meta/link-check-log.jsonl")
+HOST_STATS = Path(".meta/host-stats.json")
+# Rewrite the append-only check log once it is this many times its folded size
+COMPACT_RATIO = 2
 
-TRACKING_PARAMS = {
-    "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
-    "utm_id", "utm_source_platform", "utm_creative_format", "utm_marketing_tactic",
-    "fbclid", "gclid", "gclsrc", "msclkid", "twclid", "dclid", "yclid",
-    "mc_eid", "mc_cid", "_ga", "_gl", "s_kwcid",
-}
+# Recheck interval is a quarter of how long the link's state has been stable,
+# clamped to [MIN, MAX] days; links added in the last NEW_LINK_DAYS are
+# rechecked at least every NEW_LINK_RECHECK_DAYS.
+MIN_RECHECK_DAYS = 7
+MAX_RECHECK_DAYS = 180
+NEW_LINK_DAYS = 30
+NEW_LINK_RECHECK_DAYS = 3
+DEFAULT_MAX_CHECKS = 500
 
 
-def strip_tracking_params(url):
-    """Remove tracking query parameters from a URL."""
-    parsed = urllib.parse.urlparse(url)
-    if not parsed.query:
-        return url
-    params = urllib.parse.parse_qs(parsed.query, keep_blank_values=True)
-    cleaned = {k: v for k, v in params.items()
-               if k not in TRACKING_PARAMS and not k.startswith("utm_")}
-    new_query = urllib.parse.urlencode(cleaned, doseq=True)
-    return urllib.parse.urlunparse(parsed._replace(query=new_query))
+def strip_entry(entry):
+    """Strip tracking params from an entry's URL(s) in place; returns entry."""
+    if "url" in entry:
+        entry["url"] = strip_tracking_params(entry["url"])
+    # Also clean URLs in rename_tag ops
+    if entry.get("urls"):
+        urls = entry["urls"].split()
+        entry["urls"] = " ".join(strip_tracking_params(u) for u in urls)
+    return entry
 
 
 def compact(entries):
     """Strip tracking params from all entries, then dedup."""
-    for entry in entries:
-        if "url" in entry:
-            entry["url"] = strip_tracking_params(entry["url"])
-        # Also clean URLs in rename_tag ops
-        if entry.get("urls"):
-            urls = entry["urls"].split()
-            entry["urls"] = " ".join(strip_tracking_params(u) for u in urls)
-    return dedup(entries)
-
-
-def load_check_log():
-    """Load link health check log as {url: record}."""
+    return dedup(strip_entry(entry) for entry in entries)
+
+
+def load_check_log(path=LINK_CHECK_LOG):
+    """Load the link health check log as {url: latest record}.
+
+    The log is append-only, so later records for a URL replace earlier ones.
+    Lines torn by an interrupted run are skipped.
+    """
     records = {}
-    if LINK_CHECK_LOG.exists():
-        for line in LINK_CHECK_LOG.read_text().strip().split("\n"):
-            if line:
-                rec = json.loads(line)
+    if path.exists():
+        with open(path) as f:
+            for lineno, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Warning: {path}:{lineno}: skipping torn record")
+                    continue
                 records[rec["url"]] = rec
     return records
 
 
-def save_check_log(records):
-    """Save link health check log."""
-    with open(LINK_CHECK_LOG, "w") as f:
+def open_check_log(path=LINK_CHECK_LOG):
+    """Open the check log for appending, terminating a torn final line first."""
+    f = open(path, "a")
+    if f.tell():
+        with open(path, "rb") as r:
+            r.seek(-1, os.SEEK_END)
+            if r.read(1) != b"\n":
+                f.write("\n")
+    return f
+
+
+def save_check_log(records, path=LINK_CHECK_LOG):
+    """Rewrite the check log with one record per URL."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
         for rec in records.values():
             f.write(json.dumps(rec) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def compact_check_log(records, path=LINK_CHECK_LOG):
+    """Fold the check log to one record per URL once superseded records dominate.
+
+    Returns True if the log was rewritten.
+    """
+    if not path.exists():
+        return False
+    folded = sum(len(json.dumps(rec)) + 1 for rec in records.values())
+    if path.stat().st_size <= COMPACT_RATIO * folded:
+        return False
+    save_check_log(records, path)
+    return True
 
 
-def check_link(url):
-    """Check if a URL is alive. Returns (status_code, alive)."""
-    headers = {"User-Agent": "trove-link-checker/1.0"}
+def check_link(url, prev=None, timeout=http_client.DEFAULT_TIMEOUT):
+    """Check if a URL is alive. Returns (status_code, alive, validators).
+
+    `prev` is the URL's previous check record: its etag / last_modified are
+    sent as If-None-Match / If-Modified-Since, so an unchanged page answers
+    304 Not Modified (alive) without a body. `validators` holds the etag,
+    last_modified and final_url (after redirects) to store for next time.
+
+    The response is recorded in the URL metadata cache (see cached_check).
+    """
+    headers = {}
+    if prev and prev.get("alive"):
+        if prev.get("etag"):
+            headers["If-None-Match"] = prev["etag"]
+        if prev.get("last_modified"):
+            headers["If-Modified-Since"] = prev["last_modified"]
     # Try HEAD first
     try:
-        req = urllib.request.Request(url, method="HEAD", headers=headers)
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            return resp.status, 200 <= resp.status < 400
-    except urllib.error.HTTPError as e:
-        if e.code == 405:
-            # HEAD not allowed, fall back to GET
-            try:
-                req = urllib.request.Request(url, headers=headers)
-                with urllib.request.urlopen(req, timeout=10) as resp:
-                    return resp.status, 200 <= resp.status < 400
-            except urllib.error.HTTPError as e2:
-                return e2.code, False
-            except (urllib.error.URLError, TimeoutError, OSError):
-                return 0, False
-        return e.code, False
-    except (urllib.error.URLError, TimeoutError, OSError):
-        return 0, False
-
-
-def health_check(links, check_log):
-    """Check link health, skipping recently checked URLs. Mutates check_log."""
-    cutoff = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
-    to_check = []
-    for link in links:
-        url = link["url"]
-        rec = check_log.get(url)
-        if rec and rec.get("last_checked", "") > cutoff:
-            continue
-        to_check.append(url)
+        resp = http_client.head(url, headers=headers, timeout=timeout, retries=0)
+        if resp.status == 405:
+            # HEAD not allowed, fall back to GET (headers only)
+            with http_client.get(url, headers=headers, timeout=timeout, retries=0,
+                                 stream=True) as resp:
+                pass
+    except OSError:
+        return 0, False, {}
+    record_head(url, resp)
+
+    alive = 200 <= resp.status < 400
+    validators = {}
+    if alive:
+        # A 304 may omit validators; keep the ones we sent
+        not_modified = resp.status == 304
+        etag = resp.headers.get("ETag") or (not_modified and headers.get("If-None-Match"))
+        last_modified = (resp.headers.get("Last-Modified")
+                         or (not_modified and headers.get("If-Modified-Since")))
+        if etag:
+            validators["etag"] = etag
+        if last_modified:
+            validators["last_modified"] = last_modified
+        if resp.url != url:
+            validators["final_url"] = resp.url
+    return resp.status, alive, validators
+
+
+def cached_check(url, prev=None):
+    """check_link() result from a response in the URL metadata cache, or None.
+
+    A response recorded within the "head" TTL (e.g. by a title fetch) stands
+    in for a check; validators are carried over from `prev`.
+    """
+    entry = URL_META.get(url, "head")
+    if entry is None or not entry["value"] or not entry["value"]["status"]:
+        return None
+    status = entry["value"]["status"]
+    alive = 200 <= status < 400
+    validators = {}
+    if alive and prev:
+        validators = {k: prev[k] for k in ("etag", "last_modified") if prev.get(k)}
+    if alive and entry["value"]["final_url"] not in (None, url):
+        validators["final_url"] = entry["value"]["final_url"]
+    return status, alive, validators
+
+
+def parse_time(text):
+    """Parse an ISO date/timestamp as UTC; None if missing or malformed."""
+    try:
+        t = datetime.fromisoformat(text)
+    except (TypeError, ValueError):
+        return None
+    return t if t.tzinfo else t.replace(tzinfo=timezone.utc)
+
 
+def recheck_interval(link, rec, now):
+    """Days to wait between checks of a link, from its check history."""
+    stable_since = parse_time(rec.get("stable_since")) or parse_time(rec.get("last_checked")) or now
+    stable_days = (now - stable_since).total_seconds() / 86400
+    interval = min(max(stable_days / 4, MIN_RECHECK_DAYS), MAX_RECHECK_DAYS)
+    added = parse_time(link.get("added"))
+    if added and (now - added).days < NEW_LINK_DAYS:
+        interval = min(interval, NEW_LINK_RECHECK_DAYS)
+    return interval
+
+
+def recheck_priority(link, rec, now):
+    """How overdue a link's check is: >= 1 means due, never-checked is infinite."""
+    last_checked = parse_time(rec.get("last_checked")) if rec else None
+    if last_checked is None:
+        return float("inf")
+    age_days = (now - last_checked).total_seconds() / 86400
+    return age_days / recheck_interval(link, rec, now)
+
+
+def schedule_checks(links, check_log, max_checks=None, now=None):
+    """URLs due for a check, most overdue first, at most max_checks of them."""
+    now = now or datetime.now(timezone.utc)
+    due = []
+    for i, link in enumerate(links):
+        priority = recheck_priority(link, check_log.get(link["url"]), now)
+        if priority >= 1:
+            due.append((-priority, i, link["url"]))
+    due.sort()
+    return [url for _, _, url in due[:max_checks]]
+
+
+def health_check(links, check_log, workers=8, host_interval=1.0, budget=None,
+                 max_checks=None, host_stats=None, log_path=None):
+    """Check the most overdue links (see schedule_checks). Mutates check_log.
+
+    Checks run on `workers` threads, at most one per host at a time and
+    `host_interval` seconds apart per host. At most `max_checks` links are
+    checked; with `budget` (seconds), no new checks start once it is spent.
+    `host_stats` (a HostStats, updated in place) sets per-host timeouts and
+    defers links on hosts whose circuit breaker is open. With `log_path`,
+    each record is appended to the check log as soon as its check completes,
+    so an interrupted run keeps its results.
+
+    Links with a recent response in the URL metadata cache are resolved
+    first, without a request; they don't count toward host timings or
+    spacing.
+    """
+    host_stats = host_stats if host_stats is not None else HostStats()
+    to_check = schedule_checks(links, check_log, max_checks)
     if not to_check:
-        print("All links checked within 30 days, skipping health check.")
+        print("No links due for a recheck, skipping health check.")
         return
 
+    def timed_check(url):
+        t0 = time.monotonic()
+        result = check_link(url, check_log.get(url), timeout=host_stats.timeout(host_of(url)))
+        return result, time.monotonic() - t0
+
     print(f"Checking {len(to_check)} links...")
-    for i, url in enumerate(to_check):
-        status_code, alive = check_link(url)
-        check_log[url] = {
+    done = 0
+    revalidated = 0
+    checked = set()
+    log = open_check_log(log_path) if log_path else None
+
+    def finish(url, status_code, alive, validators):
+        nonlocal done, revalidated
+        done += 1
+        checked.add(url)
+        now = datetime.now(timezone.utc).isoformat()
+        prev = check_log.get(url)
+        if prev and prev.get("alive") == alive:
+            stable_since = prev.get("stable_since") or prev.get("last_checked") or now
+        else:
+            stable_since = now
+        rec = check_log[url] = {
             "url": url,
-            "last_checked": datetime.now(timezone.utc).isoformat(),
+            "last_checked": now,
             "status_code": status_code,
             "alive": alive,
+            "stable_since": stable_since,
+            **validators,
         }
+        if log is not None:
+            log.write(json.dumps(rec) + "\n")
+            log.flush()
+        if status_code == 304:
+            revalidated += 1
         status = "OK" if alive else f"DEAD ({status_code})"
-        print(f"  [{i+1}/{len(to_check)}] {status} {url}")
-        time.sleep(1)
+        print(f"  [{done}/{len(to_check)}] {status} {url}")
+
+    try:
+        to_fetch = []
+        for url in to_check:
+            result = cached_check(url, check_log.get(url))
+            if result is None:
+                to_fetch.append(url)
+            else:
+                finish(url, *result)
+        for url, (result, seconds) in run_pool(
+                to_fetch, timed_check, workers=workers, host_interval=host_interval,
+                budget=budget, host_ok=lambda h: not host_stats.is_open(h)):
+            host_stats.record(host_of(url), seconds, ok=result[0] != 0)
+            finish(url, *result)
+    finally:
+        if log is not None:
+            os.fsync(log.fileno())
+            log.close()
+
+    if revalidated:
+        print(f"{revalidated} links unchanged since last check (304 Not Modified).")
+    unchecked = [url for url in to_check if url not in checked]
+    deferred = [url for url in unchecked if host_stats.is_open(host_of(url))]
+    if deferred:
+        hosts = {host_of(url) for url in deferred}
+        print(f"Circuit open on {len(hosts)} host(s); deferred {len(deferred)} links: "
+              f"{', '.join(sorted(hosts))}")
+    if len(unchecked) > len(deferred):
+        print(f"Time budget spent; {len(unchecked) - len(deferred)} links left for the next run.")
+    summary = host_stats.summary()
+    if summary:
+        print("Slowest hosts this run:")
+        for line in summary:
+            print(line)
+
 
+def archive_fallback(links, check_log, cache=None):
+    """For dead links, find archive.org snapshots and add archive_url.
 
-def archive_fallback(links, check_log):
-    """For dead links, query archive.org for snapshots and add archive_url."""
-    dead_urls = [link for link in links
-                 if not check_log.get(link["url"], {}).get("alive", True)]
-    if not dead_urls:
+    Answers come from `cache` (a SnapshotCache) when fresh; the rest are
+    looked up concurrently and cached.
+    """
+    dead = {link["url"]: link for link in links
+            if not check_log.get(link["url"], {}).get("alive", True)}
+    if not dead:
         print("No dead links found.")
         return
 
-    print(f"Checking archive.org for {len(dead_urls)} dead links...")
-    for i, link in enumerate(dead_urls):
-        url = link["url"]
-        api_url = f"https://archive.org/wayback/available?url={urllib.parse.quote(url, safe='')}"
-        try:
-            req = urllib.request.Request(api_url, headers={"User-Agent": "trove-link-checker/1.0"})
-            with urllib.request.urlopen(req, timeout=10) as resp:
-                data = json.loads(resp.read())
-                snapshot = data.get("archived_snapshots", {}).get("closest", {})
-                if snapshot.get("available"):
-                    link["archive_url"] = snapshot["url"]
-                    print(f"  [{i+1}/{len(dead_urls)}] ARCHIVED {url}")
-                else:
-                    print(f"  [{i+1}/{len(dead_urls)}] NO ARCHIVE {url}")
-        except (urllib.error.URLError, TimeoutError, OSError, json.JSONDecodeError) as e:
-            print(f"  [{i+1}/{len(dead_urls)}] ERROR {url}: {e}")
-        time.sleep(2)
+    cache = cache if cache is not None else SnapshotCache()
+    cached = sum(1 for url in dead if cache.get(url) is not None)
+    print(f"Checking archive.org for {len(dead)} dead links ({cached} cached)...")
+    for i, (url, entry, error) in enumerate(find_snapshots(dead, cache)):
+        if error is not None:
+            print(f"  [{i+1}/{len(dead)}] ERROR {url}: {error}")
+            continue
+        if entry["archive_url"]:
+            dead[url]["archive_url"] = entry["archive_url"]
+            print(f"  [{i+1}/{len(dead)}] ARCHIVED {url}")
+        else:
+            print(f"  [{i+1}/{len(dead)}] NO ARCHIVE {url}")
+
+
+def commit_changes(no_health_check):
+    """Commit the compacted log and link-check-log to their branches."""
+    with Coalescer(TROVE_FILE.parent) as commits:
+        commits.add([TROVE_FILE], "compact trove-log")
+
+    if not no_health_check and LINK_CHECK_LOG.exists():
+        with Coalescer(LINK_CHECK_LOG.parent) as commits:
+            commits.add([p for p in (LINK_CHECK_LOG, HOST_STATS, SNAPSHOT_CACHE) if p.exists()],
+                        "update link-check-log")
 
 
 def main():
@@ -155,52 +370,59 @@ def main():
                         help="Skip link health checks and archive.org fallback")
     parser.add_argument("--no-commit", action="store_true",
                         help="Skip git commit")
+    parser.add_argument("--workers", type=int, default=8,
+                        help="Concurrent link checks (default 8)")
+    parser.add_argument("--host-interval", type=float, default=1.0,
+                        help="Seconds between checks to the same host (default 1)")
+    parser.add_argument("--budget", type=float,
+                        help="Stop starting health checks after this many seconds")
+    parser.add_argument("--max-checks", type=int, default=DEFAULT_MAX_CHECKS,
+                        help=f"Most links to check per run (default {DEFAULT_MAX_CHECKS})")
+    add_profile_args(parser)
     args = parser.parse_args()
+    start_profiling("compact_trove", args.profile)
 
     if not Path(".meta").is_dir():
         print("Error: .meta/ worktree not found. Run 'make setup-worktrees' first.")
         raise SystemExit(1)
 
     # Phase 1+2: Strip tracking params and compact
-    entries = load_trove()
-    original_count = len(entries)
-    links = compact(entries)
+    original_count = 0
+
+    def entries():
+        nonlocal original_count
+        for entry in iter_trove():
+            original_count += 1
+            yield entry
+
+    with PROFILE.span("transform"):
+        links = compact(entries())
+    PROFILE.count("entries", original_count)
     print(f"Compacted {original_count} entries → {len(links)} links")
-    save_trove(links)
+    with PROFILE.span("save"):
+        save_trove(links)
 
     # Phase 3+4: Health checks and archive fallback
     if not args.no_health_check:
-        check_log = load_check_log()
-        health_check(links, check_log)
-        archive_fallback(links, check_log)
+        with PROFILE.span("load"):
+            check_log = load_check_log()
+            host_stats = HostStats(HOST_STATS)
+            snapshot_cache = SnapshotCache(SNAPSHOT_CACHE)
+        with PROFILE.span("network"):
+            health_check(links, check_log, args.workers, args.host_interval, args.budget,
+                         args.max_checks, host_stats, log_path=LINK_CHECK_LOG)
+            archive_fallback(links, check_log, snapshot_cache)
         # Re-save links (archive_url may have been added)
-        save_trove(links)
-        save_check_log(check_log)
+        with PROFILE.span("save"):
+            save_trove(links)
+            if compact_check_log(check_log):
+                print(f"Compacted {LINK_CHECK_LOG} to {len(check_log)} records")
+            host_stats.save()
+            snapshot_cache.save()
 
     # Commit
     if not args.no_commit:
-        try:
-            subprocess.run(
-                ["make", "push-links", "MSG=compact trove-log"],
-                check=True,
-            )
-        except subprocess.CalledProcessError as e:
-            print(f"Warning: push-links failed: {e}")
-
-        if not args.no_health_check and LINK_CHECK_LOG.exists():
-            try:
-                subprocess.run(
-                    ["git", "-C", str(LINK_CHECK_LOG.parent),
-                     "add", LINK_CHECK_LOG.name],
-                    check=True,
-                )
-                subprocess.run(
-                    ["git", "-C", str(LINK_CHECK_LOG.parent),
-                     "commit", "-m", "update link-check-log"],
-                    check=True,
-                )
-            except subprocess.CalledProcessError as e:
-                print(f"Warning: meta commit failed: {e}")
+        commit_changes(args.no_health_check)
 
 
 if __name__ == "__main__":
@@ -5,161 +5,432 @@ Treats trove-log.jsonl as an append-only operation log. Each entry has an option
 'op' field (default: 'add'). Merge rules per URL:
 
 - Tags: union of all add/add_tag tags, minus remove_tag tags
-- Title: last add's title, unless a later set_title exists (sticky)
+- Title: last add's title, unless a later set_title exists (sticky);
+  fill_title (auto-fetched) only sets a title when there is none
 - Notes: concatenated from all adds (prefixed with "username: " when
   submitted_by is present); set_notes replaces accumulated notes
-- Other fields (duration, channel, thumbnail): last-write-wins from adds
+- Other fields (duration, channel, thumbnail, archive_url, archived):
+  last-write-wins from adds; set_archive sets archive_url and archived
 - added: earliest timestamp
 
-CLI: python3 dedup_trove.py <input> <output>
+With --checkpoint, the merge state is saved alongside the byte offset and hash
+of the log prefix it covers, so the next run replays only newly appended entries.
+
+With --jobs N, URLs are split into N hash partitions merged in worker processes;
+output is identical to the serial path.
+
+CLI: python3 dedup_trove.py <input> <output> [--checkpoint PATH] [--jobs N]
 """
 
-import sys
+import argparse
+import hashlib
+import json
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-from trove_utils import load_trove, save_trove
+from trove_utils import (CHUNK_SIZE, PROFILE, add_profile_args, iter_trove_offsets,
+                         save_trove, start_profiling)
+
+CHECKPOINT_VERSION = 3
+
+# Fields copied from adds, last write wins
+LWW_FIELDS = ("duration", "channel", "thumbnail", "archive_url", "archived")
 
 
-def dedup(entries):
+def dedup(entries, jobs=1):
     """Merge a list of operation entries into deduplicated links.
 
     Args:
-        entries: List of dicts from trove-log.jsonl (chronological order assumed).
+        entries: Iterable of dicts from trove-log.jsonl (chronological order
+            assumed); consumed once, so a streaming iter_trove() works.
+        jobs: Worker processes; above 1, URLs are merged in parallel partitions.
 
     Returns:
         List of merged link dicts, one per unique URL, sorted by earliest added.
     """
     # Per-URL state, keyed by url
-    merged = {}  # url -> dict of merged fields
+    merged = {}  # url -> LinkState
     url_order = []  # track insertion order
 
+    if jobs > 1:
+        merge_parallel(merged, url_order, entries, jobs)
+    else:
+        for entry in entries:
+            apply_entry(merged, url_order, entry)
+
+    return emit_links(merged, url_order)
+
+
+# Global tag table: each distinct tag string is stored once and referenced
+# from per-URL state by its small integer id.
+TAG_IDS = {}  # tag -> id
+TAG_NAMES = []  # id -> tag
+
+
+def tag_id(tag):
+    """Intern a tag, returning its id."""
+    tid = TAG_IDS.get(tag)
+    if tid is None:
+        tid = TAG_IDS[tag] = len(TAG_NAMES)
+        TAG_NAMES.append(tag)
+    return tid
+
+
+class LinkState:
+    """Merge state for one URL.
+
+    Tags are a bitmask over interned tag ids; notes are a list (an empty
+    tuple until the first note), joined on output.
+    Pickling and to_list() go through tag names and joined notes, so state
+    can cross processes and checkpoints whose tag tables differ.
+    """
+    __slots__ = ("tags", "title", "title_sticky", "notes", "added",
+                 "duration", "channel", "thumbnail", "archive_url", "archived", "deleted")
+
+    def __init__(self, added):
+        self.tags = 0
+        self.title = None
+        self.title_sticky = False
+        self.notes = ()
+        self.added = added
+        self.duration = None
+        self.channel = None
+        self.thumbnail = None
+        self.archive_url = None
+        self.archived = None
+        self.deleted = False
+
+    def add_tags(self, tags):
+        for t in tags:
+            self.tags |= 1 << tag_id(t)
+
+    def remove_tags(self, tags):
+        for t in tags:
+            tid = TAG_IDS.get(t)
+            if tid is not None:
+                self.tags &= ~(1 << tid)
+
+    def add_note(self, note):
+        if self.notes:
+            self.notes.append(note)
+        else:
+            self.notes = [note]
+
+    def has_tag(self, tag):
+        tid = TAG_IDS.get(tag)
+        return tid is not None and self.tags >> tid & 1 == 1
+
+    def tag_names(self):
+        names = []
+        mask = self.tags
+        while mask:
+            low = mask & -mask
+            names.append(TAG_NAMES[low.bit_length() - 1])
+            mask ^= low
+        return names
+
+    def joined_notes(self):
+        return "\n".join(self.notes)
+
+    def to_list(self):
+        return [self.tag_names(), self.title, self.title_sticky, self.joined_notes(), self.added,
+                self.duration, self.channel, self.thumbnail, self.archive_url, self.archived,
+                self.deleted]
+
+    @classmethod
+    def from_list(cls, values):
+        state = cls.__new__(cls)
+        (tags, state.title, state.title_sticky, state.notes, state.added,
+         state.duration, state.channel, state.thumbnail, state.archive_url, state.archived,
+         state.deleted) = values
+        state.tags = 0
+        state.add_tags(tags)
+        state.notes = [state.notes] if state.notes else ()
+        return state
+
+    def __reduce__(self):
+        return LinkState.from_list, (self.to_list(),)
+
+
+def apply_entry(merged, url_order, entry):
+    """Apply one operation entry to the per-URL merge state."""
+    op = entry.get("op", "add")
+
+    # rename_tag is a bulk operation across multiple URLs
+    if op == "rename_tag":
+        remove_tag = entry.get("remove_tag", "")
+        add_tags = entry.get("add_tags", "").split()
+        target_urls = set(entry.get("urls", "").split())
+        for url in target_urls:
+            if url not in merged:
+                continue
+            state = merged[url]
+            if state.has_tag(remove_tag):
+                state.remove_tags([remove_tag])
+                state.add_tags(add_tags)
+        return
+
+    url = entry.get("url")
+    if not url:
+        return
+
+    state = merged.get(url)
+    if state is None:
+        state = merged[url] = LinkState(entry.get("added", ""))
+        url_order.append(url)
+
+    # Track earliest added timestamp
+    entry_added = entry.get("added", "")
+    if entry_added and (not state.added or entry_added < state.added):
+        state.added = entry_added
+
+    if op == "add":
+        # Tags: union
+        state.add_tags(entry.get("tags", "").split())
+
+        # Title: last add wins, unless sticky set_title exists
+        if entry.get("title") and not state.title_sticky:
+            state.title = entry["title"]
+
+        # Notes: accumulate
+        note = entry.get("notes", "")
+        if note:
+            submitter = entry.get("submitted_by")
+            if submitter:
+                note = f"{submitter}: {note}"
+            state.add_note(note)
+
+        # Last-write-wins fields
+        for field in LWW_FIELDS:
+            if entry.get(field):
+                setattr(state, field, entry[field])
+
+    elif op == "set_title":
+        if entry.get("title"):
+            state.title = entry["title"]
+            state.title_sticky = True
+
+    elif op == "fill_title":
+        if entry.get("title") and not state.title:
+            state.title = entry["title"]
+
+    elif op == "set_notes":
+        # Replace all accumulated notes
+        note = entry.get("notes", "")
+        submitter = entry.get("submitted_by")
+        if submitter and note:
+            note = f"{submitter}: {note}"
+        state.notes = [note] if note else ()
+
+    elif op == "set_archive":
+        if entry.get("archive_url"):
+            state.archive_url = entry["archive_url"]
+            state.archived = entry.get("archived")
+
+    elif op == "add_tag":
+        state.add_tags(entry.get("tags", "").split())
+
+    elif op == "remove_tag":
+        state.remove_tags(entry.get("tags", "").split())
+
+    elif op == "delete":
+        state.deleted = True
+
+
+def partition_of(url, jobs):
+    """Stable partition number for a URL (same in every process)."""
+    return zlib.crc32(url.encode()) % jobs
+
+
+def _merge_partition(merged, entries):
+    """Worker: apply one partition's entries on top of its prior state."""
+    url_order = list(merged)
     for entry in entries:
-        op = entry.get("op", "add")
-
-        # rename_tag is a bulk operation across multiple URLs
-        if op == "rename_tag":
-            remove_tag = entry.get("remove_tag", "")
-            add_tags = entry.get("add_tags", "").split()
-            target_urls = set(entry.get("urls", "").split())
-            for url in target_urls:
-                if url not in merged:
-                    continue
-                state = merged[url]
-                if remove_tag in state["tags"]:
-                    state["tags"].discard(remove_tag)
-                    state["tags"].update(add_tags)
-            continue
+        apply_entry(merged, url_order, entry)
+    return merged
 
+
+def merge_parallel(merged, url_order, entries, jobs):
+    """Apply entries to merge state using `jobs` processes.
+
+    URLs are split into hash partitions, each merged by a worker with the
+    serial apply_entry(). A rename_tag op goes to every partition owning one
+    of its URLs; partitions skip URLs they have not seen, exactly as the serial
+    path skips URLs not yet added. url_order is tracked here, so emitting
+    the combined state gives output identical to the serial path.
+    """
+    parts = [([], {}) for _ in range(jobs)]  # (entries, prior state) per partition
+    for url, state in merged.items():
+        parts[partition_of(url, jobs)][1][url] = state
+    seen = set(merged)
+
+    for entry in entries:
+        if entry.get("op", "add") == "rename_tag":
+            targets = {partition_of(u, jobs) for u in entry.get("urls", "").split()}
+            for p in targets:
+                parts[p][0].append(entry)
+            continue
         url = entry.get("url")
         if not url:
             continue
-
-        if url not in merged:
-            merged[url] = {
-                "tags": set(),
-                "title": None,
-                "title_sticky": False,
-                "notes_parts": [],
-                "added": entry.get("added", ""),
-                "duration": None,
-                "channel": None,
-                "thumbnail": None,
-                "deleted": False,
-            }
+        if url not in seen:
+            seen.add(url)
             url_order.append(url)
+        parts[partition_of(url, jobs)][0].append(entry)
 
-        state = merged[url]
-
-        # Track earliest added timestamp
-        entry_added = entry.get("added", "")
-        if entry_added and (not state["added"] or entry_added < state["added"]):
-            state["added"] = entry_added
-
-        if op == "add":
-            # Tags: union
-            for t in entry.get("tags", "").split():
-                if t:
-                    state["tags"].add(t)
-
-            # Title: last add wins, unless sticky set_title exists
-            if entry.get("title") and not state["title_sticky"]:
-                state["title"] = entry["title"]
-
-            # Notes: accumulate
-            note = entry.get("notes", "")
-            if note:
-                submitter = entry.get("submitted_by")
-                if submitter:
-                    state["notes_parts"].append(f"{submitter}: {note}")
-                else:
-                    state["notes_parts"].append(note)
-
-            # Last-write-wins fields
-            for field in ("duration", "channel", "thumbnail"):
-                if entry.get(field):
-                    state[field] = entry[field]
-
-        elif op == "set_title":
-            if entry.get("title"):
-                state["title"] = entry["title"]
-                state["title_sticky"] = True
-
-        elif op == "set_notes":
-            # Replace all accumulated notes
-            note = entry.get("notes", "")
-            submitter = entry.get("submitted_by")
-            if submitter and note:
-                state["notes_parts"] = [f"{submitter}: {note}"]
-            else:
-                state["notes_parts"] = [note] if note else []
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(_merge_partition,
+                                [state for _, state in parts],
+                                [part_entries for part_entries, _ in parts]))
 
-        elif op == "add_tag":
-            for t in entry.get("tags", "").split():
-                if t:
-                    state["tags"].add(t)
-
-        elif op == "remove_tag":
-            for t in entry.get("tags", "").split():
-                state["tags"].discard(t)
+    combined = {}
+    for result in results:
+        combined.update(result)
+    merged.clear()
+    for url in url_order:
+        merged[url] = combined[url]
 
-        elif op == "delete":
-            state["deleted"] = True
 
-    # Build output links
+def emit_links(merged, url_order):
+    """Build output link dicts from merge state, in url_order."""
     result = []
     for url in url_order:
         state = merged[url]
-        if state["deleted"]:
+        if state.deleted:
             continue
-        link = {"url": url, "added": state["added"]}
-        if state["title"]:
-            link["title"] = state["title"]
-        tags = " ".join(sorted(state["tags"]))
+        link = {"url": url, "added": state.added}
+        if state.title:
+            link["title"] = state.title
+        tags = " ".join(sorted(state.tag_names()))
         if tags:
             link["tags"] = tags
-        notes = "\n".join(state["notes_parts"])
-        if notes:
-            link["notes"] = notes
-        for field in ("duration", "channel", "thumbnail"):
-            if state[field]:
-                link[field] = state[field]
+        if state.notes:
+            link["notes"] = state.joined_notes()
+        for field in LWW_FIELDS:
+            value = getattr(state, field)
+            if value:
+                link[field] = value
         result.append(link)
 
     return result
 
 
-def main():
-    if len(sys.argv) != 3:
-        print("Usage: python3 dedup_trove.py <input> <output>", file=sys.stderr)
-        sys.exit(1)
+def load_checkpoint(checkpoint_path):
+    """Load saved merge state. Returns dict or None if missing/unreadable."""
+    if not checkpoint_path or not checkpoint_path.exists():
+        return None
+    try:
+        ckpt = json.loads(checkpoint_path.read_text())
+    except ValueError:
+        return None
+    if ckpt.get("version") != CHECKPOINT_VERSION:
+        return None
+    ckpt["merged"] = {url: LinkState.from_list(values)
+                      for url, values in ckpt["merged"].items()}
+    return ckpt
 
-    input_path = Path(sys.argv[1])
-    output_path = Path(sys.argv[2])
 
-    entries = load_trove(input_path)
-    links = dedup(entries)
-    save_trove(links, output_path)
-    print(f"Deduplicated {len(entries)} entries → {len(links)} links → {output_path}")
+def save_checkpoint(checkpoint_path, merged, offset, prefix_hash):
+    """Persist merge state covering the first `offset` bytes of the log."""
+    state_out = {url: state.to_list() for url, state in merged.items()}
+    ckpt = {"version": CHECKPOINT_VERSION, "offset": offset,
+            "sha256": prefix_hash, "merged": state_out}
+    tmp = checkpoint_path.with_name(checkpoint_path.name + ".tmp")
+    tmp.write_text(json.dumps(ckpt))
+    os.replace(tmp, checkpoint_path)
+
+
+def _hash_range(f, hasher, start, end):
+    f.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = f.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        hasher.update(chunk)
+        remaining -= len(chunk)
+
+
+def dedup_log(log_path, checkpoint_path=None, jobs=1):
+    """Dedup a log file, resuming from a checkpoint when its prefix still matches.
+
+    The checkpoint records the merge state after the first `offset` bytes and
+    the SHA-256 of those bytes. If the log was rewritten (compact, normalize,
+    rewrite_amazon) the hash no longer matches and the whole log is replayed.
+
+    With jobs > 1 the new entries are merged by merge_parallel().
+
+    Returns:
+        (links, replayed) where replayed is the number of entries applied.
+    """
+    merged = {}
+    start = 0
+    hasher = hashlib.sha256()
+    end = log_path.stat().st_size if log_path.exists() else 0
+
+    with PROFILE.span("load"):
+        ckpt = load_checkpoint(checkpoint_path)
+        if ckpt and ckpt["offset"] <= end:
+            with open(log_path, "rb") as f:
+                _hash_range(f, hasher, 0, ckpt["offset"])
+            if hasher.hexdigest() == ckpt["sha256"]:
+                merged = ckpt["merged"]
+                start = ckpt["offset"]
+            else:
+                hasher = hashlib.sha256()
+    url_order = list(merged)
+
+    replayed = 0
+
+    def new_entries():
+        nonlocal replayed
+        for offset, entry in iter_trove_offsets(log_path, start):
+            if offset >= end:
+                break  # appended after we sized the file; next build picks it up
+            replayed += 1
+            yield entry
+
+    with PROFILE.span("transform"):
+        if jobs > 1:
+            merge_parallel(merged, url_order, new_entries(), jobs)
+        else:
+            for entry in new_entries():
+                apply_entry(merged, url_order, entry)
+    PROFILE.count("entries", replayed)
+
+    if checkpoint_path:
+        with PROFILE.span("save"):
+            if end > start:
+                with open(log_path, "rb") as f:
+                    _hash_range(f, hasher, start, end)
+            save_checkpoint(checkpoint_path, merged, end, hasher.hexdigest())
+
+    with PROFILE.span("transform"):
+        return emit_links(merged, url_order), replayed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplicate trove-log.jsonl")
+    parser.add_argument("input", help="Operation log to read")
+    parser.add_argument("output", help="Deduplicated JSONL to write")
+    parser.add_argument("--checkpoint",
+                        help="Merge-state checkpoint; replay only entries appended since")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Merge URL partitions in N worker processes")
+    add_profile_args(parser)
+    args = parser.parse_args()
+    start_profiling("dedup_trove", args.profile)
+
+    input_path = Path(args.input)
+    output_path = Path(args.output)
+    checkpoint_path = Path(args.checkpoint) if args.checkpoint else None
+
+    links, replayed = dedup_log(input_path, checkpoint_path, args.jobs)
+    with PROFILE.span("save"):
+        save_trove(links, output_path)
+    print(f"Replayed {replayed} entries → {len(links)} links → {output_path}")
 
 
 if __name__ == "__main__":
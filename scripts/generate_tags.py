@@ -10,7 +10,7 @@ import json
 import re
 import sys
 from pathlib import Path
-from trove_utils import TROVE_FILE
+from trove_utils import iter_trove
 
 TAGS_MD = Path("TAGS.md")
 
@@ -28,14 +28,10 @@ def parse_tags_md():
 
 
 def generate_tags(trove_path=None):
-    path = trove_path or TROVE_FILE
     tags = set()
     descriptions = parse_tags_md()
 
-    for line in path.read_text().strip().split('\n'):
-        if not line:
-            continue
-        entry = json.loads(line)
+    for entry in iter_trove(trove_path):
         op = entry.get("op", "add")
 
         if op == "set_tag_desc":
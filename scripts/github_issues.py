@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""GitHub issues API client for submission processing.
+
+Uses the GraphQL API over one keep-alive http_client session: open issues
+are listed with cursor pagination (PAGE_SIZE per request, so a large
+backlog takes a few requests rather than being cut off at the first page),
+and issues are closed CLOSE_BATCH at a time with one aliased closeIssue
+mutation per batch.
+
+Credentials come from GH_TOKEN / GITHUB_TOKEN (set in Actions) or
+`gh auth token`; the repository from GITHUB_REPOSITORY or `gh repo view`.
+"""
+
+import json
+import os
+import subprocess
+
+import http_client
+from trove_utils import PROFILE
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+PAGE_SIZE = 100  # GraphQL maximum
+CLOSE_BATCH = 50
+
+ISSUES_QUERY = """
+query($owner: String!, $name: String!, $label: String!, $after: String) {
+  repository(owner: $owner, name: $name) {
+    issues(first: %d, after: $after, states: OPEN, labels: [$label],
+           orderBy: {field: CREATED_AT, direction: ASC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes { id number body }
+    }
+  }
+}
+""" % PAGE_SIZE
+
+
+class APIError(OSError):
+    """The API answered with an HTTP error or GraphQL errors."""
+
+
+def _gh(*args):
+    result = subprocess.run(["gh", *args], capture_output=True, text=True, check=True)
+    return result.stdout.strip()
+
+
+class IssuesAPI:
+    """Lists and closes issues of one repository."""
+
+    def __init__(self, repo, token, url=GRAPHQL_URL):
+        self.owner, _, self.name = repo.partition("/")
+        self.token = token
+        self.url = url
+
+    @classmethod
+    def from_env(cls):
+        token = os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN") or _gh("auth", "token")
+        repo = (os.environ.get("GITHUB_REPOSITORY")
+                or _gh("repo", "view", "--json", "nameWithOwner", "-q", ".nameWithOwner"))
+        return cls(repo, token)
+
+    def query(self, query, variables=None):
+        """Run a GraphQL query. Returns (data, errors); raises APIError if there is no data."""
+        body = json.dumps({"query": query, "variables": variables or {}}).encode()
+        with PROFILE.span("network"):
+            resp = http_client.post(self.url, data=body, headers={
+                "Authorization": f"bearer {self.token}",
+                "Content-Type": "application/json",
+            })
+        if resp.status != 200:
+            raise APIError(f"GraphQL request: HTTP {resp.status}: {resp.read()[:200]!r}")
+        result = resp.json()
+        errors = result.get("errors") or []
+        if not result.get("data"):
+            raise APIError(f"GraphQL request: {errors}")
+        return result["data"], errors
+
+    def iter_open_issues(self, label):
+        """Yield {"id", "number", "body"} for every open issue with `label`, oldest first."""
+        after = None
+        while True:
+            data, _ = self.query(ISSUES_QUERY, {"owner": self.owner, "name": self.name,
+                                                "label": label, "after": after})
+            issues = data["repository"]["issues"]
+            yield from issues["nodes"]
+            if not issues["pageInfo"]["hasNextPage"]:
+                return
+            after = issues["pageInfo"]["endCursor"]
+
+    def close_issues(self, issues):
+        """Close issues (dicts with "id" and "number"). Returns the set of numbers closed.
+
+        Issues that could not be closed are left out; a failed batch request
+        (APIError, or a FetchError from the network) is reported and the
+        remaining batches are still tried.
+        """
+        closed = set()
+        for start in range(0, len(issues), CLOSE_BATCH):
+            batch = issues[start:start + CLOSE_BATCH]
+            params = ", ".join(f"$i{i}: ID!" for i in range(len(batch)))
+            fields = "\n".join(f"  i{i}: closeIssue(input: {{issueId: $i{i}}}) {{ issue {{ number }} }}"
+                               for i in range(len(batch)))
+            variables = {f"i{i}": issue["id"] for i, issue in enumerate(batch)}
+            try:
+                data, errors = self.query(f"mutation({params}) {{\n{fields}\n}}", variables)
+            except OSError as e:
+                print(f"Could not close issues {[issue['number'] for issue in batch]}: {e}")
+                continue
+            for error in errors:
+                print(f"Could not close issue: {error.get('message')}")
+            for i, issue in enumerate(batch):
+                if data.get(f"i{i}"):
+                    closed.add(issue["number"])
+        return closed
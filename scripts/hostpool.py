@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Concurrent, per-host-polite work pool for network stages.
+
+run_pool() runs a function over many URLs on a thread pool with a global
+concurrency cap. Politeness is per host: at most one request in flight per
+host, and successive requests to the same host start at least
+`host_interval` seconds apart. Scheduling happens in the calling thread, so
+workers never sit sleeping on a busy host while other hosts are ready, and
+results are yielded back to the caller's thread as they complete.
+
+HostStats keeps per-host latency and failure statistics across runs. It
+derives a per-host timeout from the latency average and opens a circuit
+breaker after repeated network failures, so the rest of a dead host's URLs
+can be deferred instead of each waiting out the full timeout.
+"""
+
+import json
+import os
+import time
+import urllib.parse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Longest the scheduler sleeps before re-checking the budget
+MAX_WAIT = 0.5
+
+EWMA_ALPHA = 0.3  # weight of the newest latency sample
+TIMEOUT_FACTOR = 4  # timeout = this many times the average latency...
+MIN_TIMEOUT = 3.0  # ...clamped to [MIN_TIMEOUT, MAX_TIMEOUT] seconds
+MAX_TIMEOUT = 10.0
+BREAKER_FAILURES = 3  # consecutive network failures that open the breaker
+BREAKER_COOLDOWN = timedelta(hours=12)
+
+
+def host_of(url):
+    """Lowercased hostname of a URL ('' if none)."""
+    return (urllib.parse.urlsplit(url).hostname or "").lower()
+
+
+def run_pool(items, func, *, workers=8, host_interval=1.0, budget=None, host=host_of,
+             host_ok=None):
+    """Run func(item) concurrently; yield (item, result) in completion order.
+
+    Args:
+        items: Work items (URLs by default), started in the order given,
+            subject to per-host spacing.
+        func: Called in a worker thread; exceptions propagate to the caller.
+        workers: Global cap on requests in flight.
+        host_interval: Minimum seconds between starts for one host.
+        budget: Optional seconds; once elapsed, no new items start and the
+            generator finishes after in-flight work. Unstarted items are
+            simply not yielded.
+        host: Maps an item to its politeness key.
+        host_ok: Optional predicate checked before each start; when it
+            returns False for a host, that host's remaining items are
+            dropped (not yielded).
+    """
+    queues = {}  # host -> list of items, in first-seen host order
+    for item in items:
+        queues.setdefault(host(item), []).append(item)
+    for q in queues.values():
+        q.reverse()  # pop() from the end keeps original order
+
+    deadline = time.monotonic() + budget if budget is not None else None
+    next_start = {}  # host -> earliest monotonic time for its next request
+    busy = set()
+    futures = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while queues or futures:
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                queues.clear()
+
+            wake = None
+            for h in list(queues):
+                if len(futures) >= workers:
+                    break
+                if h in busy:
+                    continue
+                if host_ok is not None and not host_ok(h):
+                    del queues[h]
+                    continue
+                ready_at = next_start.get(h, 0)
+                if ready_at > now:
+                    wake = ready_at if wake is None else min(wake, ready_at)
+                    continue
+                q = queues[h]
+                item = q.pop()
+                if not q:
+                    del queues[h]
+                busy.add(h)
+                next_start[h] = now + host_interval
+                futures[pool.submit(func, item)] = (item, h)
+
+            timeout = MAX_WAIT if wake is None else min(MAX_WAIT, max(0, wake - now))
+            if not futures:
+                if queues:
+                    time.sleep(timeout)
+                continue
+            done, _ = wait(futures, timeout=timeout if queues else None,
+                           return_when=FIRST_COMPLETED)
+            for future in done:
+                item, h = futures.pop(future)
+                busy.discard(h)
+                yield item, future.result()
+
+
+class HostStats:
+    """Per-host latency/failure statistics, persisted as JSON.
+
+    Each host maps to {"ewma_ms", "checks", "failures", "consecutive_failures",
+    "open_until"}. Counters are cumulative across runs; `run` holds this run's
+    per-host [checks, failures, seconds] for the summary.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.hosts = {}
+        self.run = {}
+        if self.path and self.path.exists():
+            self.hosts = json.loads(self.path.read_text())
+
+    def _get(self, host):
+        return self.hosts.setdefault(host, {
+            "ewma_ms": None, "checks": 0, "failures": 0,
+            "consecutive_failures": 0, "open_until": None,
+        })
+
+    def timeout(self, host):
+        """Request timeout for a host: a multiple of its average latency."""
+        stats = self.hosts.get(host)
+        if not stats or stats["ewma_ms"] is None:
+            return MAX_TIMEOUT
+        return min(max(TIMEOUT_FACTOR * stats["ewma_ms"] / 1000, MIN_TIMEOUT), MAX_TIMEOUT)
+
+    def is_open(self, host, now=None):
+        """True while the host's circuit breaker is open (skip its requests)."""
+        stats = self.hosts.get(host)
+        if not stats or not stats["open_until"]:
+            return False
+        now = now or datetime.now(timezone.utc)
+        return datetime.fromisoformat(stats["open_until"]) > now
+
+    def record(self, host, seconds, ok, now=None):
+        """Record one request: `ok` is False for network-level failures.
+
+        BREAKER_FAILURES consecutive failures open the breaker for
+        BREAKER_COOLDOWN; after that, one probe is let through, and a further
+        failure re-opens it immediately.
+        """
+        stats = self._get(host)
+        run = self.run.setdefault(host, [0, 0, 0.0])
+        stats["checks"] += 1
+        run[0] += 1
+        run[2] += seconds
+        if ok:
+            ms = seconds * 1000
+            prev = stats["ewma_ms"]
+            stats["ewma_ms"] = round(ms if prev is None else EWMA_ALPHA * ms + (1 - EWMA_ALPHA) * prev, 1)
+            stats["consecutive_failures"] = 0
+            stats["open_until"] = None
+            return
+        stats["failures"] += 1
+        stats["consecutive_failures"] += 1
+        run[1] += 1
+        if stats["consecutive_failures"] >= BREAKER_FAILURES:
+            now = now or datetime.now(timezone.utc)
+            stats["open_until"] = (now + BREAKER_COOLDOWN).isoformat()
+
+    def summary(self, limit=10):
+        """Lines describing the hosts that took longest this run."""
+        lines = []
+        slowest = sorted(self.run.items(), key=lambda kv: kv[1][2], reverse=True)
+        for host, (checks, failures, seconds) in slowest[:limit]:
+            stats = self.hosts[host]
+            avg = f"{stats['ewma_ms']:.0f}ms" if stats["ewma_ms"] is not None else "-"
+            state = "  CIRCUIT OPEN" if self.is_open(host) else ""
+            lines.append(f"  {host}: {checks} checks, {failures} failed, {seconds:.1f}s total, "
+                         f"avg {avg}, timeout {self.timeout(host):.1f}s{state}")
+        return lines
+
+    def save(self):
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.hosts, indent=1, sort_keys=True) + "\n")
+        os.replace(tmp, self.path)
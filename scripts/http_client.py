@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""Shared HTTP client for network stages.
+
+Keeps idle keep-alive connections per (scheme, host, port), so repeat
+requests to a host skip TCP and TLS setup. Every request gets the same
+User-Agent, a timeout, gzip decoding, redirect following, and retries with
+exponential backoff on connection errors (not timeouts) and 429/502/503/504.
+A redirect to another scheme or host drops credentials and conditional
+headers (CROSS_ORIGIN_DROP), so a token is never sent to a third party.
+Non-ASCII characters in the path and query are percent-encoded.
+
+Responses are buffered by default; pass stream=True to read incrementally
+(and close, or use as a context manager). A streamed response that is closed
+before its body is fully read drops its connection instead of reusing it.
+
+Network failures raise FetchError (an OSError); HTTP error statuses are
+returned as responses, not raised.
+"""
+
+import http.client
+import json
+import ssl
+import threading
+import time
+import urllib.parse
+import zlib
+
+from trove_utils import PROFILE
+
+USER_AGENT = "Mozilla/5.0 (compatible; trove/1.0; +https://trove.saul.pw)"
+DEFAULT_TIMEOUT = 10
+RETRY_STATUSES = {429, 502, 503, 504}
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+MAX_REDIRECTS = 5
+CROSS_ORIGIN_DROP = {"authorization", "proxy-authorization", "cookie",
+                     "if-none-match", "if-modified-since"}
+MAX_IDLE_PER_HOST = 4
+URI_SAFE = "/%:@!$&'()*+,;=~"
+READ_SIZE = 16 * 1024
+
+
+class FetchError(OSError):
+    """A request failed at the network level after all retries."""
+
+
+class _Pool:
+    """Idle keep-alive connections keyed by (scheme, host, port)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.idle = {}
+
+    def get(self, key, timeout):
+        with self.lock:
+            conns = self.idle.get(key)
+            conn = conns.pop() if conns else None
+        if conn is not None:
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+        scheme, host, port = key
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(host, port, timeout=timeout,
+                                               context=ssl.create_default_context())
+        else:
+            conn = http.client.HTTPConnection(host, port, timeout=timeout)
+        return conn, False
+
+    def put(self, key, conn):
+        with self.lock:
+            conns = self.idle.setdefault(key, [])
+            if len(conns) < MAX_IDLE_PER_HOST:
+                conns.append(conn)
+                return
+        conn.close()
+
+    def close_all(self):
+        with self.lock:
+            idle, self.idle = self.idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+POOL = _Pool()
+
+
+class Response:
+    """An HTTP response with transparent gzip decoding."""
+
+    def __init__(self, raw, conn, key, url, method):
+        self.status = raw.status
+        self.reason = raw.reason
+        self.headers = raw.headers
+        self.url = url
+        self.method = method
+        self._raw = raw
+        self._conn = conn
+        self._key = key
+        self._buf = b""
+        self._eof = False
+        encoding = raw.headers.get("Content-Encoding", "").lower()
+        self._decomp = zlib.decompressobj(16 + zlib.MAX_WBITS) if encoding == "gzip" else None
+
+    def _fill(self):
+        try:
+            chunk = self._raw.read(READ_SIZE)
+        except (OSError, http.client.HTTPException) as e:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            raise FetchError(f"{self.method} {self.url}: {e}") from e
+        if not chunk:
+            if self._decomp:
+                self._buf += self._decomp.flush()
+            self._eof = True
+            return
+        self._buf += self._decomp.decompress(chunk) if self._decomp else chunk
+
+    def read(self, n=-1):
+        """Read up to n decoded bytes (all remaining if n < 0)."""
+        while not self._eof and (n < 0 or len(self._buf) < n):
+            self._fill()
+        if n < 0:
+            data, self._buf = self._buf, b""
+        else:
+            data, self._buf = self._buf[:n], self._buf[n:]
+        if self._eof and not self._buf:
+            self.close()
+        return data
+
+    def iter_chunks(self, size=READ_SIZE):
+        """Yield decoded chunks until the body ends."""
+        while True:
+            data = self.read(size)
+            if not data:
+                return
+            yield data
+
+    def preload(self):
+        """Read the whole body now, releasing the connection; read() still works."""
+        self._buf = self.read()
+
+    def json(self):
+        return json.loads(self.read())
+
+    def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        if self._raw.isclosed() and not self._raw.will_close:
+            POOL.put(self._key, conn)
+        else:
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _send(method, url, headers, data, timeout):
+    """One request on a pooled connection; a stale reused connection is retried fresh."""
+    parts = urllib.parse.urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https") or not parts.hostname:
+        raise FetchError(f"unsupported URL: {url}")
+    port = parts.port or (443 if scheme == "https" else 80)
+    key = (scheme, parts.hostname, port)
+    # IRI -> URI: percent-encode non-ASCII (and spaces); existing escapes are kept
+    path = urllib.parse.quote(parts.path or "/", safe=URI_SAFE)
+    if parts.query:
+        path += "?" + urllib.parse.quote(parts.query, safe=URI_SAFE + "?")
+
+    while True:
+        conn, reused = POOL.get(key, timeout)
+        try:
+            PROFILE.count("http_requests")
+            conn.request(method, path, body=data, headers=headers)
+            raw = conn.getresponse()
+            return Response(raw, conn, key, url, method)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            conn.close()
+            if not reused:
+                raise
+        except UnicodeError as e:
+            conn.close()
+            raise FetchError(f"{method} {url}: {e}") from e
+        except BaseException:
+            conn.close()
+            raise
+
+
+def _origin(url):
+    parts = urllib.parse.urlsplit(url)
+    return parts.scheme.lower(), parts.netloc.lower()
+
+
+def request(method, url, *, headers=None, data=None, timeout=DEFAULT_TIMEOUT,
+            retries=2, backoff=0.5, follow_redirects=True, stream=False):
+    """Make an HTTP request through the shared pool.
+
+    Args:
+        method: "GET", "HEAD", "POST", ...
+        url: Absolute http(s) URL.
+        headers: Extra headers; User-Agent and Accept-Encoding are defaulted.
+        data: Request body bytes.
+        timeout: Socket timeout in seconds for connect and each read.
+        retries: Extra attempts on connection errors and retryable statuses;
+            a timeout fails at once.
+        backoff: Base delay; attempt n waits backoff * 2**n (or Retry-After).
+        follow_redirects: Follow up to MAX_REDIRECTS redirects; headers in
+            CROSS_ORIGIN_DROP are not sent past a change of scheme or host.
+        stream: Return before reading the body.
+
+    Returns:
+        Response; .url is the final URL after redirects.
+    """
+    hdrs = {"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"}
+    hdrs.update(headers or {})
+    redirects = 0
+    attempt = 0
+    while True:
+        try:
+            resp = _send(method, url, hdrs, data, timeout)
+        except FetchError:
+            raise
+        except (OSError, http.client.HTTPException) as e:
+            # A timed-out host is not retried: each attempt would wait the full timeout
+            if attempt >= retries or isinstance(e, TimeoutError):
+                raise FetchError(f"{method} {url}: {e}") from e
+            time.sleep(backoff * 2 ** attempt)
+            attempt += 1
+            continue
+
+        if follow_redirects and resp.status in REDIRECT_STATUSES and resp.headers.get("Location"):
+            resp.read()
+            if redirects >= MAX_REDIRECTS:
+                raise FetchError(f"{method} {url}: too many redirects")
+            redirects += 1
+            new_url = urllib.parse.urljoin(url, resp.headers["Location"])
+            if _origin(new_url) != _origin(url):
+                hdrs = {k: v for k, v in hdrs.items() if k.lower() not in CROSS_ORIGIN_DROP}
+            url = new_url
+            if resp.status == 303 or (resp.status in (301, 302) and method == "POST"):
+                method, data = "GET", None
+            continue
+
+        if resp.status in RETRY_STATUSES and attempt < retries:
+            retry_after = resp.headers.get("Retry-After", "")
+            resp.read()
+            delay = backoff * 2 ** attempt
+            if retry_after.isdigit():
+                delay = max(delay, min(int(retry_after), 30))
+            time.sleep(delay)
+            attempt += 1
+            continue
+
+        if not stream:
+            resp.preload()
+        return resp
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def head(url, **kwargs):
+    return request("HEAD", url, **kwargs)
+
+
+def post(url, data=b"", **kwargs):
+    return request("POST", url, data=data, **kwargs)
@@ -5,7 +5,8 @@ import re
 import sys
 from pathlib import Path
 
-from trove_utils import TROVE_FILE, load_trove, save_trove, slugify
+from trove_index import TroveIndex
+from trove_utils import TROVE_FILE, append_entries, slugify
 
 def parse_md_file(filepath):
     """Parse a markdown file and extract links with metadata."""
@@ -77,15 +78,15 @@ def parse_md_file(filepath):
 def main():
     links_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path.home() / 'git/saul.pw/posts/links'
 
-    existing_links = load_trove()
-    existing_urls = {link['url'] for link in existing_links}
+    index = TroveIndex()
+    existing_urls = set()  # URLs found earlier in this import
 
     # Parse all md files
     new_links = []
     for md_file in sorted(links_dir.glob('*.md')):
         print(f"Parsing {md_file.name}...")
         for link in parse_md_file(md_file):
-            if link['url'] not in existing_urls:
+            if link['url'] not in existing_urls and link['url'] not in index:
                 # Add timestamp based on filename (YYYY-MM.md)
                 date_match = re.match(r'(\d{4})-(\d{2})\.md', md_file.name)
                 if date_match:
@@ -94,11 +95,11 @@ def main():
                 new_links.append(link)
                 existing_urls.add(link['url'])
 
+    index.close()
     print(f"\nFound {len(new_links)} new links to add")
 
     if new_links:
-        existing_links.extend(new_links)
-        save_trove(existing_links)
+        append_entries(new_links)
         print(f"Updated {TROVE_FILE}")
 
 if __name__ == '__main__':
@@ -7,11 +7,14 @@ Two-phase workflow:
 """
 
 import argparse
-import urllib.request
 from html.parser import HTMLParser
 
-from trove_utils import load_trove, save_trove, create_link_entry, slugify
-from add_link import trigger_archive, git_commit
+import http_client
+from trove_index import TroveIndex
+from trove_utils import TROVE_FILE, append_entries, create_link_entry, slugify
+from add_link import fetch_youtube_metadata_batch, is_youtube_url, link_files
+from archive_outbox import queue_snapshots
+from commit_coalescer import Coalescer
 
 
 SEPARATOR = " | "
@@ -85,9 +88,10 @@ class LinkExtractor(HTMLParser):
 
 def fetch_page(url):
     """Fetch HTML content from a URL."""
-    req = urllib.request.Request(url, headers={"User-Agent": "trove-link-saver/1.0"})
-    with urllib.request.urlopen(req, timeout=30) as response:
-        return response.read().decode("utf-8", errors="ignore")
+    response = http_client.get(url, timeout=30)
+    if response.status >= 400:
+        raise http_client.FetchError(f"GET {url}: HTTP {response.status}")
+    return response.read().decode("utf-8", errors="ignore")
 
 
 def sanitize_field(text):
@@ -119,10 +123,15 @@ def extract(url, tags, output):
     print(f"Wrote {output}")
 
 
-def do_import(filepath, no_archive, no_commit):
-    """Import links from a PSV file into trove-log.jsonl."""
-    links = load_trove()
-    existing_urls = {link["url"] for link in links}
+def do_import(filepath, no_archive, no_commit, no_metadata=False):
+    """Import links from a PSV file into trove-log.jsonl.
+
+    YouTube links get duration, channel and thumbnail (and a title, if the
+    PSV has none) from one batched yt-dlp lookup unless no_metadata is set.
+    """
+    index = TroveIndex()
+    existing_urls = set()  # URLs imported earlier in this file
+    rows = []
     added = 0
     skipped = 0
 
@@ -145,31 +154,45 @@ def do_import(filepath, no_archive, no_commit):
         tags = parts[2].strip()
         notes = parts[3].strip()
 
-        if url in existing_urls:
+        if url in existing_urls or url in index:
             print(f"Duplicate, skipping: {url}")
             skipped += 1
             continue
 
-        entry = create_link_entry(
-            url,
-            title=title or None,
-            tags=tags or None,
-            notes=notes or None,
-        )
-        links.append(entry)
+        rows.append((url, title, tags, notes))
         existing_urls.add(url)
         added += 1
         print(f"Added: {url}")
 
-        if not no_archive:
-            trigger_archive(url)
-
+    index.close()
+    youtube = {}
+    youtube_urls = [row[0] for row in rows if is_youtube_url(row[0])]
+    if youtube_urls and not no_metadata:
+        print(f"Fetching metadata for {len(youtube_urls)} YouTube link(s)")
+        youtube = fetch_youtube_metadata_batch(youtube_urls)
+
+    new_entries = []
+    for url, title, tags, notes in rows:
+        meta = youtube.get(url, {})
+        new_entries.append(create_link_entry(
+            url,
+            title=title or meta.get("title"),
+            tags=tags or None,
+            notes=notes or None,
+            duration=meta.get("duration"),
+            channel=meta.get("channel"),
+            thumbnail=meta.get("thumbnail"),
+        ))
     if added:
-        save_trove(links)
+        append_entries(new_entries)
         print(f"\nAdded {added} links ({skipped} duplicates skipped)")
+        if not no_archive:
+            queued = queue_snapshots([entry["url"] for entry in new_entries])
+            print(f"Queued {queued} archive.org snapshot(s)")
 
         if not no_commit:
-            git_commit(filepath, f"Import {added} links from {filepath}")
+            with Coalescer(TROVE_FILE.parent) as commits:
+                commits.add(link_files(), f"Import {added} links from {filepath}", ops=added)
     else:
         print(f"\nNo new links to add ({skipped} duplicates skipped)")
 
@@ -189,13 +212,15 @@ def main():
     import_parser.add_argument("file", help="PSV file to import")
     import_parser.add_argument("--no-archive", action="store_true", help="Skip archive.org snapshots")
     import_parser.add_argument("--no-commit", action="store_true", help="Skip git commit")
+    import_parser.add_argument("--no-metadata", action="store_true",
+                               help="Skip fetching YouTube metadata")
 
     args = parser.parse_args()
 
     if args.command == "extract":
         extract(args.url, args.tags, args.output)
     elif args.command == "import":
-        do_import(args.file, args.no_archive, args.no_commit)
+        do_import(args.file, args.no_archive, args.no_commit, args.no_metadata)
 
 
 if __name__ == "__main__":
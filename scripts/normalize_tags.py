@@ -5,10 +5,9 @@ Applies mechanical renames, splits compound tags, deletes deprecated tags.
 Run with --dry-run to preview changes without writing.
 """
 
-import json
 import sys
 
-from trove_utils import TROVE_FILE
+from trove_utils import TROVE_FILE, iter_trove, save_trove
 
 # old tag -> new tag(s), space-separated for splits
 RENAMES = {
@@ -103,30 +102,34 @@ def normalize_entry(entry):
 def main():
     dry_run = "--dry-run" in sys.argv
 
-    entries = []
+    count = 0
     total_changes = 0
-    for line in TROVE_FILE.read_text().strip().split("\n"):
-        if not line:
-            continue
-        entry = json.loads(line)
-        entry, changes = normalize_entry(entry)
-        entries.append(entry)
-        if changes:
-            total_changes += 1
-            title = entry.get("title", entry.get("url", "???"))[:60]
-            print(f"{title}")
-            for c in changes:
-                print(c)
+
+    def normalized():
+        nonlocal count, total_changes
+        for entry in iter_trove():
+            entry, changes = normalize_entry(entry)
+            count += 1
+            if changes:
+                total_changes += 1
+                title = entry.get("title", entry.get("url", "???"))[:60]
+                print(f"{title}")
+                for c in changes:
+                    print(c)
+            yield entry
+
+    if dry_run:
+        for _ in normalized():
+            pass
+    else:
+        save_trove(normalized())
 
     print(f"\n{total_changes} entries modified")
 
     if dry_run:
         print("(dry run, no changes written)")
     else:
-        with open(TROVE_FILE, "w") as f:
-            for entry in entries:
-                f.write(json.dumps(entry) + "\n")
-        print(f"Wrote {len(entries)} entries to {TROVE_FILE}")
+        print(f"Wrote {count} entries to {TROVE_FILE}")
 
 
 if __name__ == "__main__":
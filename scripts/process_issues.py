@@ -2,22 +2,28 @@
 """Process GitHub issues with 'submission' label and add links to trove-log.jsonl."""
 
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 import json
-import subprocess
-
-from trove_utils import TROVE_FILE, load_trove, save_trove, create_link_entry
-from add_link import fetch_title, trigger_archive, is_youtube_url, fetch_youtube_metadata
-
-
-def get_submission_issues():
-    """Fetch open issues with 'submission' label."""
-    result = subprocess.run(
-        ["gh", "issue", "list", "--label", "submission", "--state", "open",
-         "--json", "number,body"],
-        capture_output=True, text=True, check=True
-    )
-    return json.loads(result.stdout)
+import time
+from pathlib import Path
+
+from dedup_trove import apply_entry, dedup, emit_links
+from github_issues import IssuesAPI
+from hostpool import run_pool
+from trove_index import TroveIndex, entry_urls
+from trove_utils import (PROFILE, TROVE_FILE, add_profile_args, append_entries, create_link_entry,
+                         iter_trove, iter_trove_offsets, save_trove, start_profiling)
+from add_link import fetch_title, is_youtube_url, fetch_youtube_metadata_batch
+from archive_outbox import outbox_path, queue_snapshots
+from commit_coalescer import Coalescer
+
+SUBMISSION_LABEL = "submission"
+LINK_ACTIONS = ("add", "set_title", "set_notes", "add_tag", "remove_tag", "delete")
+TITLE_WORKERS = 8
+DAEMON_POLL = 2.0  # seconds between queue scans
+DAEMON_COMMIT = 30.0  # seconds between batched commits
+QUEUE_GRACE = 10.0  # seconds an unreadable queue file may still be being written
 
 
 def parse_issue_body(body):
@@ -30,171 +36,439 @@ def parse_issue_body(body):
     return fields
 
 
-def close_issue(number):
-    """Close a GitHub issue. Ignores errors (e.g., already closed)."""
-    result = subprocess.run(
-        ["gh", "issue", "close", str(number)],
-        capture_output=True, text=True
-    )
-    if result.returncode == 0:
+def issue_outbox_path(trove_path=None):
+    """Close outbox next to the given log."""
+    return (trove_path or TROVE_FILE).with_name("issue-outbox.jsonl")
+
+
+def load_issue_outbox(path):
+    """Fold the close outbox to {number: latest record}, skipping torn lines."""
+    records = {}
+    if path.exists():
+        with open(path) as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                records[rec["number"]] = rec
+    return records
+
+
+def record_closes(issues, state, path, **extra):
+    """Append a close-outbox record per issue."""
+    append_entries([{"number": issue["number"], "id": issue.get("id"), "state": state, **extra}
+                    for issue in issues], path)
+
+
+def log_size(trove_path=None):
+    path = trove_path or TROVE_FILE
+    return path.stat().st_size if path.exists() else 0
+
+
+def close_pending(api, trove_path=None):
+    """Close the issues waiting in the close outbox. Returns the numbers still pending.
+
+    An "applying" record whose batch never reached the log (the log is no
+    longer than it was before the append) is dropped, so the issue is
+    processed again; otherwise it is treated as pending.
+    """
+    path = issue_outbox_path(trove_path)
+    records = load_issue_outbox(path)
+    size = log_size(trove_path)
+    pending = [rec for rec in records.values()
+               if rec["state"] == "pending"
+               or (rec["state"] == "applying" and size > rec["log_offset"])]
+    closed = api.close_issues(pending) if pending else set()
+    for number in sorted(closed):
         print(f"Closed issue #{number}")
-    else:
-        print(f"Could not close issue #{number}: {result.stdout}\n{result.stderr}")
+    remaining = [{"number": rec["number"], "id": rec["id"], "state": "pending"}
+                 for rec in pending if rec["number"] not in closed]
+    if records:
+        save_trove(remaining, path)
+    return {rec["number"] for rec in remaining}
+
 
+def parse_issue(issue):
+    """Validate one issue. Returns (action, fields, close).
 
-def process_issue_list(issues, trove_path=None, local=False):
+    `action` is None when the issue is invalid; `close` says whether it should
+    be closed anyway. Unknown actions are treated as "add".
+    """
+    number = issue["number"]
+    fields = parse_issue_body(issue["body"])
+    action = fields.get("action", "add")
+    if action == "set_tag_desc":
+        if not fields.get("tag"):
+            print(f"Issue #{number}: Invalid set_tag_desc fields, skipping")
+            return None, fields, True
+    elif action == "rename_tag":
+        if not fields.get("remove_tag") or not fields.get("add_tags") or not fields.get("urls"):
+            print(f"Issue #{number}: Invalid rename_tag fields, skipping")
+            return None, fields, True
+    elif not fields.get("url"):
+        print(f"Issue #{number}: No URL found, skipping")
+        return None, fields, False
+    elif action not in LINK_ACTIONS:
+        action = "add"
+    return action, fields, True
+
+
+def issue_entry(number, action, fields, title=None, yt_meta=None):
+    """The log op for a parsed issue; for adds, `title`/`yt_meta` are resolved metadata."""
+    submitted_by = fields.get("submitted_by")
+    if action == "set_tag_desc":
+        entry = {"op": "set_tag_desc", "tag": fields["tag"],
+                 "description": fields.get("description", ""),
+                 "added": datetime.now(timezone.utc).isoformat()}
+        if submitted_by:
+            entry["submitted_by"] = submitted_by
+        print(f"Issue #{number}: Appended set_tag_desc for '{fields['tag']}'")
+        return entry
+    if action == "rename_tag":
+        entry = {"op": "rename_tag", "remove_tag": fields["remove_tag"],
+                 "add_tags": fields["add_tags"], "urls": fields["urls"],
+                 "added": datetime.now(timezone.utc).isoformat()}
+        if submitted_by:
+            entry["submitted_by"] = submitted_by
+        print(f"Issue #{number}: Appended rename_tag '{fields['remove_tag']}' → '{fields['add_tags']}'")
+        return entry
+    url = fields["url"]
+    if action != "add":
+        print(f"Issue #{number}: Appended {action} for {url}")
+        return create_link_entry(
+            url, title=fields.get("title"), tags=fields.get("tags"),
+            notes=fields.get("notes"), op=action, submitted_by=submitted_by)
+    print(f"Issue #{number}: Processing {url}")
+    yt_meta = yt_meta or {}
+    title = fields.get("title") or title
+    if title and not fields.get("title"):
+        print(f"  Found title: {title}")
+    return create_link_entry(
+        url, title, fields.get("tags"), fields.get("notes"),
+        duration=yt_meta.get("duration"), channel=yt_meta.get("channel"),
+        thumbnail=yt_meta.get("thumbnail"), op="add",
+        submitted_by=submitted_by)
+
+
+def resolve_metadata(urls, given_titles, workers=TITLE_WORKERS):
+    """Fetch metadata for new URLs. Returns ({url: title}, {url: YouTube metadata}).
+
+    YouTube URLs are resolved in one batch on a side thread while page titles
+    (for URLs without a submitted title) are fetched concurrently with
+    per-host politeness.
+    """
+    youtube_urls = [url for url in urls if is_youtube_url(url)]
+    title_urls = [url for url in urls if not is_youtube_url(url) and not given_titles.get(url)]
+    with PROFILE.span("network"), ThreadPoolExecutor(max_workers=1) as executor:
+        youtube = executor.submit(fetch_youtube_metadata_batch, youtube_urls)
+        titles = dict(run_pool(title_urls, fetch_title, workers=workers))
+        youtube = youtube.result()
+    for url, meta in youtube.items():
+        titles[url] = meta.get("title")
+    return titles, youtube
+
+
+def process_issue_list(issues, trove_path=None, local=False, workers=TITLE_WORKERS, api=None,
+                       index=None, close=True):
     """Process a list of issue dicts and append operations to trove-log.jsonl.
 
+    Runs in phases: parse and validate every issue, resolve metadata for
+    new URLs concurrently, append all ops in the order given, then close
+    the issues. The log is the same as handling the issues one by one.
+
+    Issues to close go through the close outbox (issue-outbox.jsonl next to
+    the log): marked "applying" with the log size before the append, then
+    "pending" after it, and removed once closed. A crash at any point leaves
+    each issue either unapplied and open, or applied and queued to close.
+
     Args:
-        issues: list of {"number": N, "body": "..."} dicts
-        trove_path: optional Path override for load/save (defaults to TROVE_FILE)
-        local: when True, skip close_issue(), fetch_title(), trigger_archive(),
-               fetch_youtube_metadata()
+        issues: list of {"number": N, "body": "..."} dicts ("id" too, to close)
+        trove_path: optional Path override for the log (defaults to TROVE_FILE)
+        local: when True, skip closing issues, fetch_title(), queueing archive.org
+               snapshots, fetch_youtube_metadata_batch()
+        workers: concurrent title fetches
+        api: IssuesAPI used to close issues (default: from the environment)
+        index: object with has_op(url, op) and close() to look up existing
+               links (default: a TroveIndex over the log; none when local)
+        close: when False, don't close issues (they aren't GitHub issues)
+
+    Returns:
+        The number of entries appended.
     """
     if not issues:
         print("No issues to process")
-        return
+        return 0
 
-    links = load_trove(trove_path)
-    existing_urls = {e["url"] for e in links if e.get("op", "add") == "add"}
-    appended = 0
+    if index is None and not local:  # local runs fetch no metadata, so need no lookups
+        with PROFILE.span("load"):
+            index = TroveIndex(trove_path)
+    closing = close and not local
 
+    # Phase 1: parse and validate
+    jobs = []  # (number, action, fields, is_new) per op to append
+    to_close = []
+    new_urls = {}  # URL -> submitted title, for the first add of each unseen URL
     for issue in issues:
         number = issue["number"]
-        fields = parse_issue_body(issue["body"])
-        action = fields.get("action", "add")
-        submitted_by = fields.get("submitted_by")
-
-        # Handle set_tag_desc action
-        if action == "set_tag_desc":
-            tag_name = fields.get("tag")
-            desc = fields.get("description", "")
-            if not tag_name:
-                print(f"Issue #{number}: Invalid set_tag_desc fields, skipping")
-                if not local:
-                    close_issue(number)
-                continue
-            entry = {"op": "set_tag_desc", "tag": tag_name, "description": desc,
-                     "added": datetime.now(timezone.utc).isoformat()}
-            if submitted_by:
-                entry["submitted_by"] = submitted_by
-            links.append(entry)
-            print(f"Issue #{number}: Appended set_tag_desc for '{tag_name}'")
-            if not local:
-                close_issue(number)
-            appended += 1
-            continue
-
-        # Handle rename_tag action
-        if action == "rename_tag":
-            remove_tag = fields.get("remove_tag")
-            add_tags_str = fields.get("add_tags", "")
-            urls_str = fields.get("urls", "")
-            if not remove_tag or not add_tags_str or not urls_str:
-                print(f"Issue #{number}: Invalid rename_tag fields, skipping")
-                if not local:
-                    close_issue(number)
-                continue
-            entry = {"op": "rename_tag", "remove_tag": remove_tag,
-                     "add_tags": add_tags_str, "urls": urls_str,
-                     "added": datetime.now(timezone.utc).isoformat()}
-            if submitted_by:
-                entry["submitted_by"] = submitted_by
-            links.append(entry)
-            print(f"Issue #{number}: Appended rename_tag '{remove_tag}' → '{add_tags_str}'")
-            if not local:
-                close_issue(number)
-            appended += 1
+        action, fields, close = parse_issue(issue)
+        if close:
+            to_close.append(issue)
+        if action is None:
             continue
-
-        url = fields.get("url")
-        if not url:
-            print(f"Issue #{number}: No URL found, skipping")
-            continue
-
-        # For set_title, set_notes, add_tag, remove_tag: just append the op
-        if action in ("set_title", "set_notes", "add_tag", "remove_tag", "delete"):
-            entry = create_link_entry(
-                url, title=fields.get("title"), tags=fields.get("tags"),
-                notes=fields.get("notes"), op=action, submitted_by=submitted_by)
-            links.append(entry)
-            print(f"Issue #{number}: Appended {action} for {url}")
-            if not local:
-                close_issue(number)
-            appended += 1
-            continue
-
-        # Default: add operation
-        print(f"Issue #{number}: Processing {url}")
-
-        # Fetch metadata (YouTube-specific or generic title) only for new URLs
-        title = fields.get("title")
-        yt_meta = {}
-        if not local and url not in existing_urls:
-            if is_youtube_url(url):
-                yt_meta = fetch_youtube_metadata(url)
-                if not title:
-                    title = yt_meta.get("title")
-            elif not title:
-                title = fetch_title(url)
-            if title:
-                print(f"  Found title: {title}")
-            trigger_archive(url)
-
-        link = create_link_entry(
-            url, title, fields.get("tags"), fields.get("notes"),
-            duration=yt_meta.get("duration"), channel=yt_meta.get("channel"),
-            thumbnail=yt_meta.get("thumbnail"), op="add",
-            submitted_by=submitted_by)
-
-        links.append(link)
-        existing_urls.add(url)
-        if not local:
-            close_issue(number)
-        appended += 1
-
-    if appended > 0:
-        save_trove(links, trove_path)
-        print(f"Appended {appended} entry/entries")
+        is_new = False
+        if action == "add":
+            url = fields["url"]
+            is_new = not local and url not in new_urls and not index.has_op(url, "add")
+            if is_new:
+                new_urls[url] = fields.get("title")
+        jobs.append((number, action, fields, is_new))
+    if index is not None:
+        index.close()
+
+    # Phase 2: resolve metadata for new URLs
+    titles, youtube = {}, {}
+    if new_urls:
+        titles, youtube = resolve_metadata(list(new_urls), new_urls, workers)
+
+    # Phase 3: append in order
+    new_entries = []
+    archive_urls = []
+    for number, action, fields, is_new in jobs:
+        if is_new:
+            url = fields["url"]
+            new_entries.append(issue_entry(number, action, fields, titles.get(url),
+                                           youtube.get(url)))
+            archive_urls.append(url)
+        else:
+            new_entries.append(issue_entry(number, action, fields))
+
+    PROFILE.count("entries", len(new_entries))
+    if closing and to_close:
+        record_closes(to_close, "applying", issue_outbox_path(trove_path),
+                      log_offset=log_size(trove_path))
+    if new_entries:
+        with PROFILE.span("save"):
+            append_entries(new_entries, trove_path)
+        print(f"Appended {len(new_entries)} entry/entries")
+        if archive_urls:
+            queued = queue_snapshots(archive_urls, outbox_path(trove_path))
+            print(f"Queued {queued} archive.org snapshot(s)")
     else:
         print("No new entries to append")
 
+    # Phase 4: close, now that the ops are in the log
+    if closing and to_close:
+        record_closes(to_close, "pending", issue_outbox_path(trove_path))
+        close_pending(api or IssuesAPI.from_env(), trove_path)
+    return len(new_entries)
+
+
+def process_issues(api=None, trove_path=None):
+    """Process all open GitHub submission issues.
 
-def process_issues():
-    """Process all open GitHub submission issues."""
-    issues = get_submission_issues()
+    Issues left in the close outbox by an earlier run are closed first and
+    never processed again.
+    """
+    api = api or IssuesAPI.from_env()
+    applied = close_pending(api, trove_path)
+    issues = [issue for issue in api.iter_open_issues(SUBMISSION_LABEL)
+              if issue["number"] not in applied]
     if not issues:
         print("No open submission issues found")
         return
-    process_issue_list(issues)
+    print(f"Found {len(issues)} open submission issue(s)")
+    process_issue_list(sorted(issues, key=lambda issue: issue["number"]), trove_path, api=api)
+
+
+class LiveTrove:
+    """In-memory merge state of the log, kept current by replaying appended entries.
+
+    Stands in for TroveIndex in process_issue_list() so a long-running
+    process parses the log once. If the log is replaced or shrinks (e.g.
+    compact_trove.py rewrote it), the state is rebuilt from scratch.
+    """
+
+    def __init__(self, trove_path=None):
+        self.trove_path = trove_path or TROVE_FILE
+        self.merged = {}
+        self.url_order = []
+        self.ops = {}  # url -> set of ops seen
+        self.offset = 0
+        self.inode = None
+        self.refresh()
+
+    def refresh(self):
+        """Apply entries appended since the last refresh. Returns how many."""
+        try:
+            st = self.trove_path.stat()
+        except FileNotFoundError:
+            return 0
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            self.merged, self.url_order, self.ops = {}, [], {}
+            self.offset, self.inode = 0, st.st_ino
+        applied = 0
+        for offset, entry in iter_trove_offsets(self.trove_path, self.offset):
+            if offset >= st.st_size:
+                break
+            apply_entry(self.merged, self.url_order, entry)
+            for url in entry_urls(entry):
+                self.ops.setdefault(url, set()).add(entry.get("op", "add"))
+            applied += 1
+        self.offset = st.st_size
+        return applied
+
+    def has_op(self, url, op="add"):
+        return op in self.ops.get(url, ())
+
+    def links(self):
+        """The deduplicated links, as dedup_trove.py would write them."""
+        return emit_links(self.merged, self.url_order)
+
+    def close(self):
+        pass
+
+
+def read_queue(queue_dir, grace=QUEUE_GRACE):
+    """Load queued issue files (process_local_issues.py format), oldest name first.
+
+    Returns (issues, paths). An unreadable file modified within `grace`
+    seconds is left for a later poll, as its producer may still be writing
+    it; older ones are moved to failed/.
+    """
+    issues, paths = [], []
+    for path in sorted(queue_dir.glob("*.json")):
+        try:
+            issue = json.loads(path.read_text())
+            if not isinstance(issue, dict) or "number" not in issue or "body" not in issue:
+                raise ValueError("expected an object with number and body")
+        except (OSError, ValueError) as e:
+            try:
+                if time.time() - path.stat().st_mtime < grace:
+                    continue
+            except FileNotFoundError:
+                continue
+            print(f"Bad queue file {path.name}: {e}")
+            (queue_dir / "failed").mkdir(exist_ok=True)
+            path.replace(queue_dir / "failed" / path.name)
+            continue
+        issues.append(issue)
+        paths.append(path)
+    return issues, paths
 
 
-def fill_titles():
-    """Find links without titles and fetch them."""
-    links = load_trove()
-    missing = [link for link in links if not link.get("title")]
+def recover_batch(queue_dir, trove_path=None):
+    """Settle a batch left in processing/ by a crash. Returns the number of files.
+
+    processing/log-offset holds the log size from before the batch's append:
+    if the log has grown since, the batch was applied and its files go to
+    processed/; otherwise (or with no offset recorded) they are queued again.
+    """
+    processing = queue_dir / "processing"
+    marker = processing / "log-offset"
+    try:
+        offset = int(marker.read_text())
+    except (OSError, ValueError):
+        offset = None
+    applied = offset is not None and log_size(trove_path) > offset
+    paths = sorted(processing.glob("*.json"))
+    for path in paths:
+        path.replace(queue_dir / ("processed" if applied else "") / path.name)
+    if paths:
+        print(f"Recovered {len(paths)} file(s) from an interrupted batch "
+              f"({'applied' if applied else 'requeued'})")
+    marker.unlink(missing_ok=True)
+    return len(paths)
+
+
+def run_daemon(queue_dir, trove_path=None, poll_interval=DAEMON_POLL, commit_interval=DAEMON_COMMIT,
+               output=None, once=False):
+    """Process submissions dropped into `queue_dir` until interrupted.
+
+    The log is loaded once into a LiveTrove; each poll processes every
+    queued file as one batch (metadata is fetched, nothing is closed),
+    moves the files to processed/, and applies the new ops to the
+    in-memory state. With `output`, the deduplicated links are rewritten
+    after each batch. Commits are batched by a Coalescer: one per
+    `commit_interval` seconds or COMMIT_OPS ops, plus one on exit.
+
+    Producers should write each file under another name (e.g. N.json.tmp)
+    and rename it into the queue; a file caught mid-write is retried for
+    QUEUE_GRACE seconds before it counts as unreadable.
+
+    A batch is moved to processing/ with the log size (processing/log-offset)
+    before its ops are appended. Re-applying a batch would not be harmless
+    (notes concatenate, tag renames and descriptions repeat), so on restart
+    recover_batch() settles a leftover batch by that offset instead.
+    """
+    queue_dir.mkdir(parents=True, exist_ok=True)
+    (queue_dir / "processed").mkdir(exist_ok=True)
+    processing = queue_dir / "processing"
+    processing.mkdir(exist_ok=True)
+    recover_batch(queue_dir, trove_path)
+    with PROFILE.span("load"):
+        live = LiveTrove(trove_path)
+    print(f"Loaded {len(live.merged)} link(s); watching {queue_dir}")
+    trove_path = trove_path or TROVE_FILE
+    with Coalescer(trove_path.parent, interval=commit_interval) as commits:
+        while True:
+            issues, paths = read_queue(queue_dir)
+            if issues:
+                live.refresh()  # pick up writes by other tools
+                for path in paths:
+                    path.replace(processing / path.name)
+                (processing / "log-offset").write_text(str(log_size(trove_path)))
+                appended = process_issue_list(issues, trove_path, index=live, close=False)
+                for path in paths:
+                    (processing / path.name).replace(queue_dir / "processed" / path.name)
+                (processing / "log-offset").unlink()
+                live.refresh()
+                if output:
+                    save_trove(live.links(), output)
+                if appended:
+                    commits.add([trove_path, outbox_path(trove_path)],
+                                f"Add {appended} op(s) from {len(issues)} queued submission(s)",
+                                ops=appended)
+            if commits.due():
+                commits.flush()
+            if once:
+                return
+            time.sleep(poll_interval)
+
+
+def fill_titles(trove_path=None, limit=None, budget=None, workers=8, host_interval=1.0):
+    """Fetch titles for links that have none and append fill_title ops.
+
+    Works on the deduplicated links, fetching each URL once, concurrently with
+    per-host politeness (see hostpool.run_pool). `limit` caps how many links
+    are tried; with `budget` (seconds), no new fetches start once it is spent.
+    """
+    with PROFILE.span("load"):
+        links = dedup(iter_trove(trove_path))
+    missing = [link["url"] for link in links if not link.get("title")]
 
     if not missing:
         print("All links have titles")
         return
 
     print(f"Found {len(missing)} link(s) without titles")
-    updated = 0
-
-    for link in missing:
-        url = link["url"]
-        print(f"Fetching title for {url}...")
-        title = fetch_title(url)
-        if title:
-            link["title"] = title
-            print(f"  -> {title}")
-            updated += 1
-        else:
-            print("  -> (no title found)")
+    if limit is not None:
+        missing = missing[:limit]
+    new_entries = []
 
-    if updated > 0:
-        save_trove(links)
-        print(f"Updated {updated} link(s)")
+    with PROFILE.span("network"):
+        for url, title in run_pool(missing, fetch_title, workers=workers,
+                                   host_interval=host_interval, budget=budget):
+            if title:
+                new_entries.append(create_link_entry(url, title, op="fill_title"))
+                print(f"  {url} -> {title}")
+            else:
+                print(f"  {url} -> (no title found)")
+
+    if new_entries:
+        with PROFILE.span("save"):
+            append_entries(new_entries, trove_path)
+        print(f"Updated {len(new_entries)} link(s)")
     else:
         print("No titles found to update")
 
@@ -203,9 +477,28 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Process link submissions")
     parser.add_argument("--fill-titles", action="store_true",
                         help="Fill in missing titles for existing links")
+    parser.add_argument("--limit", type=int, help="With --fill-titles: most links to try")
+    parser.add_argument("--budget", type=float,
+                        help="With --fill-titles: stop starting fetches after this many seconds")
+    parser.add_argument("--daemon", metavar="QUEUE_DIR", type=Path,
+                        help="Keep running, processing issue files dropped into QUEUE_DIR")
+    parser.add_argument("--poll", type=float, default=DAEMON_POLL,
+                        help="With --daemon: seconds between queue scans")
+    parser.add_argument("--commit-interval", type=float, default=DAEMON_COMMIT,
+                        help="With --daemon: seconds between batched commits")
+    parser.add_argument("--output", type=Path,
+                        help="With --daemon: rewrite deduplicated links here after each batch")
+    add_profile_args(parser)
     args = parser.parse_args()
+    start_profiling("process_issues", args.profile)
 
     if args.fill_titles:
-        fill_titles()
+        fill_titles(limit=args.limit, budget=args.budget)
+    elif args.daemon:
+        try:
+            run_daemon(args.daemon, poll_interval=args.poll, commit_interval=args.commit_interval,
+                       output=args.output)
+        except KeyboardInterrupt:
+            pass
     else:
         process_issues()
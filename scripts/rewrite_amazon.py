@@ -12,9 +12,8 @@ Usage:
 import re
 import sys
 import time
-import urllib.request
-import urllib.error
 
+import http_client
 from trove_utils import TROVE_FILE, load_trove, save_trove
 
 AMAZON_RE = re.compile(r'https?://(?:www\.)?amazon\.com/(?:.*/)?dp/(\w{10})')
@@ -30,11 +29,9 @@ def check_openlibrary(isbn):
     """Check if ISBN exists on OpenLibrary. Returns canonical URL or None."""
     url = f"https://openlibrary.org/isbn/{isbn}.json"
     try:
-        req = urllib.request.Request(url)
-        with urllib.request.urlopen(req, timeout=10) as resp:
-            if resp.status == 200:
-                return f"https://openlibrary.org/isbn/{isbn}"
-    except (urllib.error.URLError, urllib.error.HTTPError, TimeoutError, OSError):
+        if http_client.head(url).status == 200:
+            return f"https://openlibrary.org/isbn/{isbn}"
+    except OSError:
         pass
     return None
 
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""Generate deterministic synthetic trove-log.jsonl files for benchmarks.
+
+URLs and tags are drawn from Zipf distributions, so a few popular links and
+tags account for most ops, like the real log. The op mix is configurable;
+ops other than add only target URLs that have already been added.
+
+CLI: python3 synth_trove.py <ops> <output> [--seed N] [--mix add=55,add_tag=15,...]
+"""
+
+import argparse
+import bisect
+import itertools
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from normalize_tags import RENAMES
+from trove_utils import save_trove
+
+DEFAULT_MIX = {
+    "add": 55, "add_tag": 15, "remove_tag": 5, "set_title": 8,
+    "set_notes": 7, "delete": 2, "rename_tag": 3,
+}
+
+WORDS = ("retro game music tools free classic video essay dev oss design "
+         "terminal keyboard puzzle history science math art book film "
+         "python rust web audio fonts maps space physics").split()
+TRACKING = ("utm_source=twitter&utm_medium=social", "fbclid=IwAR0abc", "gclid=xyz", "ref=main")
+USERS = ("saul", "alice", "bob", "haiku")
+
+
+def parse_mix(text):
+    """Parse 'add=55,add_tag=15' into a weight dict."""
+    mix = {}
+    for part in text.split(","):
+        op, _, weight = part.partition("=")
+        if op.strip() not in DEFAULT_MIX:
+            raise ValueError(f"unknown op in mix: {op!r}")
+        mix[op.strip()] = float(weight)
+    return mix
+
+
+class Zipf:
+    """Sample ranks 0..n-1 with probability proportional to 1/(rank+1)^s."""
+
+    def __init__(self, n, s=1.1):
+        self.cum = list(itertools.accumulate(1 / (k + 1) ** s for k in range(n)))
+
+    def sample(self, rng):
+        return bisect.bisect_left(self.cum, rng.random() * self.cum[-1])
+
+
+def make_url(rank, rng):
+    host = f"{WORDS[rank % len(WORDS)]}{rank // len(WORDS)}.example.com"
+    if rank % 17 == 0:
+        return f"https://www.youtube.com/watch?v=vid{rank:07d}"
+    url = f"https://{host}/posts/{rank}"
+    if rng.random() < 0.1:
+        url += "?" + rng.choice(TRACKING)
+    return url
+
+
+def make_tags():
+    """Tag vocabulary: real-looking words, some legacy tags normalize_tags renames."""
+    vocab = list(WORDS) + list(RENAMES)
+    vocab += [f"{a}-{b}" for a, b in itertools.product(WORDS, WORDS) if a != b]
+    return vocab
+
+
+def generate(ops, seed=0, mix=None):
+    """Yield `ops` synthetic log entries, deterministic for a given seed and mix."""
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    op_names = list(mix)
+    op_cum = list(itertools.accumulate(mix[op] for op in op_names))
+
+    n_urls = max(10, ops // 3)
+    url_zipf = Zipf(n_urls)
+    tags = make_tags()
+    tag_zipf = Zipf(len(tags))
+    urls = {}  # rank -> url, for URLs added so far
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    def pick_tags(k):
+        return " ".join(dict.fromkeys(tags[tag_zipf.sample(rng)] for _ in range(k)))
+
+    for i in range(ops):
+        added = (start + timedelta(minutes=7 * i)).isoformat()
+        op = op_names[bisect.bisect_left(op_cum, rng.random() * op_cum[-1])]
+
+        if op == "rename_tag":
+            if not urls:
+                op = "add"
+            else:
+                ranks = rng.sample(list(urls), min(len(urls), rng.randint(1, 5)))
+                yield {"op": "rename_tag", "remove_tag": pick_tags(1), "add_tags": pick_tags(2),
+                       "urls": " ".join(urls[r] for r in ranks), "added": added}
+                continue
+
+        rank = url_zipf.sample(rng)
+        if rank not in urls:
+            op = "add"
+            urls[rank] = make_url(rank, rng)
+        url = urls[rank]
+        entry = {"op": op, "url": url, "added": added}
+        if op == "add":
+            if rng.random() < 0.5:
+                del entry["op"]  # older entries have no op field
+            entry["title"] = f"{WORDS[rank % len(WORDS)].title()} page {rank}"
+            entry["tags"] = pick_tags(rng.randint(1, 5))
+            if rng.random() < 0.3:
+                entry["notes"] = f"note {i} about {WORDS[i % len(WORDS)]}"
+            if rng.random() < 0.5:
+                entry["submitted_by"] = rng.choice(USERS)
+            if "youtube.com" in url:
+                entry["duration"] = f"{rng.randint(1, 59)}:{rng.randint(0, 59):02d}"
+                entry["channel"] = f"channel{rank % 50}"
+        elif op in ("add_tag", "remove_tag"):
+            entry["tags"] = pick_tags(rng.randint(1, 2))
+        elif op == "set_title":
+            entry["title"] = f"Edited title {i}"
+        elif op == "set_notes":
+            entry["notes"] = f"replaced note {i}"
+            entry["submitted_by"] = rng.choice(USERS)
+        yield entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic trove-log.jsonl")
+    parser.add_argument("ops", type=int, help="Number of ops to generate")
+    parser.add_argument("output", help="Output JSONL path")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--mix", help="Op weights, e.g. add=55,add_tag=15,delete=2")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix) if args.mix else None
+    save_trove(generate(args.ops, args.seed, mix), Path(args.output))
+    print(f"Wrote {args.ops} ops to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
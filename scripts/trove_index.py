@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""Persistent URL → op-offset index for trove-log.jsonl.
+
+The index lives next to the log (trove-log.idx) and is a memory-mappable hash
+table: a fixed header, a power-of-two bucket array, and an append-only array
+of (url_hash, log_offset, next) records chained per bucket. Lookups touch one
+bucket and the chain for that hash, so "is this URL known?" is constant time
+and "all ops for this URL" costs O(ops for that URL).
+
+The header records how many log bytes are covered. Opening the index indexes
+any newly appended tail; a rewritten log (detected by size or a checksum of
+the bytes just before the covered offset) triggers a full rebuild. Updates
+are serialized across processes with a lock on trove-log.idx.lock.
+
+rename_tag ops are indexed under every URL they list.
+
+CLI: python3 trove_index.py [--rebuild] <url>...
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import zlib
+
+from trove_utils import TROVE_FILE, file_lock, index_path, iter_trove_offsets
+
+MAGIC = b"TROVEIX1"
+HEADER = struct.Struct("<8sQQQII")  # magic, nbuckets, nrecords, covered, tail_crc, flags
+BUCKET = struct.Struct("<Q")  # head record number + 1 (0 = empty)
+RECORD = struct.Struct("<QQQ")  # url_hash, log offset, next record number + 1
+MIN_BUCKETS = 1024
+MAX_LOAD = 4  # rebuild with a bigger table past this many records per bucket
+TAIL_CHECK = 4096
+FLAG_DIRTY = 1
+
+
+def url_hash(url):
+    """64-bit hash of a URL."""
+    return int.from_bytes(hashlib.blake2b(url.encode(), digest_size=8).digest(), "little")
+
+
+def entry_urls(entry):
+    """URLs an op applies to."""
+    if entry.get("op") == "rename_tag":
+        return entry.get("urls", "").split()
+    url = entry.get("url")
+    return [url] if url else []
+
+
+def _tail_crc(f, covered):
+    start = max(0, covered - TAIL_CHECK)
+    f.seek(start)
+    return zlib.crc32(f.read(covered - start))
+
+
+def _scan(trove_path, start, end):
+    """Return [(hash, offset)] for ops starting in bytes [start, end).
+
+    Lines appended past `end` while scanning are left for the next sync.
+    """
+    records = []
+    for offset, entry in iter_trove_offsets(trove_path, start):
+        if offset >= end:
+            break
+        for url in entry_urls(entry):
+            records.append((url_hash(url), offset))
+    return records
+
+
+class TroveIndex:
+    """Memory-mapped URL index over a trove log. Use as a context manager."""
+
+    def __init__(self, trove_path=None):
+        self.trove_path = trove_path or TROVE_FILE
+        self.path = index_path(self.trove_path)
+        self._mm = None
+        self._log = None
+        self.sync()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def sync(self):
+        """Bring the index up to date with the log, then map it read-only.
+
+        Updates hold the index lock, so concurrent appenders (each refreshing
+        the index) don't interleave records or clear each other's DIRTY flag.
+        """
+        self.close()
+        with file_lock(self.path):
+            size = self.trove_path.stat().st_size if self.trove_path.exists() else 0
+            header = self._read_header()
+            if header is None:
+                self._rebuild(size)
+            else:
+                nbuckets, nrecords, covered, tail_crc, flags = header
+                if (flags & FLAG_DIRTY or covered > size
+                        or not self._tail_matches(covered, tail_crc)):
+                    self._rebuild(size)
+                elif covered < size:
+                    new = _scan(self.trove_path, covered, size)
+                    if nrecords + len(new) > MAX_LOAD * nbuckets:
+                        self._rebuild(size)
+                    else:
+                        self._append(new, size)
+
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.nbuckets, self.nrecords, self.covered = HEADER.unpack_from(self._mm)[1:4]
+
+    def _read_header(self):
+        try:
+            with open(self.path, "rb") as f:
+                raw = f.read(HEADER.size)
+        except FileNotFoundError:
+            return None
+        if len(raw) < HEADER.size:
+            return None
+        magic, *fields = HEADER.unpack(raw)
+        if magic != MAGIC:
+            return None
+        return fields
+
+    def _tail_matches(self, covered, tail_crc):
+        if not covered:
+            return True
+        with open(self.trove_path, "rb") as f:
+            return _tail_crc(f, covered) == tail_crc
+
+    def _covered_crc(self, size):
+        if not size:
+            return 0
+        with open(self.trove_path, "rb") as f:
+            return _tail_crc(f, size)
+
+    def _rebuild(self, size):
+        records = _scan(self.trove_path, 0, size)
+        nbuckets = MIN_BUCKETS
+        while nbuckets < len(records):
+            nbuckets *= 2
+        buckets = [0] * nbuckets
+        out = bytearray()
+        for i, (h, offset) in enumerate(records):
+            b = h & (nbuckets - 1)
+            out += RECORD.pack(h, offset, buckets[b])
+            buckets[b] = i + 1
+
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, nbuckets, len(records), size,
+                                self._covered_crc(size), 0))
+            f.write(struct.pack(f"<{nbuckets}Q", *buckets))
+            f.write(out)
+        os.replace(tmp, self.path)
+
+    def _append(self, new, size):
+        with open(self.path, "r+b") as f:
+            magic, nbuckets, nrecords, covered, tail_crc, _ = HEADER.unpack(f.read(HEADER.size))
+            # Mark dirty so a crash mid-update forces a rebuild
+            f.seek(0)
+            f.write(HEADER.pack(magic, nbuckets, nrecords, covered, tail_crc, FLAG_DIRTY))
+            f.flush()
+
+            heads = {}
+            out = bytearray()
+            with mmap.mmap(f.fileno(), 0) as mm:
+                for i, (h, offset) in enumerate(new, start=nrecords):
+                    b = h & (nbuckets - 1)
+                    pos = HEADER.size + b * BUCKET.size
+                    prev = heads[b] if b in heads else BUCKET.unpack_from(mm, pos)[0]
+                    out += RECORD.pack(h, offset, prev)
+                    heads[b] = i + 1
+                # Records first, then the heads that point at them, so a reader
+                # in another process never follows a head to an unwritten record
+                f.seek(0, os.SEEK_END)
+                f.write(out)
+                f.flush()
+                for b, head in heads.items():
+                    BUCKET.pack_into(mm, HEADER.size + b * BUCKET.size, head)
+                mm.flush()
+
+            f.seek(0)
+            f.write(HEADER.pack(magic, nbuckets, nrecords + len(new), size,
+                                self._covered_crc(size), 0))
+
+    def offsets(self, url):
+        """Byte offsets in the log of every op indexed under `url`, in log order.
+
+        Candidates match on the 64-bit hash only; use ops() for verified entries.
+        """
+        h = url_hash(url)
+        records_at = HEADER.size + self.nbuckets * BUCKET.size
+        i = BUCKET.unpack_from(self._mm, HEADER.size + (h & (self.nbuckets - 1)) * BUCKET.size)[0]
+        found = []
+        while i:
+            if i > self.nrecords:
+                # Appended by another process since this map was taken: remap, retry
+                self.sync()
+                return self.offsets(url)
+            rh, offset, i = RECORD.unpack_from(self._mm, records_at + (i - 1) * RECORD.size)
+            if rh == h:
+                found.append(offset)
+        found.reverse()
+        return found
+
+    def _entry_at(self, offset):
+        if self._log is None:
+            self._log = open(self.trove_path, "rb")
+        self._log.seek(offset)
+        return json.loads(self._log.readline())
+
+    def ops(self, url):
+        """All log entries that apply to `url`, in log order."""
+        result = []
+        for offset in self.offsets(url):
+            entry = self._entry_at(offset)
+            if url in entry_urls(entry):
+                result.append(entry)
+        return result
+
+    def has_op(self, url, op="add"):
+        """True if the log has an `op` entry for `url` (entries without op are adds)."""
+        return any(entry.get("op", "add") == op for entry in self.ops(url))
+
+    def __contains__(self, url):
+        for offset in self.offsets(url):
+            if url in entry_urls(self._entry_at(offset)):
+                return True
+        return False
+
+    def __len__(self):
+        return self.nrecords
+
+
+def refresh_index(trove_path=None):
+    """Catch an existing index up with newly appended entries."""
+    path = trove_path or TROVE_FILE
+    if index_path(path).exists():
+        TroveIndex(path).close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Look up ops for URLs in trove-log.jsonl")
+    parser.add_argument("urls", nargs="*", help="URLs to show history for")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from scratch")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        index_path(TROVE_FILE).unlink(missing_ok=True)
+
+    with TroveIndex() as index:
+        print(f"{len(index)} ops indexed over {index.covered} bytes")
+        for url in args.urls:
+            ops = index.ops(url)
+            print(f"{url}: {len(ops)} op(s)")
+            for entry in ops:
+                print(f"  {json.dumps(entry)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,161 @@
 #!/usr/bin/env python3
 """Shared utilities for trove link management."""
 
+import atexit
+import fcntl
 import json
+import os
 import re
+import sys
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
 
 TROVE_FILE = Path(".links/trove-log.jsonl")
+PROFILE_DIR = Path("_build/profile")
+
+# Read size for streaming the log; lines are reassembled across chunks
+CHUNK_SIZE = 1 << 16
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "t0")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.t0
+        with self.profiler.lock:
+            span = self.profiler.spans.setdefault(self.name, [0, 0.0])
+            span[0] += 1
+            span[1] += elapsed
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Profiler:
+    """Named timing spans and counters for one script run.
+
+    Standard spans are load, transform, network, save and git; counters
+    include lines_read, bytes_read, entries_written, bytes_written and
+    http_requests. Span times are inclusive, so nested spans overlap.
+    Disabled (the default), span() returns a shared no-op and count() is a
+    single attribute check.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.name = None
+        self.spans = {}  # name -> [count, seconds]
+        self.counters = {}
+        self.lock = threading.Lock()
+        self._cprofile = None
+        self._started = None
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def count(self, name, n=1):
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + n
+
+    def start(self, name, cprofile=False):
+        """Enable profiling; the summary is written when the process exits."""
+        self.enabled = True
+        self.name = name
+        self._started = time.perf_counter()
+        if cprofile:
+            import cProfile
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        atexit.register(self.finish)
+
+    def summary(self):
+        return {
+            "script": self.name,
+            "wall_seconds": round(time.perf_counter() - self._started, 4),
+            "spans": {name: {"count": n, "seconds": round(secs, 4)}
+                      for name, (n, secs) in sorted(self.spans.items())},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def finish(self):
+        """Write the JSON summary (and cProfile dump) to PROFILE_DIR."""
+        if not self.enabled:
+            return None
+        self.enabled = False
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        path = PROFILE_DIR / f"{self.name}-{stamp}.json"
+        if self._cprofile:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(path.with_suffix(".prof"))
+        path.write_text(json.dumps(self.summary(), indent=2) + "\n")
+        print(f"Profile written to {path}", file=sys.stderr)
+        return path
+
+
+PROFILE = Profiler()
+
+
+def add_profile_args(parser):
+    """Add the shared --profile option to an argparse parser."""
+    parser.add_argument("--profile", nargs="?", const="summary", choices=("summary", "cprofile"),
+                        help=f"Write a JSON timing summary to {PROFILE_DIR}/ "
+                             "('cprofile' also dumps cProfile stats)")
+
+
+def start_profiling(name, mode=None):
+    """Enable PROFILE if `mode` or the TROVE_PROFILE env var asks for it.
+
+    TROVE_PROFILE=1 writes the summary; TROVE_PROFILE=cprofile adds a cProfile dump.
+    """
+    mode = mode or os.environ.get("TROVE_PROFILE")
+    if mode and mode != "0":
+        PROFILE.start(name, cprofile=(mode == "cprofile"))
+
+
+def index_path(trove_path=None):
+    """Path of the URL index sidecar for a log (see trove_index.py)."""
+    return (trove_path or TROVE_FILE).with_suffix(".idx")
+
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock for `path` across processes, blocking until it is free.
+
+    The lock is taken on a <name>.lock sidecar rather than the file itself,
+    since the file may be replaced (os.replace) while others wait on it.
+    """
+    fd = os.open(path.with_name(path.name + ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
 
 
 def slugify(text):
@@ -17,23 +166,128 @@ def slugify(text):
     return text.strip('-')
 
 
+TRACKING_PARAMS = {
+    "utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content",
+    "utm_id", "utm_source_platform", "utm_creative_format", "utm_marketing_tactic",
+    "fbclid", "gclid", "gclsrc", "msclkid", "twclid", "dclid", "yclid",
+    "mc_eid", "mc_cid", "_ga", "_gl", "s_kwcid",
+}
+
+
+def strip_tracking_params(url):
+    """Remove tracking query parameters from a URL."""
+    parsed = urllib.parse.urlparse(url)
+    if not parsed.query:
+        return url
+    params = urllib.parse.parse_qs(parsed.query, keep_blank_values=True)
+    cleaned = {k: v for k, v in params.items()
+               if k not in TRACKING_PARAMS and not k.startswith("utm_")}
+    new_query = urllib.parse.urlencode(cleaned, doseq=True)
+    return urllib.parse.urlunparse(parsed._replace(query=new_query))
+
+
+def iter_trove_offsets(trove_path=None, start=0):
+    """Stream (byte_offset, entry) pairs from a JSONL file.
+
+    Reads CHUNK_SIZE bytes at a time, so memory stays flat regardless of
+    log size. Blank lines are skipped. Raises ValueError naming the line
+    number (counted from `start`) on malformed JSON.
+    """
+    path = trove_path or TROVE_FILE
+    if not path.exists():
+        return
+    lineno = 0
+    try:
+        with open(path, "rb") as f:
+            f.seek(start)
+            offset = start
+            tail = b""
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                PROFILE.count("bytes_read", len(chunk))
+                lines = (tail + chunk).split(b"\n")
+                tail = lines.pop()
+                for line in lines:
+                    lineno += 1
+                    if line.strip():
+                        yield offset, _parse_line(line, path, lineno)
+                    offset += len(line) + 1
+            if tail.strip():
+                lineno += 1
+                yield offset, _parse_line(tail, path, lineno)
+    finally:
+        PROFILE.count("lines_read", lineno)
+
+
+def _parse_line(line, path, lineno):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        raise ValueError(f"{path}:{lineno}: invalid JSON: {e}") from e
+
+
+def iter_trove(trove_path=None):
+    """Stream entries from a JSONL file one at a time."""
+    for _, entry in iter_trove_offsets(trove_path):
+        yield entry
+
+
 def load_trove(trove_path=None):
     """Load all links from JSONL file."""
-    path = trove_path or TROVE_FILE
-    links = []
-    if path.exists():
-        for line in path.read_text().strip().split('\n'):
-            if line:
-                links.append(json.loads(line))
-    return links
+    return list(iter_trove(trove_path))
 
 
 def save_trove(links, trove_path=None):
-    """Save all links to JSONL file (one JSON object per line)."""
+    """Save all links to JSONL file (one JSON object per line).
+
+    `links` may be any iterable, including a generator reading from the same
+    file: output goes to a temp file that replaces the original at the end.
+    """
     path = trove_path or TROVE_FILE
-    with open(path, 'w') as f:
+    tmp = path.with_name(path.name + ".tmp")
+    count = 0
+    with open(tmp, 'w') as f:
         for link in links:
             f.write(json.dumps(link) + '\n')
+            count += 1
+    os.replace(tmp, path)
+    PROFILE.count("entries_written", count)
+    # Offsets changed; the index is rebuilt on next use
+    index_path(path).unlink(missing_ok=True)
+
+
+def append_entries(entries, trove_path=None):
+    """Append entries to a JSONL file in one buffered write and one fsync.
+
+    All lines go out in a single O_APPEND write, so concurrent appenders never
+    interleave partial lines. A missing trailing newline in the existing file
+    is repaired first. An existing URL index is updated to cover the new
+    entries. Returns the number of entries written.
+    """
+    path = trove_path or TROVE_FILE
+    lines = [json.dumps(entry) + "\n" for entry in entries]
+    if not lines:
+        return 0
+    data = "".join(lines).encode()
+    fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        size = os.fstat(fd).st_size
+        if size and os.pread(fd, 1, size - 1) != b"\n":
+            data = b"\n" + data
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    PROFILE.count("entries_written", len(lines))
+    PROFILE.count("bytes_written", len(data))
+
+    from trove_index import refresh_index  # trove_index imports this module
+    refresh_index(path)
+    return len(lines)
 
 
 def create_link_entry(url, title=None, tags=None, notes=None, added=None,
@@ -50,8 +304,8 @@ def create_link_entry(url, title=None, tags=None, notes=None, added=None,
         duration: Video duration string, e.g. "3:45" (optional)
         channel: Video channel/uploader name (optional)
         thumbnail: URL to video thumbnail image (optional)
-        op: Operation type: "add" (default), "set_title", "set_notes",
-            "add_tag", "remove_tag" (optional)
+        op: Operation type: "add" (default), "set_title", "fill_title",
+            "set_notes", "add_tag", "remove_tag" (optional)
         submitted_by: Username who submitted this entry (optional)
 
     Returns:
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""On-disk cache of per-URL metadata shared by the network stages.
+
+Each URL gets one JSON file in .meta/url-meta/, named by a hash of the
+normalized URL (lowercased scheme and host, default port, fragment and
+tracking params dropped), holding one entry per kind of metadata:
+
+    {"url": ..., "kinds": {"title": {"fetched": iso, "value": ...}, ...}}
+
+Kinds and their TTLs are in TTLS; a cached None (nothing found, or the
+fetch failed) expires after NEGATIVE_TTL instead. When the directory grows
+past MAX_BYTES, the least recently written files are evicted.
+
+The cache is only active where the .meta worktree exists; elsewhere get()
+always misses and put() is a no-op.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from trove_utils import strip_tracking_params
+
+URL_META_DIR = Path(".meta/url-meta")
+TTLS = {
+    "title": timedelta(days=30),
+    "youtube": timedelta(days=7),
+    "text": timedelta(days=90),  # extracted page text for autotag
+    "head": timedelta(days=1),  # status, final_url, content_type from the last request
+}
+NEGATIVE_TTL = timedelta(days=1)
+MAX_BYTES = 64 * 1024 * 1024
+EVICT_TO = 0.8  # evict down to this fraction of MAX_BYTES
+
+
+def normalize_url(url):
+    """Cache key form of a URL."""
+    parts = urllib.parse.urlsplit(strip_tracking_params(url))
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != {"http": 80, "https": 443}.get(scheme):
+        host = f"{host}:{parts.port}"
+    return urllib.parse.urlunsplit((scheme, host, parts.path or "/", parts.query, ""))
+
+
+class UrlMetaCache:
+    """Per-URL JSON files with TTL per kind and size-based eviction."""
+
+    def __init__(self, root=URL_META_DIR, max_bytes=MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self._total = None  # bytes on disk, computed on first write
+
+    @property
+    def enabled(self):
+        return self.root.parent.is_dir()
+
+    def _path(self, url):
+        return self.root / (hashlib.sha256(normalize_url(url).encode()).hexdigest()[:32] + ".json")
+
+    def _read(self, path):
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+    def get(self, url, kind, now=None):
+        """Fresh cached entry {"fetched", "value"} for a URL and kind, else None."""
+        if not self.enabled:
+            return None
+        data = self._read(self._path(url))
+        entry = data and data["kinds"].get(kind)
+        if not entry:
+            return None
+        now = now or datetime.now(timezone.utc)
+        ttl = TTLS[kind] if entry["value"] is not None else NEGATIVE_TTL
+        if datetime.fromisoformat(entry["fetched"]) + ttl < now:
+            return None
+        return entry
+
+    def put(self, url, kind, value, now=None):
+        """Store `value` (JSON-serializable, None for a negative result)."""
+        if not self.enabled:
+            return
+        now = now or datetime.now(timezone.utc)
+        path = self._path(url)
+        with self.lock:
+            self.root.mkdir(exist_ok=True)
+            data = self._read(path) or {"url": normalize_url(url), "kinds": {}}
+            data["kinds"][kind] = {"fetched": now.isoformat(), "value": value}
+            old_size = path.stat().st_size if path.exists() else 0
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_text(json.dumps(data))
+            os.replace(tmp, path)
+            if self._total is None:
+                self._total = sum(e.stat().st_size for e in os.scandir(self.root))
+            else:
+                self._total += path.stat().st_size - old_size
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        files = sorted(os.scandir(self.root), key=lambda e: e.stat().st_mtime)
+        for entry in files:
+            if self._total <= self.max_bytes * EVICT_TO:
+                break
+            self._total -= entry.stat().st_size
+            os.unlink(entry.path)
+
+
+URL_META = UrlMetaCache()
+
+
+def record_head(url, response):
+    """Cache the status, final URL and content type of an http_client response."""
+    URL_META.put(url, "head", {
+        "status": response.status,
+        "final_url": response.url,
+        "content_type": response.headers.get("Content-Type", ""),
+    })
+
+
+def cached(url, kind, fetch):
+    """Return the cached value for (url, kind), or call fetch() and cache its result."""
+    entry = URL_META.get(url, kind)
+    if entry is not None:
+        return entry["value"]
+    value = fetch()
+    URL_META.put(url, kind, value)
+    return value
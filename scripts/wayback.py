@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""Wayback Machine snapshot lookups with a persistent availability cache.
+
+latest_snapshot() asks the CDX API for a URL's newest successful capture.
+SnapshotCache remembers answers in .meta/archive-cache.json: found snapshots
+for POSITIVE_TTL, "no snapshot" for the shorter NEGATIVE_TTL (a page may be
+captured later). Lookup errors are not cached.
+
+save_snapshot() asks archive.org to capture a URL ("Save Page Now").
+
+find_snapshots() answers from the cache and looks up the rest concurrently.
+All lookups go to one host, so instead of hostpool's one-per-host rule they
+are spread over LANES lanes, each spaced LANE_INTERVAL seconds apart.
+There is no batch endpoint for availability, so each miss is one CDX query.
+"""
+
+import json
+import os
+import re
+import urllib.parse
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import http_client
+from hostpool import run_pool
+
+CDX_URL = "https://web.archive.org/cdx/search/cdx"
+SAVE_URL = "https://web.archive.org/save/"
+SAVE_TIMEOUT = 30
+SNAPSHOT_PATH_RE = re.compile(r"/web/(\d{14})/")
+SNAPSHOT_CACHE = Path(".meta/archive-cache.json")
+POSITIVE_TTL = timedelta(days=90)
+NEGATIVE_TTL = timedelta(days=7)
+LANES = 2
+LANE_INTERVAL = 1.0
+TIMESTAMP_FORMAT = "%Y%m%d%H%M%S"
+
+
+def snapshot_time(timestamp):
+    """Parse a Wayback timestamp (YYYYMMDDhhmmss) as UTC."""
+    return datetime.strptime(timestamp, TIMESTAMP_FORMAT).replace(tzinfo=timezone.utc)
+
+
+def latest_snapshot(url, timeout=http_client.DEFAULT_TIMEOUT):
+    """Newest 2xx/3xx capture of `url` as {"archive_url", "timestamp"}, or None.
+
+    Raises OSError or ValueError if the lookup itself fails.
+    """
+    query = urllib.parse.urlencode({
+        "url": url, "output": "json", "fl": "timestamp,original",
+        "filter": "statuscode:[23]..", "limit": "-1",
+    })
+    resp = http_client.get(f"{CDX_URL}?{query}", timeout=timeout)
+    if resp.status != 200:
+        raise http_client.FetchError(f"CDX lookup for {url}: HTTP {resp.status}")
+    body = resp.read()
+    rows = json.loads(body) if body.strip() else []
+    if len(rows) < 2:  # header row only
+        return None
+    timestamp, original = rows[-1]
+    return {
+        "archive_url": f"https://web.archive.org/web/{timestamp}/{original}",
+        "timestamp": timestamp,
+    }
+
+
+def save_snapshot(url, timeout=SAVE_TIMEOUT):
+    """Request an archive.org capture of `url`.
+
+    Returns (HTTP status, snapshot), where snapshot is {"archive_url",
+    "timestamp"} when the response points at the new capture, else None.
+    Raises OSError on network failure. Not retried here: callers queue
+    failures for a later attempt.
+    """
+    resp = http_client.post(SAVE_URL + url, headers={"Accept": "text/html,application/xhtml+xml"},
+                            timeout=timeout, retries=0, follow_redirects=False)
+    location = resp.headers.get("Location") or resp.headers.get("Content-Location") or ""
+    match = SNAPSHOT_PATH_RE.search(location)
+    if resp.status >= 400 or not match:
+        return resp.status, None
+    return resp.status, {
+        "archive_url": urllib.parse.urljoin(SAVE_URL, location),
+        "timestamp": match.group(1),
+    }
+
+
+def is_fresh(snapshot, max_age, now=None):
+    """True if a snapshot (or cache entry) was captured within max_age."""
+    if not snapshot or not snapshot.get("timestamp"):
+        return False
+    now = now or datetime.now(timezone.utc)
+    return now - snapshot_time(snapshot["timestamp"]) <= max_age
+
+
+class SnapshotCache:
+    """URL → {"checked", "archive_url", "timestamp"} with positive/negative TTLs."""
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else None
+        self.entries = {}
+        if self.path and self.path.exists():
+            self.entries = json.loads(self.path.read_text())
+
+    def get(self, url, now=None):
+        """The cached entry for `url` if still fresh, else None.
+
+        A fresh negative answer is an entry whose archive_url is None.
+        """
+        entry = self.entries.get(url)
+        if not entry:
+            return None
+        now = now or datetime.now(timezone.utc)
+        ttl = POSITIVE_TTL if entry.get("archive_url") else NEGATIVE_TTL
+        if datetime.fromisoformat(entry["checked"]) + ttl < now:
+            return None
+        return entry
+
+    def put(self, url, snapshot, now=None):
+        """Record a lookup result (a latest_snapshot() dict or None)."""
+        now = now or datetime.now(timezone.utc)
+        snapshot = snapshot or {}
+        self.entries[url] = {
+            "checked": now.isoformat(),
+            "archive_url": snapshot.get("archive_url"),
+            "timestamp": snapshot.get("timestamp"),
+        }
+        return self.entries[url]
+
+    def save(self):
+        if self.path is None:
+            return
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.entries, indent=1, sort_keys=True) + "\n")
+        os.replace(tmp, self.path)
+
+
+def find_snapshots(urls, cache, lanes=LANES, lane_interval=LANE_INTERVAL):
+    """Yield (url, entry, error) for each URL: cache hits first, then lookups.
+
+    `entry` is the cache entry (archive_url None if there is no snapshot), or
+    None with `error` set when the lookup failed.
+    """
+    misses = []
+    for url in urls:
+        entry = cache.get(url)
+        if entry is None:
+            misses.append(url)
+        else:
+            yield url, entry, None
+
+    def lookup(url):
+        try:
+            return latest_snapshot(url), None
+        except (OSError, ValueError) as e:
+            return None, e
+
+    lane = {url: i % lanes for i, url in enumerate(misses)}
+    for url, (snapshot, error) in run_pool(misses, lookup, workers=lanes,
+                                           host_interval=lane_interval, host=lane.get):
+        if error is not None:
+            yield url, None, error
+        else:
+            yield url, cache.put(url, snapshot), None
@@ -1,4 +1,13 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+
+@pytest.fixture(autouse=True)
+def no_url_meta(tmp_path, monkeypatch):
+    """Keep the shared URL metadata cache off (its parent dir doesn't exist)."""
+    import url_meta
+    monkeypatch.setattr(url_meta.URL_META, "root", tmp_path / "no-meta" / "url-meta")
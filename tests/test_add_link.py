@@ -0,0 +1,115 @@
+"""Tests for add_link.py title extraction and YouTube metadata."""
+
+import json
+import subprocess
+from types import SimpleNamespace
+
+import add_link
+from add_link import extract_title, fetch_youtube_metadata_batch, sniff_charset
+
+
+def chunked(data, size=16):
+    """Yield data in small chunks, recording how many were consumed."""
+    chunked.consumed = 0
+    for i in range(0, len(data), size):
+        chunked.consumed += 1
+        yield data[i:i + size]
+
+
+def test_extract_title_basic():
+    html = b"<html><head><title>\n  Hello   World </title></head><body>x</body></html>"
+    assert extract_title(chunked(html)) == "Hello World"
+
+
+def test_extract_title_decodes_entities():
+    html = b"<title>Tom &amp; Jerry &#8211; &quot;Cartoons&quot;</title>"
+    assert extract_title(chunked(html)) == 'Tom & Jerry – "Cartoons"'
+
+
+def test_extract_title_og_fallback():
+    html = b'<head><meta property="og:title" content="Open &amp; Graph"></head><body>'
+    assert extract_title(chunked(html)) == "Open & Graph"
+
+
+def test_extract_title_prefers_title_over_og():
+    html = b'<head><meta property="og:title" content="OG"><title>Real</title></head>'
+    assert extract_title(chunked(html)) == "Real"
+
+
+def test_extract_title_stops_at_end_of_head():
+    html = b"<head><title>Early</title></head><body>" + b"<p>filler</p>" * 10000
+    assert extract_title(chunked(html, 512)) == "Early"
+    # Only the first KB (held back to sniff the charset) is read
+    assert chunked.consumed == 2
+
+
+def test_extract_title_meta_charset():
+    html = '<meta charset="windows-1251"><title>Привет</title>'.encode("cp1251")
+    assert extract_title(chunked(html)) == "Привет"
+
+
+def test_extract_title_header_charset():
+    html = "<title>Café Überblick</title>".encode("latin-1")
+    assert extract_title(chunked(html), "text/html; charset=ISO-8859-1") == "Café Überblick"
+
+
+def test_extract_title_utf8_split_across_chunks():
+    html = "<title>日本語のタイトル</title>".encode("utf-8")
+    assert extract_title(chunked(html, 5)) == "日本語のタイトル"
+
+
+def test_extract_title_missing():
+    assert extract_title(chunked(b"<html><body>No title</body></html>")) is None
+    assert extract_title([]) is None
+
+
+def test_sniff_charset():
+    assert sniff_charset("", b"\xef\xbb\xbf<html>") == "utf-8-sig"
+    assert sniff_charset("text/html; charset=utf-8", b'<meta charset="latin-1">') == "utf-8"
+    assert sniff_charset("text/html", b'<meta http-equiv="Content-Type" content="text/html; charset=Shift_JIS">') == "shift_jis"
+    assert sniff_charset("text/html; charset=bogus", b"") == "utf-8"
+    assert sniff_charset("", b"<html>") == "utf-8"
+
+
+VIDEO_A = "https://www.youtube.com/watch?v=aaaaaaaaaaa"
+VIDEO_B = "https://youtu.be/bbbbbbbbbbb"
+
+
+def test_youtube_batch_single_subprocess(monkeypatch):
+    monkeypatch.setattr(add_link, "yt_dlp", None)
+    calls = []
+
+    def fake_run(cmd, **kwargs):
+        calls.append(cmd)
+        line = json.dumps({"original_url": VIDEO_A, "title": "A", "duration": 225,
+                           "uploader": "Chan", "thumbnail": "https://i.ytimg.com/a.jpg"})
+        return subprocess.CompletedProcess(cmd, 1, stdout=line + "\n", stderr="ERROR: B")
+
+    monkeypatch.setattr(add_link.subprocess, "run", fake_run)
+    meta = fetch_youtube_metadata_batch([VIDEO_A, VIDEO_B, VIDEO_A])
+    assert len(calls) == 1
+    assert calls[0][-2:] == [VIDEO_A, VIDEO_B]
+    assert meta[VIDEO_A] == {"title": "A", "duration": "3:45", "channel": "Chan",
+                             "thumbnail": "https://i.ytimg.com/a.jpg"}
+    assert meta[VIDEO_B] == {}
+
+
+def test_youtube_batch_in_process(monkeypatch):
+    created = []
+
+    class FakeYoutubeDL:
+        def __init__(self, params):
+            created.append(params)
+
+        def extract_info(self, url, download=True):
+            assert not download
+            if url == VIDEO_B:
+                raise RuntimeError("unavailable")
+            return {"title": "A", "duration": 3725}
+
+    monkeypatch.setattr(add_link, "yt_dlp", SimpleNamespace(YoutubeDL=FakeYoutubeDL))
+    monkeypatch.setattr(add_link, "_ydl", None)
+    assert fetch_youtube_metadata_batch([VIDEO_A, VIDEO_B]) == {
+        VIDEO_A: {"title": "A", "duration": "1:02:05"}, VIDEO_B: {}}
+    assert add_link.fetch_youtube_metadata(VIDEO_A) == {"title": "A", "duration": "1:02:05"}
+    assert len(created) == 1
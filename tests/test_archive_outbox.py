@@ -0,0 +1,138 @@
+"""Tests for archive_outbox.py durable snapshot queue."""
+
+import json
+from datetime import datetime, timedelta, timezone
+
+from archive_outbox import (MAX_ATTEMPTS, RETRY_BASE, drain, load_outbox, outbox_path,
+                            queue_snapshots)
+from dedup_trove import dedup
+from trove_utils import load_trove
+from wayback import SnapshotCache
+
+
+def stamp(dt):
+    return dt.strftime("%Y%m%d%H%M%S")
+
+
+def snap(url, dt):
+    return {"archive_url": f"https://web.archive.org/web/{stamp(dt)}/{url}", "timestamp": stamp(dt)}
+
+
+def test_queue_skips_pending(tmp_path):
+    path = tmp_path / "archive-outbox.jsonl"
+    assert queue_snapshots(["https://a.com", "https://b.com", "https://a.com"], path) == 2
+    assert queue_snapshots(["https://a.com", "https://c.com"], path) == 1
+    records = load_outbox(path)
+    assert list(records) == ["https://a.com", "https://b.com", "https://c.com"]
+    assert all(rec["state"] == "pending" and rec["attempts"] == 0 for rec in records.values())
+
+
+def test_drain_sends_and_compacts(tmp_path):
+    trove = tmp_path / "trove-log.jsonl"
+    path = outbox_path(trove)
+    queue_snapshots(["https://ok.com", "https://busy.com", "https://gone.com"], path)
+    statuses = {"https://ok.com": 302, "https://busy.com": 429, "https://gone.com": 404}
+    sent = []
+
+    def fake_save(url):
+        sent.append(url)
+        return statuses[url], None
+
+    done, skipped, failed, pending = drain(trove, interval=0, save=fake_save, lookup=lambda url: None)
+    assert sorted(sent) == sorted(statuses)
+    assert (done, skipped, failed, pending) == (1, 0, 1, 1)
+
+    # Only the retryable one is left, scheduled for later
+    records = load_outbox(path)
+    assert list(records) == ["https://busy.com"]
+    rec = records["https://busy.com"]
+    assert rec["attempts"] == 1 and rec["status"] == 429
+    retry_at = datetime.fromisoformat(rec["next_try"])
+    assert retry_at > datetime.now(timezone.utc) + RETRY_BASE * 0.9
+
+    # Not due yet: nothing sent
+    sent.clear()
+    drain(trove, interval=0, save=fake_save, lookup=lambda url: None)
+    assert sent == []
+
+
+def test_drain_keeps_requests_queued_meanwhile(tmp_path):
+    trove = tmp_path / "trove-log.jsonl"
+    path = outbox_path(trove)
+    queue_snapshots(["https://ok.com"], path)
+
+    def save_and_queue(url):
+        queue_snapshots(["https://late.com"], path)
+        return 302, None
+
+    done, skipped, failed, pending = drain(trove, interval=0, save=save_and_queue,
+                                           lookup=lambda url: None)
+    assert (done, pending) == (1, 1)
+    assert list(load_outbox(path)) == ["https://late.com"]
+
+
+def test_drain_network_error_retries_then_gives_up(tmp_path):
+    trove = tmp_path / "trove-log.jsonl"
+    path = outbox_path(trove)
+    queue_snapshots(["https://down.com"], path)
+
+    def failing_save(url):
+        raise OSError("connection refused")
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        # Make the record due again
+        rec = load_outbox(path)["https://down.com"]
+        rec["next_try"] = datetime.now(timezone.utc).isoformat()
+        path.write_text(json.dumps(rec) + "\n")
+        done, skipped, failed, pending = drain(trove, interval=0, save=failing_save,
+                                               lookup=lambda url: None)
+        if attempt < MAX_ATTEMPTS:
+            assert pending == 1 and load_outbox(path)["https://down.com"]["attempts"] == attempt
+    assert (done, skipped, failed, pending) == (0, 0, 1, 0)
+    assert load_outbox(path) == {}
+
+
+def test_drain_skips_fresh_snapshots(tmp_path):
+    trove = tmp_path / "trove-log.jsonl"
+    now = datetime.now(timezone.utc)
+    urls = ["https://cached.com", "https://popular.com", "https://stale.com"]
+    queue_snapshots(urls, outbox_path(trove))
+    cache = SnapshotCache()
+    cache.put("https://cached.com", snap("https://cached.com", now - timedelta(days=1)))
+    lookups = {"https://popular.com": snap("https://popular.com", now - timedelta(hours=1)),
+               "https://stale.com": snap("https://stale.com", now - timedelta(days=400))}
+    saved = snap("https://stale.com", now)
+    sent = []
+
+    def fake_save(url):
+        sent.append(url)
+        return 302, saved
+
+    done, skipped, failed, pending = drain(trove, interval=0, cache=cache,
+                                           save=fake_save, lookup=lookups.get)
+    assert (done, skipped, failed, pending) == (1, 2, 0, 0)
+    assert sent == ["https://stale.com"]
+    assert cache.get("https://stale.com")["timestamp"] == saved["timestamp"]
+
+    # Every snapshot is recorded on its link
+    ops = load_trove(trove)
+    assert {op["op"] for op in ops} == {"set_archive"}
+    assert {op["url"]: op["archive_url"] for op in ops} == {
+        "https://cached.com": cache.get("https://cached.com")["archive_url"],
+        "https://popular.com": lookups["https://popular.com"]["archive_url"],
+        "https://stale.com": saved["archive_url"],
+    }
+
+
+def test_set_archive_merges_in_dedup():
+    entries = [
+        {"url": "https://a.com", "added": "2025-01-01", "title": "A"},
+        {"op": "set_archive", "url": "https://a.com", "added": "2025-01-02",
+         "archive_url": "https://web.archive.org/web/20250102000000/https://a.com",
+         "archived": "2025-01-02T00:00:00+00:00"},
+    ]
+    links = dedup(entries)
+    assert links[0]["archive_url"] == "https://web.archive.org/web/20250102000000/https://a.com"
+    assert links[0]["archived"] == "2025-01-02T00:00:00+00:00"
+    # Round-trips through a compacted log
+    assert dedup(links) == links
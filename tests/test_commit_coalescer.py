@@ -0,0 +1,60 @@
+"""Tests for commit_coalescer.py against a scratch git repository."""
+
+import subprocess
+
+import pytest
+
+from commit_coalescer import Coalescer, commit_paths
+
+
+def git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), *args], capture_output=True, text=True,
+                          check=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "links"
+    repo.mkdir()
+    git(repo, "init", "-q", "-b", "links")
+    git(repo, "config", "user.name", "test")
+    git(repo, "config", "user.email", "test@example.com")
+    return repo
+
+
+def test_commit_paths_stages_only_named_files(repo):
+    (repo / "trove-log.jsonl").write_text('{"url": "https://a.com"}\n')
+    (repo / "trove-log.jsonl.idx").write_bytes(b"index")
+    commit = commit_paths(repo, [repo / "trove-log.jsonl", repo / "missing.jsonl"], "Add link: A")
+    assert git(repo, "rev-parse", "HEAD") == commit
+    assert git(repo, "ls-files") == "trove-log.jsonl"
+    assert git(repo, "status", "--porcelain") == "?? trove-log.jsonl.idx"
+    # Unchanged content: no empty commit
+    assert commit_paths(repo, [repo / "trove-log.jsonl"], "again") is None
+    # Deleted files are removed
+    (repo / "trove-log.jsonl").unlink()
+    commit_paths(repo, [repo / "trove-log.jsonl"], "remove")
+    assert git(repo, "ls-files") == ""
+    assert git(repo, "rev-list", "--count", "HEAD") == "2"
+
+
+def test_coalescer_batches_by_ops(repo):
+    log = repo / "trove-log.jsonl"
+    with Coalescer(repo, max_ops=3, interval=3600) as commits:
+        for i in range(4):
+            with open(log, "a") as f:
+                f.write(f'{{"url": "https://{i}.com"}}\n')
+            commits.add([log], f"Add link: {i}")
+        # The first three ops were committed together; the fourth is pending
+        assert git(repo, "rev-list", "--count", "HEAD") == "1"
+        assert git(repo, "log", "-1", "--format=%B") == (
+            "3 updates (3 ops)\n\n- Add link: 0\n- Add link: 1\n- Add link: 2")
+    assert git(repo, "rev-list", "--count", "HEAD") == "2"
+    assert git(repo, "log", "-1", "--format=%s") == "Add link: 3"
+    assert git(repo, "show", "HEAD:trove-log.jsonl") == log.read_text().strip()
+
+
+def test_coalescer_without_worktree(tmp_path):
+    commits = Coalescer(tmp_path / "missing")
+    commits.add([tmp_path / "missing" / "x"], "msg")
+    assert commits.flush() is None
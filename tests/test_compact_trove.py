@@ -1,7 +1,15 @@
 """Tests for compact_trove.py."""
 
+import json
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch, MagicMock
-from compact_trove import strip_tracking_params, compact, check_link, health_check, archive_fallback
+
+from hostpool import BREAKER_FAILURES, HostStats
+from http_client import FetchError
+from wayback import SnapshotCache
+from compact_trove import (strip_tracking_params, compact, check_link, health_check,
+                           archive_fallback, schedule_checks, load_check_log,
+                           compact_check_log)
 
 
 # --- strip_tracking_params ---
@@ -97,43 +105,73 @@ def test_compact_idempotent():
 # --- check_link (mocked) ---
 
 def test_check_link_head_success():
-    with patch("compact_trove.urllib.request.urlopen") as mock_open:
-        mock_resp = MagicMock()
-        mock_resp.status = 200
-        mock_resp.__enter__ = lambda s: s
-        mock_resp.__exit__ = MagicMock(return_value=False)
-        mock_open.return_value = mock_resp
-        status, alive = check_link("https://example.com")
+    with patch("compact_trove.http_client.request", return_value=fake_response(200)) as mock_req:
+        status, alive, validators = check_link("https://example.com")
         assert alive is True
         assert status == 200
+        assert validators == {}
+        assert mock_req.call_args[0][0] == "HEAD"
+        # No retries: the per-host timeout is the whole cost of a hung host
+        assert mock_req.call_args[1]["retries"] == 0
 
 
 def test_check_link_dead():
-    with patch("compact_trove.urllib.request.urlopen") as mock_open:
-        mock_open.side_effect = urllib_error(404)
-        status, alive = check_link("https://example.com")
+    with patch("compact_trove.http_client.request", return_value=fake_response(404)):
+        status, alive, _ = check_link("https://example.com")
         assert alive is False
         assert status == 404
 
 
+def test_check_link_network_error():
+    with patch("compact_trove.http_client.request", side_effect=FetchError("refused")):
+        assert check_link("https://example.com") == (0, False, {})
+
+
+def test_check_link_unconditional_304_without_prev():
+    with patch("compact_trove.http_client.request", return_value=fake_response(304)):
+        assert check_link("https://example.com") == (304, True, {})
+
+
 def test_check_link_head_405_falls_back_to_get():
     """When HEAD returns 405, should retry with GET."""
-    call_count = [0]
-
-    def side_effect(req, **kwargs):
-        call_count[0] += 1
-        if call_count[0] == 1:
-            raise urllib_error(405)
-        mock_resp = MagicMock()
-        mock_resp.status = 200
-        mock_resp.__enter__ = lambda s: s
-        mock_resp.__exit__ = MagicMock(return_value=False)
-        return mock_resp
-
-    with patch("compact_trove.urllib.request.urlopen", side_effect=side_effect):
-        status, alive = check_link("https://example.com")
+    with patch("compact_trove.http_client.request",
+               side_effect=[fake_response(405), fake_response(200)]) as mock_req:
+        status, alive, _ = check_link("https://example.com")
         assert alive is True
         assert status == 200
+        assert [c[0][0] for c in mock_req.call_args_list] == ["HEAD", "GET"]
+        assert all(c[1]["retries"] == 0 for c in mock_req.call_args_list)
+
+
+def test_check_link_records_validators():
+    resp = fake_response(200, headers={"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"},
+                         url="https://example.com/final")
+    with patch("compact_trove.http_client.request", return_value=resp):
+        _, _, validators = check_link("https://example.com")
+    assert validators == {
+        "etag": '"v1"',
+        "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT",
+        "final_url": "https://example.com/final",
+    }
+
+
+def test_check_link_conditional_304_is_alive():
+    prev = {"url": "https://example.com", "alive": True, "etag": '"v1"',
+            "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    with patch("compact_trove.http_client.request", return_value=fake_response(304)) as mock_req:
+        status, alive, validators = check_link("https://example.com", prev)
+    assert (status, alive) == (304, True)
+    assert mock_req.call_args[1]["headers"] == {
+        "If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+    # Validators carried over when the 304 omits them
+    assert validators == {"etag": '"v1"', "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT"}
+
+
+def test_check_link_no_conditional_after_dead():
+    prev = {"url": "https://example.com", "alive": False, "etag": '"v1"'}
+    with patch("compact_trove.http_client.request", return_value=fake_response(200)) as mock_req:
+        check_link("https://example.com", prev)
+    assert mock_req.call_args[1]["headers"] == {}
 
 
 # --- health_check (mocked) ---
@@ -154,43 +192,185 @@ def test_health_check_skips_recent():
         mock_check.assert_not_called()
 
 
+def test_health_check_records_all_links():
+    links = [{"url": f"https://h{i % 3}.com/{i}"} for i in range(9)]
+    check_log = {}
+    def fake_check(url, prev, timeout):
+        return (404, False, {}) if "/4" in url else (200, True, {"etag": '"x"'})
+
+    with patch("compact_trove.check_link", side_effect=fake_check):
+        health_check(links, check_log, workers=4, host_interval=0)
+    assert set(check_log) == {link["url"] for link in links}
+    rec = check_log["https://h1.com/4"]
+    assert set(rec) == {"url", "last_checked", "status_code", "alive", "stable_since"}
+    assert rec["status_code"] == 404 and rec["alive"] is False
+    assert check_log["https://h0.com/0"]["alive"] is True
+    assert check_log["https://h0.com/0"]["etag"] == '"x"'
+
+
+def test_health_check_tracks_stable_since():
+    old = "2024-01-01T00:00:00+00:00"
+    links = [{"url": "https://same.com"}, {"url": "https://flipped.com"}]
+    check_log = {
+        "https://same.com": {"url": "https://same.com", "last_checked": old,
+                             "stable_since": "2023-01-01T00:00:00+00:00", "alive": True},
+        "https://flipped.com": {"url": "https://flipped.com", "last_checked": old, "alive": True},
+    }
+    with patch("compact_trove.check_link",
+               side_effect=lambda url, prev, timeout: (200, True, {}) if "same" in url else (0, False, {})):
+        health_check(links, check_log, host_interval=0)
+    assert check_log["https://same.com"]["stable_since"] == "2023-01-01T00:00:00+00:00"
+    flipped = check_log["https://flipped.com"]
+    assert flipped["stable_since"] == flipped["last_checked"]
+
+
+def test_health_check_defers_dead_host():
+    links = [{"url": f"https://dead.com/{i}"} for i in range(10)] + [{"url": "https://ok.com/"}]
+    check_log = {}
+    host_stats = HostStats()
+    with patch("compact_trove.check_link",
+               side_effect=lambda url, prev, timeout: (0, False, {}) if "dead" in url else (200, True, {})) as mock_check:
+        health_check(links, check_log, host_interval=0, host_stats=host_stats)
+    # The breaker opens after BREAKER_FAILURES failures; the rest are deferred, not recorded
+    assert mock_check.call_count == BREAKER_FAILURES + 1
+    assert len([u for u in check_log if "dead" in u]) == BREAKER_FAILURES
+    assert host_stats.is_open("dead.com")
+    assert check_log["https://ok.com/"]["alive"] is True
+
+
+# --- link-check-log ---
+
+def test_health_check_appends_records(tmp_path):
+    log_path = tmp_path / "link-check-log.jsonl"
+    log_path.write_text(json.dumps({"url": "https://a.com/", "alive": False}) + "\n")
+    links = [{"url": "https://a.com/"}, {"url": "https://b.com/"}]
+    check_log = load_check_log(log_path)
+    with patch("compact_trove.check_link", side_effect=lambda url, prev, timeout: (200, True, {})):
+        health_check(links, check_log, host_interval=0, log_path=log_path)
+    lines = log_path.read_text().splitlines()
+    assert len(lines) == 3  # appended, not rewritten
+    assert load_check_log(log_path) == check_log
+    assert check_log["https://a.com/"]["alive"] is True
+
+
+def test_load_check_log_skips_torn_line(tmp_path):
+    log_path = tmp_path / "link-check-log.jsonl"
+    log_path.write_text(json.dumps({"url": "https://a.com/", "alive": True}) + "\n"
+                        + '{"url": "https://b.com/", "al')
+    assert list(load_check_log(log_path)) == ["https://a.com/"]
+
+    # Appending after a torn line starts a fresh line
+    links = [{"url": "https://b.com/"}]
+    check_log = load_check_log(log_path)
+    with patch("compact_trove.check_link", side_effect=lambda url, prev, timeout: (200, True, {})):
+        health_check(links, check_log, host_interval=0, log_path=log_path)
+    assert set(load_check_log(log_path)) == {"https://a.com/", "https://b.com/"}
+
+
+def test_compact_check_log_folds_superseded(tmp_path):
+    log_path = tmp_path / "link-check-log.jsonl"
+    with open(log_path, "w") as f:
+        for i in range(5):
+            f.write(json.dumps({"url": "https://a.com/", "n": i}) + "\n")
+        f.write(json.dumps({"url": "https://b.com/", "n": 0}) + "\n")
+    records = load_check_log(log_path)
+    assert compact_check_log(records, log_path) is True
+    assert log_path.read_text().count("\n") == 2
+    assert load_check_log(log_path) == records == {
+        "https://a.com/": {"url": "https://a.com/", "n": 4},
+        "https://b.com/": {"url": "https://b.com/", "n": 0},
+    }
+    # Already folded: left alone
+    assert compact_check_log(records, log_path) is False
+
+
+# --- schedule_checks ---
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def days_ago(n):
+    return (NOW - timedelta(days=n)).isoformat()
+
+
+def test_schedule_unchecked_first():
+    links = [{"url": "https://old.com"}, {"url": "https://new.com"}]
+    check_log = {"https://old.com": {"last_checked": days_ago(400), "stable_since": days_ago(400)}}
+    assert schedule_checks(links, check_log, now=NOW) == ["https://new.com", "https://old.com"]
+
+
+def test_schedule_stable_links_wait_longer():
+    links = [{"url": "https://stable.com"}, {"url": "https://flaky.com"}]
+    check_log = {
+        # Stable for two years: interval is capped at 180 days
+        "https://stable.com": {"last_checked": days_ago(20), "stable_since": days_ago(730)},
+        # Flipped state 20 days ago: interval is the 7-day minimum
+        "https://flaky.com": {"last_checked": days_ago(20), "stable_since": days_ago(20)},
+    }
+    assert schedule_checks(links, check_log, now=NOW) == ["https://flaky.com"]
+
+
+def test_schedule_recently_added_rechecked_sooner():
+    links = [{"url": "https://fresh.com", "added": days_ago(5)},
+             {"url": "https://older.com", "added": "2020-01-01"}]
+    check_log = {url: {"last_checked": days_ago(4), "stable_since": days_ago(4)}
+                 for url in ("https://fresh.com", "https://older.com")}
+    assert schedule_checks(links, check_log, now=NOW) == ["https://fresh.com"]
+
+
+def test_schedule_orders_by_overdue_and_caps():
+    links = [{"url": f"https://h{i}.com"} for i in range(5)]
+    check_log = {f"https://h{i}.com": {"last_checked": days_ago(10 + i), "stable_since": days_ago(10 + i)}
+                 for i in range(5)}
+    assert schedule_checks(links, check_log, max_checks=2, now=NOW) == ["https://h4.com", "https://h3.com"]
+
+
 # --- archive_fallback (mocked) ---
 
 def test_archive_fallback_adds_url():
     links = [{"url": "https://dead.com"}]
     check_log = {"https://dead.com": {"url": "https://dead.com", "alive": False}}
-    archive_response = {
-        "archived_snapshots": {
-            "closest": {"available": True, "url": "https://web.archive.org/web/2024/https://dead.com"}
-        }
-    }
+    cdx_response = [["timestamp", "original"], ["20240101000000", "https://dead.com"]]
+
+    with patch("compact_trove.http_client.request",
+               return_value=fake_response(200, json.dumps(cdx_response).encode())):
+        archive_fallback(links, check_log)
 
-    with patch("compact_trove.urllib.request.urlopen") as mock_open:
-        mock_resp = MagicMock()
-        mock_resp.read.return_value = __import__("json").dumps(archive_response).encode()
-        mock_resp.__enter__ = lambda s: s
-        mock_resp.__exit__ = MagicMock(return_value=False)
-        mock_open.return_value = mock_resp
+    assert links[0]["archive_url"] == "https://web.archive.org/web/20240101000000/https://dead.com"
 
-        with patch("compact_trove.time.sleep"):
-            archive_fallback(links, check_log)
 
-    assert links[0]["archive_url"] == "https://web.archive.org/web/2024/https://dead.com"
+def test_archive_fallback_uses_cache():
+    links = [{"url": "https://dead.com"}, {"url": "https://gone.com"}]
+    check_log = {url: {"url": url, "alive": False} for url in ("https://dead.com", "https://gone.com")}
+    cache = SnapshotCache()
+    cache.put("https://dead.com", {"archive_url": "https://web.archive.org/web/1/https://dead.com",
+                                   "timestamp": "20240101000000"})
+    cache.put("https://gone.com", None)
+    with patch("compact_trove.http_client.request") as mock_req:
+        archive_fallback(links, check_log, cache)
+        mock_req.assert_not_called()
+    assert links[0]["archive_url"] == "https://web.archive.org/web/1/https://dead.com"
+    assert "archive_url" not in links[1]
 
 
 def test_archive_fallback_skips_alive():
     links = [{"url": "https://alive.com"}]
     check_log = {"https://alive.com": {"url": "https://alive.com", "alive": True}}
-    with patch("compact_trove.urllib.request.urlopen") as mock_open:
+    with patch("compact_trove.http_client.request") as mock_req:
         archive_fallback(links, check_log)
-        mock_open.assert_not_called()
+        mock_req.assert_not_called()
 
 
 # --- helpers ---
 
-def urllib_error(code):
-    """Create a urllib HTTPError with given status code."""
-    import urllib.error
-    return urllib.error.HTTPError(
-        url="https://example.com", code=code, msg="", hdrs=None, fp=None
-    )
+def fake_response(status, body=b"", headers=None, url="https://example.com"):
+    """A stand-in for http_client.Response."""
+    resp = MagicMock()
+    resp.status = status
+    resp.headers = headers or {}
+    resp.url = url
+    resp.read.return_value = body
+    resp.json.side_effect = lambda: json.loads(body)
+    resp.__enter__ = lambda s: s
+    resp.__exit__ = MagicMock(return_value=False)
+    return resp
@@ -1,6 +1,8 @@
 """Tests for dedup_trove.py merge logic."""
 
-from dedup_trove import dedup
+import json
+
+from dedup_trove import dedup, dedup_log
 
 
 def test_single_add():
@@ -162,3 +164,116 @@ def test_delete_removes_link():
 
 def test_empty_input():
     assert dedup([]) == []
+
+
+# --- incremental dedup_log ---
+
+def append_log(path, entries):
+    with open(path, "a") as f:
+        for e in entries:
+            f.write(json.dumps(e) + "\n")
+
+
+def test_dedup_log_incremental_matches_full(tmp_path):
+    log = tmp_path / "log.jsonl"
+    ckpt = tmp_path / "ckpt.json"
+    first = [
+        {"url": "https://a.com", "added": "2025-01-01", "tags": "games retro"},
+        {"url": "https://b.com", "added": "2025-01-02", "notes": "hi"},
+    ]
+    second = [
+        {"op": "set_title", "url": "https://a.com", "added": "2025-01-03", "title": "A"},
+        {"op": "rename_tag", "added": "2025-01-04", "remove_tag": "retro",
+         "add_tags": "classic", "urls": "https://a.com"},
+        {"url": "https://c.com", "added": "2025-01-05"},
+        {"op": "delete", "url": "https://b.com", "added": "2025-01-06"},
+    ]
+    append_log(log, first)
+    links, replayed = dedup_log(log, ckpt)
+    assert replayed == 2
+    assert links == dedup(first)
+
+    append_log(log, second)
+    links, replayed = dedup_log(log, ckpt)
+    assert replayed == 4
+    assert links == dedup(first + second)
+
+    links, replayed = dedup_log(log, ckpt)
+    assert replayed == 0
+    assert links == dedup(first + second)
+
+
+def test_dedup_log_rewritten_prefix_replays_all(tmp_path):
+    log = tmp_path / "log.jsonl"
+    ckpt = tmp_path / "ckpt.json"
+    append_log(log, [{"url": "https://a.com", "added": "2025-01-01", "tags": "x"}])
+    dedup_log(log, ckpt)
+
+    # Rewrite (as compact/normalize would), then append
+    rewritten = [{"url": "https://a.com", "added": "2025-01-01", "tags": "y"},
+                 {"url": "https://b.com", "added": "2025-01-02"}]
+    log.write_text("")
+    append_log(log, rewritten)
+    links, replayed = dedup_log(log, ckpt)
+    assert replayed == 2
+    assert links == dedup(rewritten)
+
+
+def test_dedup_log_without_checkpoint(tmp_path):
+    log = tmp_path / "log.jsonl"
+    entries = [{"url": "https://a.com", "added": "2025-01-01"}]
+    append_log(log, entries)
+    links, replayed = dedup_log(log)
+    assert links == dedup(entries)
+    assert replayed == 1
+
+
+# --- parallel merge ---
+
+def random_log(n, seed=1):
+    import random
+    rng = random.Random(seed)
+    urls = [f"https://site{i}.com" for i in range(40)]
+    tags = ["games", "retro", "music", "tools", "free", "classic"]
+    entries = []
+    for i in range(n):
+        added = f"2025-01-{1 + i % 28:02d}"
+        kind = rng.choice(["add", "add", "add_tag", "remove_tag", "set_title",
+                           "set_notes", "rename_tag"])
+        if rng.random() < 0.01:
+            kind = "delete"
+        if kind == "rename_tag":
+            entries.append({"op": "rename_tag", "added": added,
+                            "remove_tag": rng.choice(tags), "add_tags": rng.choice(tags),
+                            "urls": " ".join(rng.sample(urls, 3))})
+            continue
+        entry = {"url": rng.choice(urls), "added": added}
+        if kind != "add":
+            entry["op"] = kind
+        if kind in ("add", "add_tag", "remove_tag"):
+            entry["tags"] = " ".join(rng.sample(tags, 2))
+        if kind in ("add", "set_title"):
+            entry["title"] = f"T{i}"
+        if kind in ("add", "set_notes"):
+            entry["notes"] = f"n{i}"
+            if rng.random() < 0.5:
+                entry["submitted_by"] = "alice"
+        entries.append(entry)
+    return entries
+
+
+def test_parallel_matches_serial():
+    entries = random_log(500)
+    assert json.dumps(dedup(entries, jobs=3)) == json.dumps(dedup(entries))
+
+
+def test_parallel_dedup_log_with_checkpoint(tmp_path):
+    log = tmp_path / "log.jsonl"
+    ckpt = tmp_path / "ckpt.json"
+    entries = random_log(300, seed=2)
+    append_log(log, entries[:200])
+    dedup_log(log, ckpt, jobs=2)
+    append_log(log, entries[200:])
+    links, replayed = dedup_log(log, ckpt, jobs=2)
+    assert replayed == 100
+    assert json.dumps(links) == json.dumps(dedup(entries))
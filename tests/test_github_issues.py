@@ -0,0 +1,89 @@
+"""Tests for github_issues.py against a fake GraphQL endpoint."""
+
+import json
+import re
+from unittest.mock import MagicMock
+
+import github_issues
+from github_issues import IssuesAPI
+from http_client import FetchError
+
+
+class FakeGraphQL:
+    """Serves the issues query with cursor pages and aliased closeIssue mutations."""
+
+    def __init__(self, issues, fail_ids=(), timeout_ids=()):
+        self.open = {issue["id"]: issue for issue in issues}
+        self.fail_ids = set(fail_ids)
+        self.timeout_ids = set(timeout_ids)
+        self.requests = []
+
+    def post(self, url, data=b"", headers=None, **kwargs):
+        payload = json.loads(data)
+        self.requests.append(payload)
+        if self.timeout_ids & set(payload["variables"].values()):
+            raise FetchError(f"POST {url}: timed out")
+        assert headers["Authorization"] == "bearer t0ken"
+        if payload["query"].lstrip().startswith("mutation"):
+            result = self.mutate(payload["variables"])
+        else:
+            result = self.page(payload["variables"])
+        resp = MagicMock()
+        resp.status = 200
+        resp.json.return_value = result
+        return resp
+
+    def page(self, variables):
+        size = int(re.search(r"first: (\d+)", self.requests[-1]["query"]).group(1))
+        nodes = sorted(self.open.values(), key=lambda issue: issue["number"])
+        start = int(variables["after"] or 0)
+        return {"data": {"repository": {"issues": {
+            "pageInfo": {"hasNextPage": start + size < len(nodes), "endCursor": str(start + size)},
+            "nodes": nodes[start:start + size],
+        }}}}
+
+    def mutate(self, variables):
+        data, errors = {}, []
+        for alias, issue_id in variables.items():
+            if issue_id in self.fail_ids:
+                data[alias] = None
+                errors.append({"path": [alias], "message": "boom"})
+            else:
+                issue = self.open.pop(issue_id)
+                data[alias] = {"issue": {"number": issue["number"]}}
+        return {"data": data, "errors": errors}
+
+
+def make_issues(count):
+    return [{"id": f"I_{n}", "number": n, "body": f"url: https://{n}.com"}
+            for n in range(1, count + 1)]
+
+
+def test_iter_open_issues_follows_cursors(monkeypatch):
+    fake = FakeGraphQL(make_issues(250))
+    monkeypatch.setattr(github_issues.http_client, "post", fake.post)
+    api = IssuesAPI("owner/repo", "t0ken")
+    issues = list(api.iter_open_issues("submission"))
+    assert [issue["number"] for issue in issues] == list(range(1, 251))
+    assert len(fake.requests) == 3
+    assert fake.requests[0]["variables"] == {"owner": "owner", "name": "repo",
+                                             "label": "submission", "after": None}
+
+
+def test_close_issues_in_batches(monkeypatch):
+    issues = make_issues(120)
+    fake = FakeGraphQL(issues, fail_ids={"I_7"})
+    monkeypatch.setattr(github_issues.http_client, "post", fake.post)
+    closed = IssuesAPI("owner/repo", "t0ken").close_issues(issues)
+    assert closed == set(range(1, 121)) - {7}
+    assert len(fake.requests) == 3  # 50 + 50 + 20
+    assert list(fake.open) == ["I_7"]
+
+
+def test_close_issues_survives_network_error(monkeypatch):
+    issues = make_issues(120)
+    fake = FakeGraphQL(issues, timeout_ids={"I_60"})
+    monkeypatch.setattr(github_issues.http_client, "post", fake.post)
+    closed = IssuesAPI("owner/repo", "t0ken").close_issues(issues)
+    assert closed == set(range(1, 51)) | set(range(101, 121))
+    assert len(fake.requests) == 3
@@ -0,0 +1,122 @@
+"""Tests for hostpool.py concurrent per-host-polite pool."""
+
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from hostpool import (BREAKER_COOLDOWN, BREAKER_FAILURES, MAX_TIMEOUT, MIN_TIMEOUT, HostStats,
+                      host_of, run_pool)
+
+
+def test_host_of():
+    assert host_of("https://Example.COM:8080/x?y=1") == "example.com"
+    assert host_of("not a url") == ""
+
+
+def test_runs_all_items():
+    urls = [f"https://h{i % 5}.com/{i}" for i in range(30)]
+    results = dict(run_pool(urls, lambda u: u.upper(), workers=4, host_interval=0))
+    assert results == {u: u.upper() for u in urls}
+
+
+def test_one_request_per_host_in_flight_and_spaced():
+    lock = threading.Lock()
+    in_flight = {}
+    starts = {}
+    overlap = []
+
+    def work(url):
+        h = host_of(url)
+        with lock:
+            if in_flight.get(h):
+                overlap.append(url)
+            in_flight[h] = True
+            starts.setdefault(h, []).append(time.monotonic())
+        time.sleep(0.01)
+        with lock:
+            in_flight[h] = False
+        return True
+
+    urls = [f"https://h{i % 3}.com/{i}" for i in range(12)]
+    list(run_pool(urls, work, workers=8, host_interval=0.05))
+    assert overlap == []
+    for times in starts.values():
+        gaps = [b - a for a, b in zip(times, times[1:])]
+        assert all(g >= 0.045 for g in gaps)
+
+
+def test_hosts_run_concurrently():
+    barrier = threading.Barrier(3, timeout=2)
+    urls = ["https://a.com", "https://b.com", "https://c.com"]
+    results = dict(run_pool(urls, lambda u: barrier.wait() is not None, workers=3))
+    assert len(results) == 3
+
+
+def test_budget_stops_new_work():
+    urls = [f"https://same.com/{i}" for i in range(50)]
+    t0 = time.monotonic()
+    results = list(run_pool(urls, lambda u: u, workers=4, host_interval=0.05, budget=0.2))
+    assert time.monotonic() - t0 < 1.5
+    assert 0 < len(results) < 50
+
+
+def test_host_ok_drops_remaining_items():
+    urls = [f"https://bad.com/{i}" for i in range(5)] + ["https://good.com/"]
+    started = []
+
+    def work(url):
+        started.append(url)
+        return url
+
+    results = dict(run_pool(urls, work, workers=1, host_interval=0,
+                            host_ok=lambda h: not (h == "bad.com" and started)))
+    assert set(results) == {"https://bad.com/0", "https://good.com/"}
+
+
+def test_host_stats_timeout_tracks_latency():
+    stats = HostStats()
+    assert stats.timeout("new.com") == MAX_TIMEOUT
+    for _ in range(10):
+        stats.record("fast.com", 0.05, ok=True)
+    assert stats.timeout("fast.com") == MIN_TIMEOUT
+    for _ in range(10):
+        stats.record("slow.com", 3.0, ok=True)
+    assert stats.timeout("slow.com") == MAX_TIMEOUT
+    stats.record("mid.com", 1.0, ok=True)
+    assert stats.timeout("mid.com") == 4.0
+
+
+def test_host_stats_circuit_breaker():
+    stats = HostStats()
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for _ in range(BREAKER_FAILURES - 1):
+        stats.record("down.com", 10, ok=False, now=now)
+    assert not stats.is_open("down.com", now)
+    stats.record("down.com", 10, ok=False, now=now)
+    assert stats.is_open("down.com", now)
+
+    # After the cooldown one probe is allowed; a failure re-opens immediately
+    later = now + BREAKER_COOLDOWN + timedelta(seconds=1)
+    assert not stats.is_open("down.com", later)
+    stats.record("down.com", 10, ok=False, now=later)
+    assert stats.is_open("down.com", later)
+
+    # A success closes it
+    stats.record("down.com", 0.1, ok=True)
+    assert not stats.is_open("down.com", later)
+    assert stats.hosts["down.com"]["consecutive_failures"] == 0
+
+
+def test_host_stats_persist_and_summary(tmp_path):
+    path = tmp_path / "host-stats.json"
+    stats = HostStats(path)
+    stats.record("a.com", 0.2, ok=True)
+    stats.record("b.com", 1.5, ok=True)
+    stats.record("b.com", 10, ok=False)
+    lines = stats.summary()
+    assert lines[0].startswith("  b.com: 2 checks, 1 failed")
+    stats.save()
+
+    reloaded = HostStats(path)
+    assert reloaded.hosts == stats.hosts
+    assert reloaded.run == {}
@@ -0,0 +1,159 @@
+"""Tests for http_client.py against a local server."""
+
+import gzip
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_client
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+    hits = {}
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        Handler.connections.add(self.client_address)
+        Handler.hits[self.path] = Handler.hits.get(self.path, 0) + 1
+        if self.path == "/gzip":
+            self.reply(200, gzip.compress(b"hello gzip"), {"Content-Encoding": "gzip"})
+        elif self.path == "/redirect":
+            self.reply(302, headers={"Location": "/plain"})
+        elif self.path == "/flaky":
+            if Handler.hits[self.path] < 3:
+                self.reply(503)
+            else:
+                self.reply(200, b"recovered")
+        elif self.path.startswith("/go?"):
+            self.reply(302, headers={"Location": self.path[len("/go?"):]})
+        elif self.path == "/auth":
+            self.reply(200, (self.headers["Authorization"] or "none").encode())
+        elif self.path == "/ua":
+            self.reply(200, self.headers["User-Agent"].encode())
+        elif self.path.startswith("/echo"):
+            self.reply(200, self.path.encode())
+        elif self.path == "/big":
+            self.reply(200, b"x" * 100_000)
+        else:
+            self.reply(200, b"plain body")
+
+
+def start_server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=srv.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    return srv
+
+
+@pytest.fixture
+def server():
+    Handler.connections = set()
+    Handler.hits = {}
+    srv = start_server()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    http_client.POOL.close_all()
+
+
+def test_get_and_keepalive_reuse(server):
+    for _ in range(5):
+        resp = http_client.get(f"{server}/plain")
+        assert resp.status == 200
+        assert resp.read() == b"plain body"
+    assert len(Handler.connections) == 1
+
+
+def test_gzip_decoded(server):
+    assert http_client.get(f"{server}/gzip").read() == b"hello gzip"
+
+
+def test_redirect_followed(server):
+    resp = http_client.get(f"{server}/redirect")
+    assert resp.status == 200
+    assert resp.url == f"{server}/plain"
+
+
+def test_cross_host_redirect_drops_credentials(server):
+    other = start_server()
+    try:
+        elsewhere = f"http://localhost:{other.server_address[1]}/auth"
+        auth = {"Authorization": "bearer t0ken"}
+        assert http_client.get(f"{server}/go?/auth", headers=auth).read() == b"bearer t0ken"
+        assert http_client.get(f"{server}/go?{elsewhere}", headers=auth).read() == b"none"
+    finally:
+        other.shutdown()
+
+
+def test_retry_on_503(server):
+    resp = http_client.get(f"{server}/flaky", retries=2, backoff=0)
+    assert resp.status == 200
+    assert resp.read() == b"recovered"
+
+
+def test_no_retry_returns_status(server):
+    assert http_client.get(f"{server}/flaky", retries=0).status == 503
+
+
+def test_user_agent(server):
+    assert http_client.get(f"{server}/ua").read().decode() == http_client.USER_AGENT
+
+
+def test_head(server):
+    resp = http_client.head(f"{server}/plain")
+    assert resp.status == 200 and resp.read() == b""
+
+
+def test_stream_partial_read_drops_connection(server):
+    with http_client.get(f"{server}/big", stream=True) as resp:
+        assert resp.read(10) == b"x" * 10
+    assert http_client.get(f"{server}/plain").read() == b"plain body"
+    assert len(Handler.connections) == 2
+
+
+def test_connection_error_raises_fetch_error():
+    with pytest.raises(http_client.FetchError):
+        http_client.get("http://127.0.0.1:9/", retries=1, backoff=0, timeout=2)
+
+
+def test_unsupported_scheme():
+    with pytest.raises(http_client.FetchError):
+        http_client.get("ftp://example.com/")
+
+
+def test_timeout_not_retried():
+    # Accepts connections (via the backlog) but never answers
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(8)
+    try:
+        start = time.monotonic()
+        with pytest.raises(http_client.FetchError):
+            http_client.get(f"http://127.0.0.1:{listener.getsockname()[1]}/", timeout=0.5,
+                            retries=2, backoff=0)
+        assert time.monotonic() - start < 1.0
+    finally:
+        listener.close()
+
+
+def test_non_ascii_path_percent_encoded(server):
+    resp = http_client.get(f"{server}/echo/Café?q=ü&already=%20")
+    assert resp.read() == b"/echo/Caf%C3%A9?q=%C3%BC&already=%20"
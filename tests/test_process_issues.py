@@ -1,9 +1,35 @@
 """Tests for process_issues.py parsing and processing logic."""
 
 import json
+import os
+import subprocess
 from pathlib import Path
+from unittest.mock import patch
 
-from process_issues import parse_issue_body, process_issue_list
+from dedup_trove import dedup
+from process_issues import (LiveTrove, fill_titles, issue_outbox_path, parse_issue_body,
+                            process_issue_list, process_issues, run_daemon)
+from trove_utils import append_entries, load_trove, save_trove
+
+
+class FakeAPI:
+    """Stands in for github_issues.IssuesAPI."""
+
+    def __init__(self, issues, fail=()):
+        self.issues = [{"id": f"I_{issue['number']}", **issue} for issue in issues]
+        self.fail = set(fail)
+        self.closed = []
+        self.check = lambda: True
+
+    def iter_open_issues(self, label):
+        assert label == "submission"
+        yield from (issue for issue in self.issues if issue["number"] not in self.closed)
+
+    def close_issues(self, issues):
+        assert self.check()
+        done = {issue["number"] for issue in issues if issue["number"] not in self.fail}
+        self.closed.extend(sorted(done))
+        return done
 
 
 def test_parse_issue_body_basic():
@@ -49,6 +75,7 @@ def test_process_local_add(tmp_path):
     assert entries[0]["url"] == "https://example.com"
     assert entries[0]["tags"] == "games tools"
     assert entries[0]["title"] == "Example Site"
+    assert list(tmp_path.iterdir()) == [out]  # no index sidecar next to --output
 
 
 def test_process_local_delete(tmp_path):
@@ -78,3 +105,222 @@ def test_process_local_add_tag(tmp_path):
     assert entries[1]["op"] == "add_tag"
     assert entries[1]["url"] == "https://example.com"
     assert entries[1]["tags"] == "retro"
+
+
+def test_fill_titles_appends_fill_title_ops(tmp_path):
+    log = tmp_path / "trove.jsonl"
+    save_trove([
+        {"url": "https://a.com", "added": "2025-01-01"},
+        {"op": "add_tag", "url": "https://a.com", "added": "2025-01-02", "tags": "x"},
+        {"url": "https://b.com", "added": "2025-01-01", "title": "Has title"},
+        {"url": "https://c.com", "added": "2025-01-01"},
+        {"url": "https://d.com", "added": "2025-01-01"},
+    ], log)
+    fetched = []
+
+    def fake_fetch(url):
+        fetched.append(url)
+        return None if url == "https://c.com" else f"Title of {url}"
+
+    with patch("process_issues.fetch_title", side_effect=fake_fetch):
+        fill_titles(log, host_interval=0)
+
+    # Each titleless link fetched once, including one with several ops
+    assert sorted(fetched) == ["https://a.com", "https://c.com", "https://d.com"]
+    entries = load_trove(log)
+    assert len(entries) == 7  # appended, not rewritten
+    assert {e["url"] for e in entries[5:]} == {"https://a.com", "https://d.com"}
+    assert all(e["op"] == "fill_title" for e in entries[5:])
+    titles = {link["url"]: link.get("title") for link in dedup(entries)}
+    assert titles == {"https://a.com": "Title of https://a.com", "https://b.com": "Has title",
+                      "https://c.com": None, "https://d.com": "Title of https://d.com"}
+
+
+def test_fill_titles_limit(tmp_path):
+    log = tmp_path / "trove.jsonl"
+    save_trove([{"url": f"https://{i}.com", "added": "2025-01-01"} for i in range(5)], log)
+    with patch("process_issues.fetch_title", return_value="T") as mock_fetch:
+        fill_titles(log, limit=2, host_interval=0)
+    assert mock_fetch.call_count == 2
+    assert len(load_trove(log)) == 7
+
+
+def test_fill_title_does_not_override():
+    entries = [
+        {"url": "https://a.com", "added": "2025-01-01"},
+        {"op": "fill_title", "url": "https://a.com", "added": "2025-01-02", "title": "Fetched"},
+        {"url": "https://a.com", "added": "2025-01-03", "title": "Submitted"},
+        {"op": "fill_title", "url": "https://a.com", "added": "2025-01-04", "title": "Fetched again"},
+    ]
+    assert dedup(entries)[0]["title"] == "Submitted"
+    assert dedup(entries[:2])[0]["title"] == "Fetched"
+
+
+def test_process_issue_list_phases(tmp_path):
+    log = tmp_path / "trove.jsonl"
+    save_trove([{"url": "https://old.com", "added": "2025-01-01", "title": "Old"}], log)
+    issues = [
+        {"number": 1, "body": "url: https://slow.com\ntags: a"},
+        {"number": 2, "body": "url: https://fast.com\ntitle: Given"},
+        {"number": 3, "body": "action: add_tag\nurl: https://slow.com\ntags: b"},
+        {"number": 4, "body": "tags: no-url"},
+        {"number": 5, "body": "url: https://youtu.be/abcdefghijk"},
+        {"number": 6, "body": "url: https://slow.com"},
+        {"number": 7, "body": "url: https://old.com"},
+        {"number": 8, "body": "action: set_tag_desc"},
+    ]
+    fetched = []
+
+    def fake_fetch(url):
+        fetched.append(url)
+        return f"Title of {url}"
+
+    youtube = {"https://youtu.be/abcdefghijk": {"title": "Video", "duration": "1:00"}}
+    api = FakeAPI(issues)
+    api.check = lambda: len(load_trove(log)) == 7  # ops are in the log before closing
+
+    with patch("process_issues.fetch_title", side_effect=fake_fetch), \
+            patch("process_issues.fetch_youtube_metadata_batch", return_value=youtube) as yt:
+        process_issue_list(issues, trove_path=log, api=api)
+
+    # Only new URLs without a submitted title are fetched, each once
+    assert fetched == ["https://slow.com"]
+    yt.assert_called_once_with(["https://youtu.be/abcdefghijk"])
+    entries = load_trove(log)[1:]
+    assert [(e.get("op", "add"), e["url"]) for e in entries] == [
+        ("add", "https://slow.com"), ("add", "https://fast.com"), ("add_tag", "https://slow.com"),
+        ("add", "https://youtu.be/abcdefghijk"), ("add", "https://slow.com"),
+        ("add", "https://old.com")]
+    assert entries[0]["title"] == "Title of https://slow.com"
+    assert entries[1]["title"] == "Given"
+    assert entries[3]["title"] == "Video" and entries[3]["duration"] == "1:00"
+    assert "title" not in entries[4]  # repeat add in the batch isn't refetched
+    assert "title" not in entries[5]  # already in the log
+    assert sorted(api.closed) == [1, 2, 3, 5, 6, 7, 8]
+    assert load_trove(tmp_path / "issue-outbox.jsonl") == []
+
+
+def test_process_issues_retries_failed_closes(tmp_path):
+    log = tmp_path / "trove.jsonl"
+    api = FakeAPI([{"number": 1, "body": "url: https://a.com\ntitle: A"},
+                   {"number": 2, "body": "url: https://b.com\ntitle: B"}], fail={2})
+    with patch("process_issues.queue_snapshots", return_value=0):
+        process_issues(api, trove_path=log)
+        assert api.closed == [1]
+        assert [rec["number"] for rec in load_trove(issue_outbox_path(log))] == [2]
+        # Next run closes #2 without applying it again
+        api.fail.clear()
+        process_issues(api, trove_path=log)
+    assert api.closed == [1, 2]
+    assert [e["url"] for e in load_trove(log)] == ["https://a.com", "https://b.com"]
+    assert load_trove(issue_outbox_path(log)) == []
+
+
+def test_process_issues_recovers_from_crash(tmp_path):
+    log = tmp_path / "trove.jsonl"
+    outbox = issue_outbox_path(log)
+    save_trove([{"url": "https://a.com", "added": "2025-01-01", "title": "A"}], log)
+    # #1 was appended but the run died before closing; #2's batch never reached the log
+    save_trove([
+        {"number": 1, "id": "I_1", "state": "applying", "log_offset": 0},
+        {"number": 2, "id": "I_2", "state": "applying", "log_offset": log.stat().st_size},
+    ], outbox)
+    api = FakeAPI([{"number": 1, "body": "url: https://a.com\ntitle: A"},
+                   {"number": 2, "body": "url: https://b.com\ntitle: B"}])
+    with patch("process_issues.queue_snapshots", return_value=0):
+        process_issues(api, trove_path=log)
+    assert api.closed == [1, 2]
+    assert [e["url"] for e in load_trove(log)] == ["https://a.com", "https://b.com"]
+    assert load_trove(outbox) == []
+
+
+def test_daemon_processes_queue_incrementally(tmp_path):
+    links = tmp_path / "links"
+    links.mkdir()
+    subprocess.run(["git", "init", "-q", str(links)], check=True)
+    subprocess.run(["git", "-C", str(links), "config", "user.name", "test"], check=True)
+    subprocess.run(["git", "-C", str(links), "config", "user.email", "t@example.com"], check=True)
+    log = links / "trove.jsonl"
+    queue = tmp_path / "queue"
+    output = tmp_path / "links.jsonl"
+    save_trove([{"url": "https://old.com", "added": "2025-01-01", "title": "Old"}], log)
+    queue.mkdir()
+    (queue / "001.json").write_text(json.dumps({"number": 1, "body": "url: https://a.com\ntitle: A"}))
+    (queue / "002.json").write_text(json.dumps({"number": 2, "body": "url: https://old.com\ntags: x"}))
+    (queue / "003.json").write_text("{not json")
+    os.utime(queue / "003.json", (0, 0))  # long past QUEUE_GRACE
+
+    with patch("process_issues.queue_snapshots", return_value=0), \
+            patch("process_issues.fetch_title") as mock_fetch:
+        run_daemon(queue, log, output=output, once=True)
+    mock_fetch.assert_not_called()  # titles given or URL already known
+    assert sorted(p.name for p in (queue / "processed").iterdir()) == ["001.json", "002.json"]
+    assert [p.name for p in (queue / "failed").iterdir()] == ["003.json"]
+    assert list(queue.glob("*.json")) == []
+    assert load_trove(output) == dedup(load_trove(log))
+    message = subprocess.run(["git", "-C", str(links), "log", "-1", "--format=%s"],
+                             capture_output=True, text=True, check=True).stdout.strip()
+    assert message == "Add 2 op(s) from 2 queued submission(s)"
+
+
+def test_live_trove_follows_appends_and_rewrites(tmp_path):
+    log = tmp_path / "trove.jsonl"
+    save_trove([{"url": "https://a.com", "added": "2025-01-01"}], log)
+    live = LiveTrove(log)
+    assert live.has_op("https://a.com") and not live.has_op("https://b.com")
+    append_entries([{"url": "https://b.com", "added": "2025-01-02"},
+                    {"op": "add_tag", "url": "https://a.com", "added": "2025-01-03", "tags": "t"}], log)
+    assert live.refresh() == 2
+    assert live.has_op("https://b.com") and live.has_op("https://a.com", "add_tag")
+    assert live.links() == dedup(load_trove(log))
+    # A rewritten (compacted) log is reloaded from scratch
+    save_trove([{"url": "https://c.com", "added": "2025-01-04"}], log)
+    live.refresh()
+    assert [link["url"] for link in live.links()] == ["https://c.com"]
+
+
+def test_daemon_recovers_interrupted_batch(tmp_path):
+    log = tmp_path / "trove.jsonl"
+    queue = tmp_path / "queue"
+    processing = queue / "processing"
+    processing.mkdir(parents=True)
+    save_trove([{"url": "https://old.com", "added": "2025-01-01", "title": "Old"}], log)
+    offset = log.stat().st_size
+    # Applied before the crash: the log grew past the recorded offset
+    append_entries([{"op": "set_notes", "url": "https://old.com", "notes": "n",
+                     "added": "2025-01-02"}], log)
+    (processing / "001.json").write_text(json.dumps({"number": 1, "body": "url: https://old.com\nnotes: n"}))
+    (processing / "log-offset").write_text(str(offset))
+
+    with patch("process_issues.queue_snapshots", return_value=0):
+        run_daemon(queue, log, once=True)
+    assert [p.name for p in (queue / "processed").iterdir()] == ["001.json"]
+    assert list(processing.iterdir()) == []
+    assert len(load_trove(log)) == 2
+
+    # Not applied: the batch is queued again and processed once
+    (processing / "002.json").write_text(json.dumps({"number": 2, "body": "url: https://a.com\ntitle: A"}))
+    (processing / "log-offset").write_text(str(log.stat().st_size))
+    with patch("process_issues.queue_snapshots", return_value=0):
+        run_daemon(queue, log, once=True)
+    assert sorted(p.name for p in (queue / "processed").iterdir()) == ["001.json", "002.json"]
+    assert [e["url"] for e in load_trove(log)][2:] == ["https://a.com"]
+
+
+def test_daemon_waits_for_partially_written_file(tmp_path):
+    log = tmp_path / "trove.jsonl"
+    queue = tmp_path / "queue"
+    queue.mkdir()
+    body = json.dumps({"number": 1, "body": "url: https://a.com\ntitle: A"})
+    (queue / "001.json").write_text(body[:10])  # producer still writing
+
+    with patch("process_issues.queue_snapshots", return_value=0):
+        run_daemon(queue, log, once=True)
+    assert [p.name for p in queue.glob("*.json")] == ["001.json"]
+    assert not (queue / "failed").exists()
+
+    (queue / "001.json").write_text(body)
+    with patch("process_issues.queue_snapshots", return_value=0):
+        run_daemon(queue, log, once=True)
+    assert [p.name for p in (queue / "processed").iterdir()] == ["001.json"]
+    assert [e["url"] for e in load_trove(log)] == ["https://a.com"]
@@ -0,0 +1,43 @@
+"""Tests for synth_trove.py synthetic log generator."""
+
+from collections import Counter
+
+import pytest
+
+from dedup_trove import dedup
+from synth_trove import generate, parse_mix
+
+
+def test_deterministic():
+    assert list(generate(500, seed=3)) == list(generate(500, seed=3))
+    assert list(generate(500, seed=3)) != list(generate(500, seed=4))
+
+
+def test_op_mix():
+    ops = Counter(e.get("op", "add") for e in generate(5000, seed=1))
+    assert set(ops) == {"add", "add_tag", "remove_tag", "set_title", "set_notes",
+                        "delete", "rename_tag"}
+    assert ops["add"] > ops["add_tag"] > ops["delete"]
+
+
+def test_custom_mix():
+    mix = parse_mix("add=1,add_tag=1")
+    ops = Counter(e.get("op", "add") for e in generate(1000, mix=mix))
+    assert set(ops) == {"add", "add_tag"}
+
+
+def test_parse_mix_rejects_unknown_op():
+    with pytest.raises(ValueError):
+        parse_mix("add=1,frobnicate=2")
+
+
+def test_ops_target_added_urls():
+    added = set()
+    for entry in generate(2000, seed=2):
+        if entry.get("op", "add") == "add":
+            added.add(entry["url"])
+        elif entry["op"] == "rename_tag":
+            assert set(entry["urls"].split()) <= added
+        else:
+            assert entry["url"] in added
+    assert dedup(generate(2000, seed=2))
@@ -0,0 +1,122 @@
+"""Tests for trove_index.py URL → op-offset index."""
+
+import json
+import multiprocessing
+
+import trove_index
+from trove_index import TroveIndex
+from trove_utils import append_entries, index_path, save_trove
+
+
+def seed(path):
+    save_trove([
+        {"url": "https://a.com", "added": "2025-01-01", "tags": "games"},
+        {"url": "https://b.com", "added": "2025-01-02"},
+        {"op": "add_tag", "url": "https://a.com", "added": "2025-01-03", "tags": "retro"},
+        {"op": "rename_tag", "remove_tag": "retro", "add_tags": "classic",
+         "urls": "https://a.com https://c.com", "added": "2025-01-04"},
+        {"op": "set_tag_desc", "tag": "games", "description": "Games"},
+    ], path)
+
+
+def test_lookup(tmp_path):
+    log = tmp_path / "trove-log.jsonl"
+    seed(log)
+    with TroveIndex(log) as index:
+        assert "https://a.com" in index
+        assert "https://b.com" in index
+        assert "https://nope.com" not in index
+        assert [e.get("op", "add") for e in index.ops("https://a.com")] == ["add", "add_tag", "rename_tag"]
+        assert index.has_op("https://b.com", "add")
+        # Only referenced by rename_tag
+        assert "https://c.com" in index
+        assert not index.has_op("https://c.com", "add")
+    assert index_path(log).exists()
+
+
+def test_offsets_point_at_entries(tmp_path):
+    log = tmp_path / "trove-log.jsonl"
+    seed(log)
+    data = log.read_bytes()
+    with TroveIndex(log) as index:
+        for offset in index.offsets("https://a.com"):
+            entry = json.loads(data[offset:data.index(b"\n", offset)])
+            assert entry.get("url") == "https://a.com" or "https://a.com" in entry["urls"]
+
+
+def test_append_updates_index(tmp_path):
+    log = tmp_path / "trove-log.jsonl"
+    seed(log)
+    TroveIndex(log).close()
+    append_entries([{"url": "https://d.com", "added": "2025-02-01"},
+                    {"op": "delete", "url": "https://a.com", "added": "2025-02-02"}], log)
+    with TroveIndex(log) as index:
+        assert index.covered == log.stat().st_size
+        assert "https://d.com" in index
+        assert index.ops("https://a.com")[-1]["op"] == "delete"
+
+
+def test_rewrite_invalidates_index(tmp_path):
+    log = tmp_path / "trove-log.jsonl"
+    seed(log)
+    TroveIndex(log).close()
+    save_trove([{"url": "https://z.com", "added": "2025-01-01"}], log)
+    with TroveIndex(log) as index:
+        assert "https://a.com" not in index
+        assert "https://z.com" in index
+
+
+def test_hand_edited_log_rebuilds(tmp_path):
+    log = tmp_path / "trove-log.jsonl"
+    seed(log)
+    TroveIndex(log).close()
+    log.write_text(json.dumps({"url": "https://y.com"}) + "\n")
+    with TroveIndex(log) as index:
+        assert list(index.ops("https://y.com")) == [{"url": "https://y.com"}]
+        assert "https://a.com" not in index
+
+
+def test_grows_table_when_overloaded(tmp_path, monkeypatch):
+    monkeypatch.setattr(trove_index, "MIN_BUCKETS", 2)
+    log = tmp_path / "trove-log.jsonl"
+    seed(log)
+    TroveIndex(log).close()
+    append_entries([{"url": f"https://{i}.com"} for i in range(40)], log)
+    with TroveIndex(log) as index:
+        assert index.nbuckets >= 32
+        assert all(f"https://{i}.com" in index for i in range(40))
+        assert "https://a.com" in index
+
+
+def test_reader_survives_append_by_another_writer(tmp_path):
+    log = tmp_path / "trove-log.jsonl"
+    seed(log)
+    with TroveIndex(log) as reader:
+        # Updates the index file in place under the reader's map
+        append_entries([{"url": f"https://new{i}.com", "added": "2025-03-01"}
+                        for i in range(8)], log)
+        assert all(f"https://new{i}.com" in reader for i in range(8))
+        assert "https://a.com" in reader
+        assert reader.covered == log.stat().st_size
+
+
+def _append_many(log, worker):
+    for i in range(50):
+        append_entries([{"url": f"https://{worker}-{i}.com", "added": "2025-03-01"}], log)
+
+
+def test_concurrent_appenders_keep_index_consistent(tmp_path):
+    log = tmp_path / "trove-log.jsonl"
+    seed(log)
+    TroveIndex(log).close()
+    ctx = multiprocessing.get_context("fork")
+    procs = [ctx.Process(target=_append_many, args=(log, w)) for w in range(4)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    assert all(proc.exitcode == 0 for proc in procs)
+    with TroveIndex(log) as index:
+        assert index.covered == log.stat().st_size
+        assert len(index) == 5 + 200  # seed indexes 5 records (rename_tag under two URLs)
+        assert all(f"https://{w}-{i}.com" in index for w in range(4) for i in range(50))
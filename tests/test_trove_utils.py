@@ -0,0 +1,105 @@
+"""Tests for trove_utils.py log I/O."""
+
+import json
+
+import pytest
+
+import trove_utils
+from trove_utils import append_entries, iter_trove, iter_trove_offsets, load_trove, save_trove
+
+
+def write_log(path, entries):
+    path.write_text("".join(json.dumps(e) + "\n" for e in entries))
+
+
+def test_iter_trove_matches_load(tmp_path):
+    log = tmp_path / "log.jsonl"
+    entries = [{"url": f"https://{i}.com", "added": "2025-01-01"} for i in range(50)]
+    write_log(log, entries)
+    assert list(iter_trove(log)) == entries
+    assert load_trove(log) == entries
+
+
+def test_iter_trove_across_chunk_boundaries(tmp_path, monkeypatch):
+    """Lines split across read chunks are reassembled."""
+    monkeypatch.setattr(trove_utils, "CHUNK_SIZE", 7)
+    log = tmp_path / "log.jsonl"
+    entries = [{"url": "https://a.com", "title": "x" * i} for i in range(20)]
+    write_log(log, entries)
+    assert list(iter_trove(log)) == entries
+
+
+def test_iter_trove_offsets(tmp_path):
+    log = tmp_path / "log.jsonl"
+    write_log(log, [{"url": "https://a.com"}, {"url": "https://b.com"}])
+    data = log.read_bytes()
+    for offset, entry in iter_trove_offsets(log):
+        line = data[offset:data.index(b"\n", offset)]
+        assert json.loads(line) == entry
+
+
+def test_iter_trove_skips_blank_and_handles_missing_newline(tmp_path):
+    log = tmp_path / "log.jsonl"
+    log.write_text('{"url": "https://a.com"}\n\n{"url": "https://b.com"}')
+    assert [e["url"] for e in iter_trove(log)] == ["https://a.com", "https://b.com"]
+
+
+def test_iter_trove_reports_bad_line(tmp_path):
+    log = tmp_path / "log.jsonl"
+    log.write_text('{"url": "https://a.com"}\n{"url": oops}\n')
+    with pytest.raises(ValueError, match=r":2: invalid JSON"):
+        list(iter_trove(log))
+
+
+def test_iter_trove_missing_file(tmp_path):
+    assert list(iter_trove(tmp_path / "nope.jsonl")) == []
+
+
+def test_save_trove_from_same_file(tmp_path):
+    """save_trove can consume a generator streaming from its own target."""
+    log = tmp_path / "log.jsonl"
+    write_log(log, [{"url": "https://a.com"}, {"url": "https://b.com"}])
+    save_trove((dict(e, seen=True) for e in iter_trove(log)), log)
+    assert load_trove(log) == [{"url": "https://a.com", "seen": True},
+                               {"url": "https://b.com", "seen": True}]
+
+
+def test_append_entries(tmp_path):
+    log = tmp_path / "log.jsonl"
+    assert append_entries([{"url": "https://a.com"}], log) == 1
+    assert append_entries([{"url": "https://b.com"}, {"url": "https://c.com"}], log) == 2
+    assert append_entries([], log) == 0
+    assert [e["url"] for e in load_trove(log)] == ["https://a.com", "https://b.com", "https://c.com"]
+
+
+def test_append_entries_repairs_missing_newline(tmp_path):
+    log = tmp_path / "log.jsonl"
+    log.write_text('{"url": "https://a.com"}')
+    append_entries([{"url": "https://b.com"}], log)
+    assert log.read_text() == '{"url": "https://a.com"}\n{"url": "https://b.com"}\n'
+
+
+# --- profiling ---
+
+def test_profiler_disabled_is_noop():
+    profiler = trove_utils.Profiler()
+    with profiler.span("load"):
+        profiler.count("entries", 5)
+    assert profiler.spans == {} and profiler.counters == {}
+    assert profiler.finish() is None
+
+
+def test_profiler_summary(tmp_path, monkeypatch):
+    monkeypatch.setattr(trove_utils, "PROFILE_DIR", tmp_path)
+    monkeypatch.setattr(trove_utils.atexit, "register", lambda fn: None)
+    profiler = trove_utils.Profiler()
+    profiler.start("test")
+    with profiler.span("load"):
+        profiler.count("entries", 2)
+    with profiler.span("load"):
+        profiler.count("entries")
+    path = profiler.finish()
+    summary = json.loads(path.read_text())
+    assert summary["script"] == "test"
+    assert summary["spans"]["load"]["count"] == 2
+    assert summary["counters"] == {"entries": 3}
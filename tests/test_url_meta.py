@@ -0,0 +1,114 @@
+import os
+from datetime import datetime, timedelta, timezone
+
+import add_link
+import compact_trove
+import url_meta
+from hostpool import HostStats
+from url_meta import NEGATIVE_TTL, TTLS, UrlMetaCache, normalize_url
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def make_cache(tmp_path, **kwargs):
+    return UrlMetaCache(tmp_path / "url-meta", **kwargs)
+
+
+def test_normalize_url():
+    assert normalize_url("HTTPS://Example.COM:443?utm_source=x#frag") == "https://example.com/"
+    assert normalize_url("http://example.com:8080/a?id=1&fbclid=z") == "http://example.com:8080/a?id=1"
+
+
+def test_equivalent_urls_share_an_entry(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("https://example.com/a?utm_campaign=x", "title", "A", now=NOW)
+    assert cache.get("https://EXAMPLE.com/a#top", "title", now=NOW)["value"] == "A"
+    assert len(list(cache.root.iterdir())) == 1
+
+
+def test_ttl_per_kind(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("https://example.com/", "title", "A", now=NOW)
+    cache.put("https://example.com/", "head", {"status": 200}, now=NOW)
+    later = NOW + TTLS["head"] + timedelta(seconds=1)
+    assert cache.get("https://example.com/", "title", now=later)["value"] == "A"
+    assert cache.get("https://example.com/", "head", now=later) is None
+
+
+def test_negative_results_expire_sooner(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put("https://example.com/", "title", None, now=NOW)
+    entry = cache.get("https://example.com/", "title", now=NOW)
+    assert entry is not None and entry["value"] is None
+    assert cache.get("https://example.com/", "title", now=NOW + NEGATIVE_TTL + timedelta(1)) is None
+
+
+def test_disabled_without_parent_dir(tmp_path):
+    cache = UrlMetaCache(tmp_path / "missing" / "url-meta")
+    cache.put("https://example.com/", "title", "A")
+    assert cache.get("https://example.com/", "title") is None
+    assert not (tmp_path / "missing").exists()
+
+
+def test_eviction_removes_oldest_files(tmp_path):
+    cache = make_cache(tmp_path, max_bytes=1000)
+    for i in range(20):
+        cache.put(f"https://example.com/{i}", "title", "x" * 50, now=NOW)
+        path = cache._path(f"https://example.com/{i}")
+        os.utime(path, (i, i))
+    total = sum(p.stat().st_size for p in cache.root.iterdir())
+    assert total <= 1000
+    assert cache.get("https://example.com/19", "title", now=NOW) is not None
+    assert cache.get("https://example.com/0", "title", now=NOW) is None
+
+
+def test_cached_calls_fetch_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(url_meta, "URL_META", make_cache(tmp_path))
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return None
+
+    assert url_meta.cached("https://example.com/", "title", fetch) is None
+    assert url_meta.cached("https://example.com/", "title", fetch) is None
+    assert len(calls) == 1
+
+
+def test_title_fetch_primes_link_check(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path)
+    monkeypatch.setattr(url_meta, "URL_META", cache)
+    monkeypatch.setattr(compact_trove, "URL_META", cache)
+    cache.put("https://example.com/", "head",
+              {"status": 200, "final_url": "https://example.com/home", "content_type": "text/html"})
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("unexpected request")
+
+    monkeypatch.setattr(compact_trove.http_client, "request", no_network)
+    monkeypatch.setattr(add_link.http_client, "request", no_network)
+    cache.put("https://example.com/", "title", "Home")
+    assert add_link.fetch_title("https://example.com/") == "Home"
+    status, alive, validators = compact_trove.cached_check("https://example.com/", {"etag": '"v1"'})
+    assert (status, alive) == (200, True)
+    assert validators == {"etag": '"v1"', "final_url": "https://example.com/home"}
+
+
+def test_cache_hits_skip_host_stats(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path)
+    monkeypatch.setattr(compact_trove, "URL_META", cache)
+    urls = [f"https://slow.example/{i}" for i in range(4)]
+    for url in urls:
+        cache.put(url, "head", {"status": 200, "final_url": url, "content_type": "text/html"})
+    stats = HostStats()
+    stats.record("slow.example", 2.4, ok=True)
+    before = stats.timeout("slow.example")
+
+    def no_network(*args, **kwargs):
+        raise AssertionError("unexpected request")
+
+    monkeypatch.setattr(compact_trove, "check_link", no_network)
+    check_log = {}
+    compact_trove.health_check([{"url": url} for url in urls], check_log, host_stats=stats)
+    assert all(check_log[url]["alive"] for url in urls)
+    assert stats.timeout("slow.example") == before
@@ -0,0 +1,90 @@
+"""Tests for wayback.py snapshot lookups and cache."""
+
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch, MagicMock
+
+from http_client import FetchError
+from wayback import (NEGATIVE_TTL, POSITIVE_TTL, SnapshotCache, find_snapshots, is_fresh,
+                     latest_snapshot, save_snapshot, snapshot_time)
+
+NOW = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def cdx_response(*timestamps, status=200):
+    rows = [["timestamp", "original"]] + [[ts, "https://a.com/"] for ts in timestamps]
+    resp = MagicMock()
+    resp.status = status
+    resp.read.return_value = json.dumps(rows).encode() if timestamps else b"[]"
+    return resp
+
+
+def test_latest_snapshot_takes_last_row():
+    with patch("wayback.http_client.request", return_value=cdx_response("20200101000000", "20250102030405")) as req:
+        snap = latest_snapshot("https://a.com/")
+    assert snap == {"archive_url": "https://web.archive.org/web/20250102030405/https://a.com/",
+                    "timestamp": "20250102030405"}
+    assert "limit=-1" in req.call_args[0][1]
+    assert snapshot_time(snap["timestamp"]) == datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc)
+
+
+def test_latest_snapshot_none():
+    with patch("wayback.http_client.request", return_value=cdx_response()):
+        assert latest_snapshot("https://a.com/") is None
+
+
+def test_cache_ttls(tmp_path):
+    cache = SnapshotCache(tmp_path / "cache.json")
+    cache.put("https://hit.com", {"archive_url": "https://web.archive.org/web/1/x", "timestamp": "1"}, now=NOW)
+    cache.put("https://miss.com", None, now=NOW)
+    later = NOW + NEGATIVE_TTL + (POSITIVE_TTL - NEGATIVE_TTL) / 2
+    assert cache.get("https://hit.com", later)["archive_url"] == "https://web.archive.org/web/1/x"
+    assert cache.get("https://miss.com", NOW)["archive_url"] is None
+    assert cache.get("https://miss.com", later) is None
+    assert cache.get("https://hit.com", NOW + POSITIVE_TTL * 2) is None
+
+    cache.save()
+    assert SnapshotCache(tmp_path / "cache.json").entries == cache.entries
+
+
+def test_find_snapshots_looks_up_misses_only():
+    cache = SnapshotCache()
+    cache.put("https://cached.com", None)
+    urls = ["https://cached.com", "https://a.com", "https://b.com", "https://err.com"]
+
+    def fake_request(method, url, **kwargs):
+        if "err.com" in url:
+            raise FetchError("boom")
+        return cdx_response("20240101000000")
+
+    with patch("wayback.http_client.request", side_effect=fake_request) as req:
+        results = {url: (entry, error) for url, entry, error in
+                   find_snapshots(urls, cache, lane_interval=0)}
+    assert req.call_count == 3
+    assert results["https://cached.com"] == (cache.entries["https://cached.com"], None)
+    assert results["https://a.com"][0]["timestamp"] == "20240101000000"
+    assert results["https://err.com"][0] is None
+    assert isinstance(results["https://err.com"][1], FetchError)
+    # Errors are not cached
+    assert "https://err.com" not in cache.entries
+    assert "https://b.com" in cache.entries
+
+
+def test_save_snapshot_reads_location():
+    resp = MagicMock()
+    resp.status = 302
+    resp.headers = {"Location": "https://web.archive.org/web/20250102030405/https://a.com/"}
+    with patch("wayback.http_client.request", return_value=resp):
+        assert save_snapshot("https://a.com/") == (302, {
+            "archive_url": "https://web.archive.org/web/20250102030405/https://a.com/",
+            "timestamp": "20250102030405",
+        })
+    resp.status, resp.headers = 429, {}
+    with patch("wayback.http_client.request", return_value=resp):
+        assert save_snapshot("https://a.com/") == (429, None)
+
+
+def test_is_fresh():
+    assert is_fresh({"timestamp": "20251231000000"}, timedelta(days=2), NOW)
+    assert not is_fresh({"timestamp": "20251201000000"}, timedelta(days=2), NOW)
+    assert not is_fresh({"archive_url": None, "timestamp": None}, timedelta(days=2), NOW)